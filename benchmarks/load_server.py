@@ -0,0 +1,140 @@
+"""
+chatweather HTTP 챗봇 서버(chatweather.server)의 로컬 부하 테스트.
+
+로컬 대체 서버(stub_servers)와 챗봇 서버를 띄우고, 동시 사용자(세션)마다 keep-alive 연결로
+여러 턴을 보내 응답 지연 시간 분포, 상태 코드별 횟수, 처리량을 보고합니다.
+
+사용 예:
+    python benchmarks/load_server.py --users 64 --turns 5 --max-concurrency 16
+    python benchmarks/load_server.py --url http://127.0.0.1:8000 --users 32
+"""
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlparse
+
+from run_pipeline import CHAT_QUERIES, WEATHER_QUERIES, configure_environment, summarize
+from stub_servers import OpenAIStubServer, WeatherStubServer
+
+
+def run_user(base_url, user_index, turns, weather_ratio, seed, latencies, statuses, lock):
+    """세션 하나로 turns번 대화합니다. 연결은 keep-alive로 재사용합니다."""
+    rng = random.Random(seed + user_index)
+    parsed = urlparse(base_url)
+    connection = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=60)
+    session_id = f"user-{user_index}"
+    try:
+        for _ in range(turns):
+            query = rng.choice(WEATHER_QUERIES) if rng.random() < weather_ratio else rng.choice(CHAT_QUERIES)
+            body = json.dumps({'session_id': session_id, 'message': query}).encode('utf-8')
+            started = time.perf_counter()
+            try:
+                connection.request('POST', '/chat', body=body, headers={'Content-Type': 'application/json'})
+                response = connection.getresponse()
+                response.read()
+                status = response.status
+                if response.getheader('Connection', '').lower() == 'close':
+                    connection.close()
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                status = 'connection_error'
+            elapsed = time.perf_counter() - started
+            with lock:
+                statuses[status] += 1
+                if status == 200:
+                    latencies.append(elapsed)
+    finally:
+        connection.close()
+
+
+def run_load(base_url, args):
+    latencies = []
+    statuses = Counter()
+    lock = threading.Lock()
+    threads = [
+        threading.Thread(
+            target=run_user,
+            args=(base_url, index, args.turns, args.weather_ratio, args.seed, latencies, statuses, lock),
+        )
+        for index in range(args.users)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {
+        'elapsed_s': round(elapsed, 3),
+        'requests': sum(statuses.values()),
+        'throughput_rps': round(statuses[200] / elapsed, 3) if elapsed else None,
+        'statuses': {str(status): count for status, count in sorted(statuses.items(), key=str)},
+        'latency': summarize(latencies),
+    }
+
+
+def run(args):
+    if args.url:
+        return run_load(args.url, args)
+
+    from chatweather.server import ChatServer
+
+    with WeatherStubServer(args.weather_latency, args.jitter) as weather_server, \
+            OpenAIStubServer(args.openai_latency, args.jitter) as openai_server:
+        configure_environment(weather_server.url, openai_server.url)
+        server = ChatServer(
+            port=0, max_concurrency=args.max_concurrency, queue_timeout=args.queue_timeout,
+            request_timeout=args.request_timeout, max_connections=args.max_connections,
+        ).start()
+        try:
+            result = run_load(server.url, args)
+            result['server'] = server.stats()
+        finally:
+            server.shutdown()
+        result['upstream'] = {'weather': weather_server.call_counts(), 'openai': openai_server.call_counts()}
+        return result
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="chatweather 챗봇 서버 부하 테스트")
+    parser.add_argument('--url', help="이미 실행 중인 서버 주소. 없으면 로컬 대체 서버와 함께 서버를 띄웁니다.")
+    parser.add_argument('--users', type=int, default=32, help="동시 사용자(세션) 수")
+    parser.add_argument('--turns', type=int, default=5, help="사용자별 대화 턴 수")
+    parser.add_argument('--weather-ratio', type=float, default=0.8, help="날씨 질의 비율 (0~1)")
+    parser.add_argument('--max-concurrency', type=int, default=16)
+    parser.add_argument('--queue-timeout', type=float, default=1.0)
+    parser.add_argument('--request-timeout', type=float, default=30.0)
+    parser.add_argument('--max-connections', type=int, default=256)
+    parser.add_argument('--weather-latency', type=float, default=0.05, help="날씨 서버 지연(초)")
+    parser.add_argument('--openai-latency', type=float, default=0.2, help="OpenAI 서버 지연(초)")
+    parser.add_argument('--jitter', type=float, default=0.02, help="지연 지터 최대값(초)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="결과를 저장할 JSON 파일 경로")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    result = run(args)
+    latency = result['latency']
+    print(f"requests={result['requests']} elapsed={result['elapsed_s']}s "
+          f"throughput={result['throughput_rps']} rps")
+    print("statuses:", json.dumps(result['statuses']))
+    if latency['count']:
+        print(f"latency(ms): p50={latency['p50_ms']} p95={latency['p95_ms']} "
+              f"p99={latency['p99_ms']} max={latency['max_ms']}")
+    if 'server' in result:
+        print("server:", json.dumps(result['server']))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"결과를 {args.output}에 저장했습니다.")
+    return result
+
+
+if __name__ == "__main__":
+    main()
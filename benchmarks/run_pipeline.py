@@ -0,0 +1,286 @@
+"""
+chatweather 채팅 파이프라인의 지연 시간 벤치마크.
+
+로컬 대체 서버(stub_servers)를 띄우고 chatweather가 그 서버를 사용하도록 설정한 뒤,
+한국어 날씨/일반 질의를 지정한 동시성으로 실행하여 단계별 p50/p95/p99 지연 시간,
+처리량, 호출 수를 보고하고 JSON으로 저장합니다.
+
+사용 예:
+    python benchmarks/run_pipeline.py --requests 200 --concurrency 16 --output bench.json
+    python benchmarks/run_pipeline.py --openai-latency 0.3 --baseline bench.json
+"""
+import argparse
+import functools
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stub_servers import OpenAIStubServer, WeatherStubServer  # noqa: E402
+
+WEATHER_QUERIES = [
+    "오늘 서울 날씨 어때?",
+    "내일 부산 날씨 알려줘",
+    "모레 오후 3시 대구 날씨",
+    "내일 아침 제주도 날씨는?",
+    "오늘 날씨",
+    "이번 주말 강릉 날씨 어때?",
+    "다음주 월요일 인천 날씨 알려줘",
+    "내일 부산에 비 올까? 날씨 알려줘",
+]
+
+CHAT_QUERIES = [
+    "안녕",
+    "우산을 챙겨야 할까?",
+    "고마워!",
+    "옷은 어떻게 입는 게 좋을까?",
+]
+
+STAGES = ('turn', 'extract', 'weather', 'llm')
+
+
+def percentile(values, q):
+    """정렬된 값 목록의 q 백분위수(nearest-rank)를 반환합니다."""
+    if not values:
+        return None
+    rank = max(1, int(round(q / 100 * len(values) + 0.5)))
+    return values[min(rank, len(values)) - 1]
+
+
+def summarize(samples):
+    """지연 시간 목록(초)의 요약 통계(ms)를 반환합니다."""
+    values = sorted(samples)
+    if not values:
+        return {'count': 0}
+    return {
+        'count': len(values),
+        'mean_ms': round(sum(values) / len(values) * 1000, 3),
+        'p50_ms': round(percentile(values, 50) * 1000, 3),
+        'p95_ms': round(percentile(values, 95) * 1000, 3),
+        'p99_ms': round(percentile(values, 99) * 1000, 3),
+        'max_ms': round(values[-1] * 1000, 3),
+    }
+
+
+class StageTimer:
+    """chatbot 모듈의 단계 함수를 감싸 호출별 소요 시간을 기록합니다."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        with self._lock:
+            self.samples[stage].append(seconds)
+
+    def wrap(self, module, name, stage):
+        original = getattr(module, name)
+
+        @functools.wraps(original)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - started)
+
+        setattr(module, name, timed)
+        return original
+
+
+def configure_environment(weather_url, openai_url):
+    """chatweather가 대체 서버를 사용하도록 환경 변수와 OpenAI 클라이언트를 설정합니다."""
+    os.environ['WEATHER_API_KEY'] = 'bench-weather-key'
+    os.environ['WEATHER_API_BASE_URL'] = weather_url
+    os.environ['OPENAI_API_KEY'] = 'bench-openai-key'
+    os.environ['OPENAI_BASE_URL'] = f"{openai_url}/v1/"
+
+    import openai
+    openai.api_key = os.environ['OPENAI_API_KEY']
+    openai.base_url = os.environ['OPENAI_BASE_URL']
+
+
+def build_workload(total, weather_ratio, seed):
+    rng = random.Random(seed)
+    return [
+        rng.choice(WEATHER_QUERIES) if rng.random() < weather_ratio else rng.choice(CHAT_QUERIES)
+        for _ in range(total)
+    ]
+
+
+def run(args):
+    tail = {'tail_rate': args.tail_rate, 'tail_latency': args.tail_latency}
+    with WeatherStubServer(args.weather_latency, args.jitter, args.weather_error_rate, **tail) as weather_server, \
+            OpenAIStubServer(args.openai_latency, args.jitter, args.openai_error_rate, **tail) as openai_server:
+        configure_environment(weather_server.url, openai_server.url)
+        openai_server.cache_min_tokens = args.prompt_cache_min_tokens
+
+        from chatweather import chatbot, metrics, ratelimit, weather
+
+        # 대체 서버에는 요청 한도가 없으므로, --rate-limit을 지정하지 않으면 클라이언트 한도도 끔
+        ratelimit.set_rate_limiting(args.rate_limit)
+
+        if args.metrics_output:
+            metrics.enable_metrics()
+
+        chatbot.configure_answer_cache(maxsize=args.answer_cache_size)
+        from chatweather import hedging
+        hedging.reset_hedging()
+        for upstream in args.hedge:
+            hedging.configure_hedging(upstream)
+        from chatweather import speculation
+        speculation.set_speculation(args.speculate)
+        speculation.reset_speculation_stats()
+
+        if args.cold:
+            weather.clear_weather_cache()
+            chatbot.clear_extraction_cache()
+
+        timer = StageTimer()
+        originals = {
+            name: timer.wrap(chatbot, name, stage)
+            for name, stage in (
+                ('extract_city_and_date', 'extract'),
+                ('generate_weather_info', 'weather'),
+                ('call_openai_api', 'llm'),
+            )
+        }
+
+        def turn(query):
+            started = time.perf_counter()
+            if '날씨' in query:
+                response = chatbot.generate_weather_response(query, [], extraction_mode=args.extraction_mode,
+                                                             response_mode=args.response_mode,
+                                                             deadline=args.turn_budget)
+            else:
+                response = chatbot.call_openai_api(chatbot.build_chat_messages(query, []), max_tokens=200)
+            timer.record('turn', time.perf_counter() - started)
+            return response
+
+        workload = build_workload(args.requests, args.weather_ratio, args.seed)
+        started = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+                responses = list(executor.map(turn, workload))
+        finally:
+            for name, original in originals.items():
+                setattr(chatbot, name, original)
+        elapsed = time.perf_counter() - started
+
+        failures = sum(
+            1 for response in responses
+            if response is None or response.startswith("죄송합니다")
+        )
+        return {
+            'config': vars(args),
+            'elapsed_s': round(elapsed, 3),
+            'throughput_rps': round(len(workload) / elapsed, 3) if elapsed else None,
+            'turns': len(workload),
+            'failed_turns': failures,
+            'stages': {stage: summarize(timer.samples.get(stage, [])) for stage in STAGES},
+            'upstream': {
+                'weather': weather_server.call_counts(),
+                'openai': openai_server.call_counts(),
+            },
+            'prompt_tokens': openai_server.token_counts(),
+            'cache': weather.get_cache_stats(),
+            'extraction_cache': chatbot.get_extraction_cache_stats(),
+            'answer_cache': chatbot.get_answer_cache_stats(),
+            'hedging': hedging.get_hedging_stats(),
+            'speculation': speculation.get_speculation_stats(),
+        }
+
+
+def compare(result, baseline):
+    """기준 결과 대비 단계별 p50/p95 변화를 출력합니다."""
+    print("\n기준 결과 대비 변화:")
+    for stage in STAGES:
+        current = result['stages'].get(stage, {})
+        previous = baseline.get('stages', {}).get(stage, {})
+        for key in ('p50_ms', 'p95_ms'):
+            if current.get(key) is None or not previous.get(key):
+                continue
+            change = (current[key] - previous[key]) / previous[key] * 100
+            print(f"  {stage:8s} {key}: {previous[key]:9.3f} -> {current[key]:9.3f} ({change:+.1f}%)")
+    if baseline.get('throughput_rps') and result.get('throughput_rps'):
+        change = (result['throughput_rps'] - baseline['throughput_rps']) / baseline['throughput_rps'] * 100
+        print(f"  throughput: {baseline['throughput_rps']} -> {result['throughput_rps']} rps ({change:+.1f}%)")
+
+
+def report(result):
+    print(f"turns={result['turns']} failed={result['failed_turns']} "
+          f"elapsed={result['elapsed_s']}s throughput={result['throughput_rps']} rps")
+    print(f"{'stage':8s} {'count':>6s} {'p50(ms)':>10s} {'p95(ms)':>10s} {'p99(ms)':>10s}")
+    for stage in STAGES:
+        summary = result['stages'][stage]
+        if not summary['count']:
+            continue
+        print(f"{stage:8s} {summary['count']:6d} {summary['p50_ms']:10.3f} "
+              f"{summary['p95_ms']:10.3f} {summary['p99_ms']:10.3f}")
+    print("upstream calls:", json.dumps(result['upstream'], ensure_ascii=False))
+    tokens = result.get('prompt_tokens') or {}
+    if tokens.get('prompt'):
+        print(f"prompt tokens: {tokens['prompt']} (cached {tokens.get('cached', 0)}, "
+              f"{tokens.get('cached', 0) / tokens['prompt'] * 100:.1f}%)")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="chatweather 파이프라인 지연 시간 벤치마크")
+    parser.add_argument('--requests', type=int, default=200, help="실행할 대화 턴 수")
+    parser.add_argument('--concurrency', type=int, default=8, help="동시 실행 턴 수")
+    parser.add_argument('--weather-ratio', type=float, default=0.8, help="날씨 질의 비율 (0~1)")
+    parser.add_argument('--extraction-mode', default='prompt', choices=('prompt', 'tool'))
+    parser.add_argument('--response-mode', default='rich', choices=('rich', 'fast', 'auto'))
+    parser.add_argument('--weather-latency', type=float, default=0.05, help="날씨 서버 지연(초)")
+    parser.add_argument('--openai-latency', type=float, default=0.2, help="OpenAI 서버 지연(초)")
+    parser.add_argument('--jitter', type=float, default=0.02, help="지연 지터 최대값(초)")
+    parser.add_argument('--tail-rate', type=float, default=0.0, help="대체 서버 응답에 꼬리 지연을 더할 확률 (0~1)")
+    parser.add_argument('--tail-latency', type=float, default=1.0, help="꼬리 지연 시간(초)")
+    parser.add_argument('--weather-error-rate', type=float, default=0.0)
+    parser.add_argument('--openai-error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cold', action='store_true', help="시작 전에 캐시를 비웁니다")
+    parser.add_argument('--rate-limit', action='store_true', help="클라이언트 요청 한도를 적용합니다")
+    parser.add_argument('--prompt-cache-min-tokens', type=int, default=1024,
+                        help="OpenAI 대체 서버가 프롬프트 캐시를 적용하는 최소 토큰 수")
+    parser.add_argument('--answer-cache-size', type=int, default=0,
+                        help="이전 대화가 없는 날씨 답변을 캐시할 최대 키 수 (0이면 끔)")
+    parser.add_argument('--turn-budget', type=float, help="날씨 턴의 제한 시간(초). 없으면 제한하지 않습니다")
+    parser.add_argument('--hedge', action='append', choices=('weather', 'openai'), default=[],
+                        help="응답이 p95보다 늦으면 같은 요청을 한 번 더 보낼 외부 API (여러 번 지정 가능)")
+    parser.add_argument('--speculate', action='store_true',
+                        help="GPT 추출과 동시에 추측한 도시의 날씨를 미리 가져옵니다")
+    parser.add_argument('--output', help="결과를 저장할 JSON 파일 경로")
+    parser.add_argument('--baseline', help="비교할 기준 결과 JSON 파일 경로")
+    parser.add_argument('--metrics-output', help="지표를 켜고 Prometheus 텍스트 형식으로 저장할 파일 경로")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    result = run(args)
+    report(result)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            compare(result, json.load(f))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"결과를 {args.output}에 저장했습니다.")
+    if args.metrics_output:
+        from chatweather import metrics
+        with open(args.metrics_output, 'w', encoding='utf-8') as f:
+            f.write(metrics.export_prometheus())
+        print(f"지표를 {args.metrics_output}에 저장했습니다.")
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+chatweather 모듈의 임포트(콜드 스타트) 시간 벤치마크.
+
+`python -X importtime`으로 대상 모듈을 새 프로세스에서 여러 번 임포트하여
+누적 임포트 시간의 중앙값을 측정하고, 임계값이나 기준 결과보다 느려지면 종료 코드 1을 반환합니다.
+무거운 모듈(openai, requests, dotenv, httpx)이 임포트 시점에 함께 임포트되는지도 확인합니다.
+
+사용 예:
+    python benchmarks/startup.py
+    python benchmarks/startup.py --repeat 20 --output startup.json
+    python benchmarks/startup.py --baseline startup.json --max-regression 0.2
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 측정 대상 모듈과 누적 임포트 시간 임계값(ms)
+DEFAULT_THRESHOLDS_MS = {
+    'chatweather.weather': 60.0,
+    'chatweather.chatbot': 100.0,
+    'run_pyWeather': 100.0,
+}
+
+# 대상 모듈을 임포트할 때 함께 임포트되면 안 되는 모듈 (첫 사용 시 임포트)
+DEFERRED_MODULES = ('openai', 'requests', 'dotenv', 'httpx')
+
+
+def parse_importtime(stderr):
+    """
+    -X importtime 출력을 파싱합니다.
+
+    Returns:
+        dict: 모듈 이름 -> (자체 시간(us), 누적 시간(us)). 같은 모듈이 여러 번 나오면 첫 항목을 사용합니다.
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        name = parts[2].strip()
+        modules.setdefault(name, (int(parts[0]), int(parts[1])))
+    return modules
+
+
+def measure_once(module):
+    """새 프로세스에서 module을 임포트하고 (누적 임포트 시간(ms), 프로세스 시간(ms), 임포트된 모듈 집합)을 반환합니다."""
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if completed.returncode != 0:
+        raise RuntimeError(f"'{module}' 임포트 실패:\n{completed.stderr[-2000:]}")
+    modules = parse_importtime(completed.stderr)
+    if module not in modules:
+        raise RuntimeError(f"'{module}'의 임포트 시간을 찾을 수 없습니다.")
+    return modules[module][1] / 1000, wall_ms, set(modules)
+
+
+def measure(module, repeat):
+    """module의 임포트 시간을 repeat번 측정한 요약을 반환합니다."""
+    import_ms = []
+    wall_ms = []
+    imported = set()
+    for _ in range(repeat):
+        cumulative, wall, names = measure_once(module)
+        import_ms.append(cumulative)
+        wall_ms.append(wall)
+        imported |= names
+    deferred = sorted(name for name in DEFERRED_MODULES if name in imported)
+    return {
+        'import_ms_median': round(statistics.median(import_ms), 3),
+        'import_ms_min': round(min(import_ms), 3),
+        'process_ms_median': round(statistics.median(wall_ms), 3),
+        'eager_heavy_imports': deferred,
+    }
+
+
+def check(results, thresholds, baseline=None, max_regression=0.2):
+    """임계값, 기준 결과, 무거운 모듈 임포트 여부를 확인하고 실패 메시지 목록을 반환합니다."""
+    failures = []
+    for module, result in results.items():
+        median = result['import_ms_median']
+        limit = thresholds.get(module)
+        if limit is not None and median > limit:
+            failures.append(f"{module}: 임포트 시간 {median:.1f}ms가 임계값 {limit:.1f}ms를 넘었습니다.")
+        # 임계값이 있는 (시작 시간이 중요한) 모듈만 무거운 모듈 임포트를 실패로 처리
+        if limit is not None and result['eager_heavy_imports']:
+            failures.append(f"{module}: 임포트 시점에 {', '.join(result['eager_heavy_imports'])}을(를) 임포트합니다.")
+        if baseline:
+            previous = baseline.get('modules', {}).get(module, {}).get('import_ms_median')
+            if previous and median > previous * (1 + max_regression):
+                failures.append(
+                    f"{module}: 임포트 시간이 기준 {previous:.1f}ms에서 {median:.1f}ms로 "
+                    f"{(median / previous - 1) * 100:.0f}% 늘었습니다. (허용 {max_regression * 100:.0f}%)"
+                )
+    return failures
+
+
+def parse_threshold(value):
+    module, _, limit = value.partition('=')
+    if not module or not limit:
+        raise argparse.ArgumentTypeError("'모듈=ms' 형식이어야 합니다.")
+    return module, float(limit)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="chatweather 임포트 시간 벤치마크")
+    parser.add_argument('--repeat', type=int, default=10, help="모듈별 측정 횟수")
+    parser.add_argument('--module', action='append', help="측정할 모듈 (여러 번 지정 가능)")
+    parser.add_argument('--threshold', action='append', type=parse_threshold, default=[],
+                        help="'모듈=ms' 형식의 임계값 (기본 임계값을 덮어씀)")
+    parser.add_argument('--baseline', help="비교할 기준 결과 JSON 파일 경로")
+    parser.add_argument('--max-regression', type=float, default=0.2, help="기준 대비 허용 증가율 (기본 0.2)")
+    parser.add_argument('--output', help="결과를 저장할 JSON 파일 경로")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    thresholds = dict(DEFAULT_THRESHOLDS_MS)
+    thresholds.update(args.threshold)
+    modules = args.module or list(DEFAULT_THRESHOLDS_MS)
+
+    results = {module: measure(module, args.repeat) for module in modules}
+
+    print(f"{'module':24s} {'import(ms)':>11s} {'min(ms)':>9s} {'process(ms)':>12s} {'limit(ms)':>10s}  heavy imports")
+    for module, result in results.items():
+        limit = thresholds.get(module)
+        print(f"{module:24s} {result['import_ms_median']:11.1f} {result['import_ms_min']:9.1f} "
+              f"{result['process_ms_median']:12.1f} {limit if limit is not None else '-':>10}  "
+              f"{', '.join(result['eager_heavy_imports']) or '-'}")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    output = {'python': sys.version.split()[0], 'repeat': args.repeat, 'modules': results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(output, f, ensure_ascii=False, indent=2)
+        print(f"결과를 {args.output}에 저장했습니다.")
+
+    failures = check(results, thresholds, baseline, args.max_regression)
+    for failure in failures:
+        print(f"실패: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,278 @@
+"""
+OpenWeatherMap과 OpenAI Chat Completions API를 흉내 내는 로컬 대체 서버.
+
+실제 API 키 없이 chatweather 파이프라인의 지연 시간을 측정하기 위해 사용합니다.
+각 서버는 인위적인 지연(latency, jitter)과 오류율(error_rate)을 설정할 수 있으며,
+경로별 요청 수를 기록합니다.
+"""
+import json
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+FORECAST_SLOTS = 40
+SLOT_SECONDS = 3 * 60 * 60
+# 추출 응답에 사용할 도시 (벤치마크 질의에 나오는 도시)
+STUB_CITIES = {'서울': 'Seoul', '부산': 'Busan', '대구': 'Daegu', '제주': 'Jeju City', '강릉': 'Gangneung',
+               '인천': 'Incheon'}
+
+
+class StubServer:
+    """
+    지연과 오류를 주입할 수 있는 스레드 기반 로컬 HTTP 서버의 공통 부분.
+
+    Args:
+        latency (float, optional): 응답 전 평균 지연 시간(초). 기본값은 0.
+        jitter (float, optional): 지연 시간에 더해지는 균등 분포 지터의 최대값(초). 기본값은 0.
+        error_rate (float, optional): 503 오류를 반환할 확률 (0~1). 기본값은 0.
+        tail_rate (float, optional): 지연 시간에 tail_latency를 더할 확률 (0~1). 긴 꼬리 지연을 흉내 냅니다. 기본값은 0.
+        tail_latency (float, optional): 꼬리 지연 시간(초). 기본값은 0.
+        host (str, optional): 바인딩할 주소. 기본값은 '127.0.0.1'.
+        port (int, optional): 바인딩할 포트. 0이면 임의의 빈 포트를 사용합니다.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, host='127.0.0.1', port=0,
+                 tail_rate=0.0, tail_latency=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.tail_rate = tail_rate
+        self.tail_latency = tail_latency
+        self.calls = Counter()
+        self.errors = Counter()
+        self._lock = threading.Lock()
+        self._random = random.Random()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def call_counts(self):
+        with self._lock:
+            return {'calls': dict(self.calls), 'errors': dict(self.errors)}
+
+    def _inject(self, path):
+        """지연을 주입하고, 오류를 반환해야 하면 True를 반환합니다."""
+        with self._lock:
+            self.calls[path] += 1
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            if self.tail_rate and self._random.random() < self.tail_rate:
+                delay += self.tail_latency
+            fail = self._random.random() < self.error_rate
+            if fail:
+                self.errors[path] += 1
+        if delay > 0:
+            time.sleep(delay)
+        return fail
+
+    def handle(self, method, path, query, body):
+        """(상태 코드, 응답 본문 dict)를 반환합니다. 하위 클래스에서 구현합니다."""
+        raise NotImplementedError
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _dispatch(self, method):
+                parsed = urlparse(self.path)
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length) or b'{}') if length else {}
+
+                if server._inject(parsed.path):
+                    status, payload = 503, {'error': {'message': 'injected failure'}}
+                else:
+                    status, payload = server.handle(method, parsed.path, parse_qs(parsed.query), body)
+
+                if isinstance(payload, bytes):
+                    data, content_type = payload, 'text/event-stream'
+                else:
+                    data, content_type = json.dumps(payload, ensure_ascii=False).encode('utf-8'), 'application/json'
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._dispatch('GET')
+
+            def do_POST(self):
+                self._dispatch('POST')
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+class WeatherStubServer(StubServer):
+    """/data/2.5/weather 와 /data/2.5/forecast 를 흉내 내는 서버."""
+
+    def handle(self, method, path, query, body):
+        # 이름(q) 또는 좌표(lat, lon)로 요청
+        if 'q' in query:
+            city = query['q'][0]
+        else:
+            city = f"{query.get('lat', ['0'])[0]},{query.get('lon', ['0'])[0]}"
+        if city.lower().startswith('invalid'):
+            return 404, {'cod': '404', 'message': 'city not found'}
+
+        if path == '/data/2.5/weather':
+            return 200, {
+                'name': city,
+                'main': {'temp': 18.5},
+                'weather': [{'id': 800, 'description': '맑음'}],
+            }
+        if path == '/data/2.5/forecast':
+            now = time.time()
+            start = int(now // SLOT_SECONDS) * SLOT_SECONDS
+            items = []
+            for slot in range(FORECAST_SLOTS):
+                items.append({
+                    'dt': start + slot * SLOT_SECONDS,
+                    'main': {'temp': round(15 + 5 * ((slot % 8) - 4) / 4, 1)},
+                    'weather': [{'id': 800 if slot % 3 else 500,
+                                 'description': '맑음' if slot % 3 else '약한 비'}],
+                })
+            return 200, {'cod': '200', 'cnt': len(items), 'list': items, 'city': {'name': city}}
+        return 404, {'message': 'not found'}
+
+
+class OpenAIStubServer(StubServer):
+    """
+    /v1/chat/completions 를 흉내 내는 서버. 도시/날짜 추출 요청에는 JSON을 반환합니다.
+
+    OpenAI의 프롬프트 캐시를 흉내 내어, 이전 요청과 앞쪽 메시지가 같으면 그 길이만큼을
+    usage.prompt_tokens_details.cached_tokens로 보고합니다. (1024 토큰 이상, 128 토큰 단위)
+    """
+
+    answer = "요청하신 날씨 정보를 알려드릴게요. 오늘은 대체로 맑고 선선한 날씨가 예상됩니다."
+    # 캐시가 적용되는 최소 프롬프트 길이와 단위(토큰)
+    cache_min_tokens = 1024
+    cache_block_tokens = 128
+    max_cached_prefixes = 10000
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._prefixes = set()
+        self.tokens = Counter()
+
+    def _cached_tokens(self, messages):
+        """이전 요청과 같은 앞쪽 메시지들의 토큰 수(캐시 적용 단위로 내림)를 반환하고, 이번 요청을 기록합니다."""
+        keys = []
+        lengths = []
+        text_length = 0
+        for index, message in enumerate(messages):
+            keys.append(hash(json.dumps(messages[:index + 1], ensure_ascii=False, sort_keys=True)))
+            text_length += len(str(message.get('content') or '')) + 1
+            lengths.append(text_length)
+        with self._lock:
+            cached = 0
+            for key, length in zip(keys, lengths):
+                if key not in self._prefixes:
+                    break
+                cached = length // 2
+            if len(self._prefixes) > self.max_cached_prefixes:
+                self._prefixes.clear()
+            self._prefixes.update(keys)
+        if cached < self.cache_min_tokens:
+            return 0
+        return cached // self.cache_block_tokens * self.cache_block_tokens
+
+    def token_counts(self):
+        with self._lock:
+            return dict(self.tokens)
+
+    def handle(self, method, path, query, body):
+        if path != '/v1/chat/completions':
+            return 404, {'error': {'message': 'not found'}}
+
+        messages = body.get('messages', [])
+        prompt_text = " ".join(str(m.get('content') or '') for m in messages)
+        if body.get('tools') and not any(m.get('role') == 'tool' for m in messages):
+            message = {
+                'role': 'assistant',
+                'content': None,
+                'tool_calls': [{
+                    'id': 'call_stub',
+                    'type': 'function',
+                    'function': {'name': 'get_weather', 'arguments': json.dumps(self._extraction(messages))},
+                }],
+            }
+            finish_reason = 'tool_calls'
+        elif '도시(영어명)와 날짜를 추출' in prompt_text:
+            message = {'role': 'assistant', 'content': json.dumps(self._extraction(messages))}
+            finish_reason = 'stop'
+        else:
+            message = {'role': 'assistant', 'content': self.answer}
+            finish_reason = 'stop'
+
+        prompt_tokens = max(1, len(prompt_text) // 2)
+        completion_tokens = max(1, len(message['content'] or '') // 2)
+        cached_tokens = min(prompt_tokens, self._cached_tokens(messages))
+        with self._lock:
+            self.tokens['prompt'] += prompt_tokens
+            self.tokens['cached'] += cached_tokens
+        if body.get('stream'):
+            return 200, self._stream(message['content'] or '')
+        return 200, {
+            'id': 'chatcmpl-stub',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'gpt-4o-mini'),
+            'choices': [{'index': 0, 'message': message, 'finish_reason': finish_reason}],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens,
+                'prompt_tokens_details': {'cached_tokens': cached_tokens},
+            },
+        }
+
+    @staticmethod
+    def _extraction(messages):
+        # 마지막 메시지(질의)에 언급된 도시를 사용하고, 없으면 서울
+        query = str(messages[-1].get('content') or '') if messages else ''
+        city = next((name for korean, name in STUB_CITIES.items() if korean in query), 'Seoul')
+        target = (datetime.now() + timedelta(days=1)).replace(hour=12, minute=0, second=0, microsecond=0)
+        return {'city': city, 'date': target.strftime("%Y%m%d%H%M%S")}
+
+    @staticmethod
+    def _stream(content):
+        events = []
+        for index in range(0, len(content), 8):
+            chunk = {
+                'id': 'chatcmpl-stub',
+                'object': 'chat.completion.chunk',
+                'created': int(time.time()),
+                'model': 'gpt-4o-mini',
+                'choices': [{'index': 0, 'delta': {'content': content[index:index + 8]}, 'finish_reason': None}],
+            }
+            events.append(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n")
+        events.append("data: [DONE]\n\n")
+        return "".join(events).encode('utf-8')
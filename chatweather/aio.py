@@ -0,0 +1,394 @@
+# chatweather의 asyncio 버전 파이프라인.
+# 동기 버전(chatbot, weather)과 프롬프트 생성, 응답 파싱, 캐시를 공유합니다.
+import asyncio
+
+import httpx
+
+from chatweather import metrics, ratelimit, weather
+from chatweather.chatbot import (
+    ERROR_MESSAGE,
+    RESPONSE_MODE_FAST,
+    THROTTLED_MESSAGE,
+    WEATHER_FAILURE_MESSAGE,
+    answer_cache_key,
+    build_extraction_messages,
+    build_forecast_params,
+    build_weather_messages,
+    extraction_cache_key,
+    extraction_flights,
+    get_cached_answer,
+    get_cached_extraction,
+    parse_extraction_output,
+    resolve_response_mode,
+    store_answer,
+    store_extraction,
+    throttled_from_openai_error,
+    use_answer_cache,
+)
+from chatweather.config import get_openai_api_key
+from chatweather.fastpath import extract_fast
+from chatweather.ratelimit import UPSTREAM_OPENAI, UPSTREAM_WEATHER, ThrottledError, estimate_request_tokens
+from chatweather.templates import render_weather_answer
+from chatweather.transport import RETRY_STATUS_CODES, backoff_delay, retry_delay
+from chatweather.weather_api_datetime import get_current_datetime
+
+
+class AsyncHTTPTransport:
+    """
+    httpx.AsyncClient 기반의 비동기 HTTP 전송 객체.
+
+    동기 HTTPTransport와 같이 연결 풀, 연결/읽기 타임아웃,
+    429 및 5xx 응답과 연결 오류에 대한 지수 백오프 재시도(Retry-After 반영)를 제공합니다.
+
+    Args:
+        pool_size (int, optional): 최대 연결 수. 기본값은 100.
+        connect_timeout (float, optional): 연결 타임아웃(초). 기본값은 3.05.
+        read_timeout (float, optional): 읽기 타임아웃(초). 기본값은 10.
+        max_retries (int, optional): 최대 재시도 횟수. 기본값은 2.
+        backoff_base (float, optional): 백오프 기본 대기 시간(초). 기본값은 0.5.
+        backoff_max (float, optional): 백오프 최대 대기 시간(초). 기본값은 8.
+        client (httpx.AsyncClient, optional): 사용할 클라이언트. 없으면 새로 생성합니다.
+    """
+
+    def __init__(self, pool_size=100, connect_timeout=3.05, read_timeout=10,
+                 max_retries=2, backoff_base=0.5, backoff_max=8.0, client=None):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        if client is None:
+            client = httpx.AsyncClient(
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            )
+        self.client = client
+
+    async def get(self, url, params=None):
+        """
+        GET 요청을 보내고 응답을 반환합니다.
+
+        Raises:
+            httpx.TransportError: 재시도 후에도 연결에 실패한 경우.
+        """
+        attempt = 0
+        while True:
+            try:
+                response = await self.client.get(url, params=params)
+            except httpx.TransportError:
+                if attempt >= self.max_retries:
+                    raise
+                delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                    return response
+                delay = retry_delay(response, attempt, self.backoff_base, self.backoff_max)
+                if delay is None:
+                    return response
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def aclose(self):
+        """클라이언트의 연결을 닫습니다."""
+        await self.client.aclose()
+
+
+_transport = None
+_openai_client = None
+
+
+def get_transport():
+    """비동기 날씨 API 요청에 사용하는 공유 전송 객체를 반환합니다."""
+    global _transport
+    if _transport is None:
+        _transport = AsyncHTTPTransport()
+    return _transport
+
+
+def set_transport(transport):
+    """
+    비동기 날씨 API 요청에 사용할 전송 객체를 교체합니다.
+
+    Returns:
+        이전 전송 객체.
+    """
+    global _transport
+    previous = _transport
+    _transport = transport
+    return previous
+
+
+def get_openai_client():
+    """공유 OpenAI 비동기 클라이언트를 반환합니다."""
+    global _openai_client
+    if _openai_client is None:
+        import openai
+        _openai_client = openai.AsyncOpenAI(api_key=get_openai_api_key())
+    return _openai_client
+
+
+async def aclose():
+    """공유 클라이언트의 연결을 모두 닫습니다."""
+    global _transport, _openai_client
+    if _transport is not None:
+        await _transport.aclose()
+        _transport = None
+    if _openai_client is not None:
+        await _openai_client.close()
+        _openai_client = None
+
+
+@metrics.timed('llm')
+async def call_openai_api(messages, max_tokens=150, temperature=0.7):
+    """
+    OpenAI ChatCompletion API를 비동기로 호출하는 함수.
+
+    Args:
+        messages (list): 대화 메시지의 리스트.
+        max_tokens (int, optional): 최대 토큰 수. 기본값은 150.
+        temperature (float, optional): 생성 온도. 기본값은 0.7.
+
+    Returns:
+        str: OpenAI의 응답 내용. 오류 발생 시 None.
+
+    Raises:
+        ThrottledError: 요청 한도를 넘었거나 429 응답을 받은 경우.
+    """
+    client = get_openai_client()
+    await ratelimit.acquire_async(UPSTREAM_OPENAI, client.api_key, tokens=estimate_request_tokens(messages, max_tokens))
+    try:
+        response = await client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+        )
+        metrics.record_http_status('openai', 200)
+        metrics.record_usage(getattr(response, 'usage', None))
+        return response.choices[0].message.content.strip()
+    except Exception as e:
+        status_code = getattr(e, 'status_code', None)
+        if status_code is not None:
+            metrics.record_http_status('openai', status_code)
+        throttled = throttled_from_openai_error(e, client.api_key)
+        if throttled is not None:
+            raise throttled from e
+        print(f"OpenAI API 호출 중 오류 발생: {e}")
+        return None
+
+
+@metrics.timed('extract')
+async def extract_city_and_date(query, use_fastpath=True, use_cache=True):
+    """
+    사용자의 질의에서 도시와 날짜를 비동기로 추출하는 함수.
+
+    규칙 기반 추출(fastpath)을 먼저 시도하고, 확신할 수 없는 경우에만 GPT를 호출합니다.
+    추출 결과 캐시는 동기 버전과 공유하며, 같은 키의 추출이 진행 중이면 그 결과를 함께 받습니다.
+
+    Returns:
+        tuple: (city, date_str)
+    """
+    now = get_current_datetime()
+    if use_fastpath:
+        result = extract_fast(query, now)
+        metrics.record_cache('fastpath', result is not None)
+        if result is not None:
+            return result
+
+    if use_cache:
+        cached = get_cached_extraction(query, now)
+        metrics.record_cache('extraction', cached is not None)
+        if cached is not None:
+            return cached
+
+    return await extraction_flights.do_async(
+        extraction_cache_key(query, now), request_extraction, query, now, use_cache)
+
+
+async def request_extraction(query, now, use_cache=True):
+    """GPT로 도시와 날짜를 비동기로 추출하고, 성공하면 결과를 캐시에 저장합니다."""
+    current_time = now.strftime("%Y%m%d%H%M%S")
+    messages = build_extraction_messages(query, current_time)
+    output = await call_openai_api(messages)
+
+    result = parse_extraction_output(output, current_time)
+    if use_cache and output is not None:
+        store_extraction(query, now, result)
+    return result
+
+
+@metrics.timed('fetch_current_weather')
+async def fetch_current_weather(city, api_key, lang, units):
+    """
+    지정된 도시의 현재 날씨 데이터를 비동기로 가져옵니다. 캐시는 동기 버전과 공유합니다.
+    같은 요청이 이미 진행 중이면 새로 요청하지 않고 그 결과를 함께 받습니다.
+    """
+    city = weather.canonical_city(city)
+    cached = weather.get_cached_current(city, units, lang)
+    metrics.record_cache('current', cached is not None)
+    try:
+        if cached is None:
+            cached = await weather.weather_flights.do_async(
+                ('weather', city, units, lang), fill_current_weather, city, api_key, lang, units)
+        temp, sky = cached
+        return temp, sky, get_current_datetime()
+    except ThrottledError:
+        raise
+    except httpx.HTTPStatusError as err:
+        weather.handle_http_error(err.response, city)
+    except Exception as err:
+        print(f"현재 날씨 데이터를 가져오는 중 오류 발생: {err}")
+    return None, None, None
+
+
+async def fill_current_weather(city, api_key, lang, units):
+    """메모리 캐시에 없는 현재 날씨를 디스크 캐시 또는 API에서 가져옵니다."""
+    current = weather.load_disk_entry('weather', city, units, lang)
+    if current is not None:
+        return current
+    return await request_current_weather(city, api_key, lang, units)
+
+
+async def request_current_weather(city, api_key, lang, units):
+    """API에서 현재 날씨를 비동기로 가져와 캐시에 저장하고 (기온, 하늘 상태)를 반환합니다."""
+    await ratelimit.acquire_async(UPSTREAM_WEATHER, api_key)
+    api_url, query = weather.build_weather_request('weather', city, api_key, lang, units)
+    response = await get_transport().get(api_url, params=query)
+    metrics.record_http_status('weather', response.status_code)
+    weather.raise_for_throttled(response, api_key)
+    response.raise_for_status()
+    return weather.store_current(city, units, lang, response.json())
+
+
+@metrics.timed('fetch_forecast_weather')
+async def fetch_forecast_weather(city, api_key, lang, units, api_datetime):
+    """
+    지정된 도시와 날짜시간의 예보 데이터를 비동기로 가져옵니다. 캐시는 동기 버전과 공유합니다.
+    같은 요청이 이미 진행 중이면 새로 요청하지 않고 그 결과를 함께 받습니다.
+    """
+    city = weather.canonical_city(city)
+    try:
+        table = weather.get_cached_forecast(city, units, lang)
+        metrics.record_cache('forecast', table is not None)
+        if table is None:
+            table = await weather.weather_flights.do_async(
+                ('forecast', city, units, lang), fill_forecast_weather, city, api_key, lang, units)
+
+        return weather.find_forecast(table, api_datetime)
+    except ThrottledError:
+        raise
+    except httpx.HTTPStatusError as err:
+        weather.handle_http_error(err.response, city)
+    except Exception as err:
+        print(f"예보 데이터를 가져오는 중 오류 발생: {err}")
+    return None, None, None
+
+
+async def fill_forecast_weather(city, api_key, lang, units):
+    """메모리 캐시에 없는 예보 테이블을 디스크 캐시 또는 API에서 가져옵니다."""
+    table = weather.load_disk_entry('forecast', city, units, lang)
+    if table is not None:
+        return table
+    return await request_forecast_weather(city, api_key, lang, units)
+
+
+async def request_forecast_weather(city, api_key, lang, units):
+    """API에서 5일치 예보를 비동기로 가져와 캐시에 저장하고 ForecastTable을 반환합니다."""
+    await ratelimit.acquire_async(UPSTREAM_WEATHER, api_key)
+    api_url, query = weather.build_weather_request('forecast', city, api_key, lang, units)
+    response = await get_transport().get(api_url, params=query)
+    metrics.record_http_status('weather', response.status_code)
+    weather.raise_for_throttled(response, api_key)
+    response.raise_for_status()
+    return weather.store_forecast(city, units, lang, response.json())
+
+
+@metrics.timed('forecast')
+async def forecast(params):
+    """
+    주어진 파라미터를 기반으로 날씨 정보를 비동기로 가져옵니다.
+
+    Args:
+        params (dict): weather.forecast()와 같은 형식의 파라미터.
+
+    Returns:
+        tuple: (기온, 하늘 상태, 날짜시간) 또는 에러 발생 시 (None, None, None).
+    """
+    parsed = weather.parse_forecast_params(params)
+    if parsed is None:
+        return None, None, None
+    city, api_key, lang, units, target_date, api_datetime = parsed
+    weather.notify_request(city, api_key, lang, units)
+
+    today = get_current_datetime().date()
+
+    try:
+        if today == target_date.date():
+            return await fetch_current_weather(city, api_key, lang, units)
+        else:
+            return await fetch_forecast_weather(city, api_key, lang, units, api_datetime)
+    except ThrottledError:
+        raise
+    except Exception as err:
+        print(f"예기치 못한 오류 발생: {err}")
+        return None, None, None
+
+
+async def generate_weather_info(city, target_date):
+    """
+    날씨 정보를 비동기로 가져오는 함수.
+
+    Returns:
+        tuple: (temp, sky, date_time)
+    """
+    temp, sky, date_time = await forecast(build_forecast_params(city, target_date))
+
+    if temp is None or sky is None:
+        print("날씨 정보를 가져오는 데 실패했습니다.")
+        return None, None, None
+
+    return temp, sky, date_time
+
+
+@metrics.timed('weather_response')
+async def generate_weather_response(query, conversation_history, response_mode=None):
+    """
+    사용자의 질의로부터 날씨 정보를 비동기로 생성하는 함수.
+
+    Args:
+        query (str): 사용자의 질의 문장.
+        conversation_history (ConversationHistory or list): 이전 대화 기록.
+        response_mode (str, optional): 'rich'(LLM 답변), 'fast'(템플릿 답변) 또는 'auto'.
+
+    Returns:
+        str: 사용자를 위한 날씨 정보 응답. 요청 한도를 넘은 경우 THROTTLED_MESSAGE.
+    """
+    mode = resolve_response_mode(query, conversation_history, response_mode)
+    metrics.record_response_mode(mode)
+    try:
+        city, target_date = await extract_city_and_date(query)
+
+        answer_key = answer_cache_key(query, city, target_date) if use_answer_cache(conversation_history, mode) else None
+        if answer_key is not None:
+            cached = get_cached_answer(answer_key)
+            if cached is not None:
+                return cached
+
+        temp, sky, date_time = await generate_weather_info(city, target_date)
+
+        if temp is None or sky is None:
+            return WEATHER_FAILURE_MESSAGE
+
+        if mode == RESPONSE_MODE_FAST:
+            return render_weather_answer(city, temp, sky, date_time)
+
+        messages = build_weather_messages(query, city, temp, sky, date_time, conversation_history)
+        response = await call_openai_api(messages, max_tokens=200)
+    except ThrottledError as err:
+        print(f"요청 한도 초과: {err}")
+        return THROTTLED_MESSAGE
+
+    if response is None:
+        return ERROR_MESSAGE
+
+    if answer_key is not None:
+        store_answer(answer_key, response)
+    return response
@@ -0,0 +1,116 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    만료 시간(TTL)과 LRU 제거 정책을 갖는 스레드 안전한 인메모리 캐시.
+
+    항목 수가 maxsize를 넘으면 가장 오래 사용되지 않은 항목부터 제거하며,
+    적중/미스/제거 횟수를 기록합니다.
+
+    Args:
+        maxsize (int, optional): 최대 항목 수. 기본값은 128.
+        ttl (float, optional): 기본 만료 시간(초). 기본값은 600.
+        clock (callable, optional): 현재 시각(초)을 반환하는 함수. 기본값은 time.time.
+    """
+
+    def __init__(self, maxsize=128, ttl=600, clock=time.time):
+        if maxsize <= 0:
+            raise ValueError("maxsize는 1 이상이어야 합니다.")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        """키에 해당하는 값을 반환합니다. 없거나 만료되었으면 default를 반환합니다."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at <= self._clock():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None, expires_at=None):
+        """
+        값을 저장합니다.
+
+        Args:
+            key: 캐시 키.
+            value: 저장할 값.
+            ttl (float, optional): 이 항목의 만료 시간(초). 없으면 기본 TTL을 사용합니다.
+            expires_at (float, optional): 절대 만료 시각(초). ttl보다 우선합니다.
+        """
+        if expires_at is None:
+            expires_at = self._clock() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def expires_at(self, key):
+        """키의 만료 시각을 반환합니다. 없으면 None을 반환합니다. 통계에는 반영되지 않습니다."""
+        with self._lock:
+            entry = self._data.get(key)
+            return None if entry is None else entry[1]
+
+    def peek(self, key, default=None):
+        """만료되지 않은 키의 값을 반환합니다. 없으면 default를 반환합니다. 통계와 LRU 순서에는 반영되지 않습니다."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] <= self._clock():
+                return default
+            return entry[0]
+
+    def pop(self, key, default=None):
+        """키를 제거하고 값을 반환합니다."""
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return default if entry is None else entry[0]
+
+    def clear(self):
+        """모든 항목과 통계를 초기화합니다."""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.expirations = 0
+
+    def stats(self):
+        """
+        캐시 통계를 반환합니다.
+
+        Returns:
+            dict: size, maxsize, hits, misses, evictions, expirations 키를 포함하는 딕셔너리.
+        """
+        with self._lock:
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
@@ -1,32 +1,116 @@
 import json
-import openai
+import random
+import re
+import threading
+import time
+from datetime import datetime
+from chatweather import hedging, metrics, ratelimit, speculation
+from chatweather.cache import TTLCache
 from chatweather.config import get_openai_api_key, get_weather_api_key
-from chatweather.weather import forecast
-from chatweather.weather_api_datetime import get_current_datetime
+from chatweather.deadline import STAGE_LLM, DeadlineExceeded, as_deadline, exceeded
+from chatweather.fastpath import extract_fast, parse_query, query_intent
+from chatweather.history import history_messages
+from chatweather.ratelimit import UPSTREAM_OPENAI, ThrottledError, estimate_request_tokens
+from chatweather.sessions import SessionStore
+from chatweather.singleflight import SingleFlight
+from chatweather.templates import render_weather_answer
+from chatweather.weather import (cache_expires_at, canonical_city, forecast, is_current_request,
+                                 load_current_weather, load_forecast_weather)
+from chatweather.weather_api_datetime import get_current_datetime, set_api_datetime
 
-# OpenAI API 키 설정
-openai.api_key = get_openai_api_key()
+# openai 모듈. 임포트 비용이 크므로 get_openai()를 처음 호출할 때 임포트하고 API 키를 설정합니다.
+openai = None
 
+# 추출 결과 캐시 설정 (프로세스 내 모든 세션이 공유)
+EXTRACTION_CACHE_SIZE = 1024
+EXTRACTION_CACHE_TTL = 10 * 60
+# 상대 날짜는 현재 시간에 따라 달라지므로 시간 구간별로 캐시합니다.
+EXTRACTION_TIME_BUCKET = 10 * 60
 
-def make_extracting_prompt(query, current_time):
-    """
-    사용자 질의에서 도시와 날짜를 추출하기 위한 프롬프트를 생성합니다.
+_extraction_cache = TTLCache(maxsize=EXTRACTION_CACHE_SIZE, ttl=EXTRACTION_CACHE_TTL)
+_extraction_time_bucket = EXTRACTION_TIME_BUCKET
+# 같은 캐시 키의 추출 요청이 동시에 들어오면 하나의 GPT 호출로 합칩니다. (aio 모듈과 공유)
+extraction_flights = SingleFlight(name='extraction_inflight')
 
-    Args:
-        query (str): 사용자의 질의 문장.
+# 최종 답변 캐시 설정 (기본값은 사용하지 않음. configure_answer_cache()로 활성화)
+ANSWER_CACHE_SIZE = 512
+# 키마다 보관할 답변 수. 모두 모일 때까지는 새로 답변을 생성하고, 이후에는 그중 하나를 고릅니다.
+ANSWER_VARIANTS = 3
 
-    Returns:
-        str: GPT에 전달할 프롬프트 문자열.
-    """
-    prompt = f"""
-사용자의 질의에서 도시(영어명)와 날짜를 추출해주세요. 현재 시간은 {current_time}입니다.
+_answer_cache = None
+_answer_variants = ANSWER_VARIANTS
+
+# 날씨 API 요청 언어와 단위
+WEATHER_LANG = 'kr'
+WEATHER_UNITS = 'metric'
+
+WEATHER_FAILURE_MESSAGE = "죄송합니다, 날씨 정보를 가져오는 데 실패했습니다."
+ERROR_MESSAGE = "죄송합니다, 요청을 처리하는 중 오류가 발생했습니다."
+# 요청 한도를 넘어 외부 API를 호출하지 못한 경우의 응답 (일시적이므로 다시 시도하면 성공할 수 있음)
+THROTTLED_MESSAGE = "죄송합니다, 지금은 요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요."
+# 턴의 제한 시간 안에 날씨 정보도 가져오지 못한 경우의 응답
+DEADLINE_MESSAGE = "죄송합니다, 응답이 늦어지고 있습니다. 잠시 후 다시 시도해주세요."
+
+# 이 단어가 들어간 질의를 날씨 질의로 처리합니다.
+WEATHER_KEYWORD = "날씨"
+# chat_loop가 세션 저장소에서 사용하는 세션 ID
+CLI_SESSION_ID = "cli"
 
-질의: "{query}"
+# 날씨 질의 처리 방식
+# - 'prompt': 추출 프롬프트로 도시/날짜를 추출한 뒤 답변을 생성 (LLM 호출 2회)
+# - 'tool': get_weather 도구를 선언한 하나의 대화에서 도구 호출과 답변을 함께 처리
+EXTRACTION_MODE_PROMPT = "prompt"
+EXTRACTION_MODE_TOOL = "tool"
+DEFAULT_EXTRACTION_MODE = EXTRACTION_MODE_PROMPT
+
+# 날씨 답변 생성 방식
+# - 'rich': 날씨 정보를 LLM으로 다시 써서 답변 (대화 기록 반영)
+# - 'fast': LLM 없이 로컬 한국어 템플릿으로 답변 (추출도 규칙 기반이면 LLM 호출 0회)
+# - 'auto': 대화 기록이 없고 질의가 단순 조회이면 'fast', 그 외에는 'rich'
+RESPONSE_MODE_RICH = "rich"
+RESPONSE_MODE_FAST = "fast"
+RESPONSE_MODE_AUTO = "auto"
+RESPONSE_MODES = (RESPONSE_MODE_RICH, RESPONSE_MODE_FAST, RESPONSE_MODE_AUTO)
+DEFAULT_RESPONSE_MODE = RESPONSE_MODE_RICH
+
+WEATHER_TOOL = {
+    "type": "function",
+    "function": {
+        "name": "get_weather",
+        "description": "지정한 도시와 날짜시간의 날씨(기온, 하늘 상태)를 조회합니다.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "city": {
+                    "type": "string",
+                    "description": "도시 이름(영어, 각 단어 첫 글자 대문자). 언급되지 않았다면 'Seoul'.",
+                },
+                "date": {
+                    "type": "string",
+                    "description": (
+                        "'YYYYMMDDHHMMSS' 형식의 날짜시간. '오늘', '내일', '모레' 등의 상대적 날짜도 변환하세요. "
+                        "특정 일의 시간이 없으면 12시 정각, 오늘이고 시간이 없으면 현재 시간을 사용하세요."
+                    ),
+                },
+            },
+            "required": ["city", "date"],
+        },
+    },
+}
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = "?!.~ "
+
+
+# 도시와 날짜 추출 지시문. 모든 추출 요청에서 같으므로 메시지의 맨 앞(시스템 메시지)에 두어
+# OpenAI의 프롬프트 캐시(앞부분이 같은 요청의 입력 토큰 재사용)가 적용되도록 하고,
+# 요청마다 달라지는 현재 시간과 질의는 맨 뒤에 둡니다.
+EXTRACTION_INSTRUCTIONS = """사용자의 질의에서 도시(영어명)와 날짜를 추출해주세요. 현재 시간과 질의는 마지막에 주어집니다.
 
 요구사항:
 - 'city': 질의에서 언급된 도시 이름을 영어로 반환하세요. 언급되지 않았다면 기본값으로 'Seoul'을 사용하세요.
 - 'date': 질의에서 언급된 날짜를 'YYYYMMDDHHMMSS' 형식으로 변환하여 반환하세요. '오늘', '내일', '모레' 등의 상대적 날짜도 변환하세요.
-- 결과를 JSON 형식으로 '''{{...}}''' 형태로 출력해주세요.
+- 결과를 JSON 형식으로 '''{...}''' 형태로 출력해주세요.
 
 주의 사항:
 - 질의의 띄어쓰기, 맞춤법, 오탈자를 먼저 수정하세요.
@@ -35,63 +119,288 @@ def make_extracting_prompt(query, current_time):
 - 오늘의 날씨에 대한 질의이고, 특정 시간을 언급하지 않는 경우 현재 시간을 사용하세요.
 
 결과 예시:
-{{
+{
   "city": "Seoul",
   "date": "YYYYMMDDHHMMSS"
-}}
+}
+
+변환 예시 (현재 시간이 20240115093000인 경우):
+- 질의: "서울 날씨 어때?" -> {"city": "Seoul", "date": "20240115093000"}
+- 질의: "내일 부산 날씨 알려줘" -> {"city": "Busan", "date": "20240116120000"}
+- 질의: "모레 오후 3시 제주 날씨" -> {"city": "Jeju City", "date": "20240117150000"}
+- 질의: "오늘 저녁 6시 대구 날씨는?" -> {"city": "Daegu", "date": "20240115180000"}
+- 질의: "뉴욕 내일 아침 9시 날씨" -> {"city": "New York", "date": "20240116090000"}
+- 질의: "날씨 알려줘" -> {"city": "Seoul", "date": "20240115093000"}
+- 질의: "도쿄날씨 어떄" -> {"city": "Tokyo", "date": "20240115093000"}
+- 질의: "인천 모레 날씨" -> {"city": "Incheon", "date": "20240117120000"}
+- 질의: "로스앤젤레스 오늘 밤 10시 날씨" -> {"city": "Los Angeles", "date": "20240115220000"}
+- 질의: "광주 내일 새벽 2시 날씨" -> {"city": "Gwangju", "date": "20240116020000"}
+- 질의: "san francisco 날씨" -> {"city": "San Francisco", "date": "20240115093000"}
+- 질의: "내일 런던은 날씨가 어때요" -> {"city": "London", "date": "20240116120000"}
 """
-    return prompt
 
 
-def call_openai_api(messages, max_tokens=150, temperature=0.7):
+def make_extraction_query(query, current_time):
+    """추출 요청마다 달라지는 부분(현재 시간과 질의)을 생성합니다. 프롬프트의 맨 뒤에 둡니다."""
+    return f'현재 시간은 {current_time}입니다.\n\n질의: "{query}"'
+
+
+def make_extracting_prompt(query, current_time):
+    """
+    사용자 질의에서 도시와 날짜를 추출하기 위한 프롬프트를 생성합니다.
+
+    고정된 지시문이 앞에, 현재 시간과 질의가 뒤에 오므로 요청이 달라도 앞부분은 항상 같습니다.
+
+    Args:
+        query (str): 사용자의 질의 문장.
+        current_time (str): 'YYYYMMDDHHMMSS' 형식의 현재 시간.
+
+    Returns:
+        str: GPT에 전달할 프롬프트 문자열.
+    """
+    return f"{EXTRACTION_INSTRUCTIONS}\n{make_extraction_query(query, current_time)}\n"
+
+
+def get_openai():
+    """
+    openai 모듈을 반환합니다.
+
+    처음 호출할 때 openai를 임포트하고, API 키가 설정되어 있지 않으면 설정에서 읽어 설정합니다.
+    """
+    global openai
+    if openai is None:
+        import openai as module
+        if module.api_key is None:
+            module.api_key = get_openai_api_key()
+        openai = module
+    return openai
+
+
+def preload_openai():
+    """사용자 입력을 기다리는 동안 openai 모듈을 백그라운드 스레드에서 미리 임포트합니다."""
+    thread = threading.Thread(target=get_openai, name="openai-preload", daemon=True)
+    thread.start()
+    return thread
+
+
+@metrics.timed('llm')
+def call_openai_api(messages, max_tokens=150, temperature=0.7, deadline=None):
     """
     OpenAI ChatCompletion API를 호출하는 함수.
 
+    hedged request를 켜면(hedging.configure_hedging('openai')) 응답이 늦을 때 같은 요청을 한 번 더 보냅니다.
+
+    Args:
+        messages (list): 대화 메시지의 리스트.
+        max_tokens (int, optional): 최대 토큰 수. 기본값은 150.
+        temperature (float, optional): 생성 온도. 기본값은 0.7.
+        deadline (Deadline, optional): 턴의 제한 시간. 남은 시간을 요청 타임아웃으로 사용합니다.
+
+    Returns:
+        str: OpenAI의 응답 내용. 오류 발생 시 None.
+
+    Raises:
+        ThrottledError: 요청 한도를 넘었거나 429 응답을 받은 경우.
+        DeadlineExceeded: 제한 시간 안에 응답을 받지 못한 경우.
+    """
+    try:
+        response = hedging.call(
+            UPSTREAM_OPENAI,
+            lambda: create_chat_completion(messages, max_tokens=max_tokens, temperature=temperature,
+                                           deadline=deadline),
+            deadline=deadline, stage=STAGE_LLM,
+        )
+        return response.choices[0].message.content.strip()
+    except (ThrottledError, DeadlineExceeded):
+        raise
+    except Exception as e:
+        print(f"OpenAI API 호출 중 오류 발생: {e}")
+        return None
+
+
+def create_chat_completion(messages, max_tokens=150, temperature=0.7, deadline=None, **kwargs):
+    """
+    OpenAI ChatCompletion API를 호출하고 응답 객체를 그대로 반환합니다.
+
+    도구 호출(tools)처럼 응답 내용 외의 정보가 필요한 경우에 사용하며, 예외는 호출자가 처리합니다.
+
     Args:
         messages (list): 대화 메시지의 리스트.
         max_tokens (int, optional): 최대 토큰 수. 기본값은 150.
         temperature (float, optional): 생성 온도. 기본값은 0.7.
+        deadline (Deadline, optional): 턴의 제한 시간. 남은 시간을 요청 타임아웃(timeout)으로 전달합니다.
+        **kwargs: API에 그대로 전달할 추가 인자 (예: tools, tool_choice, stream).
 
     Returns:
-        str: OpenAI의 응답 내용.
+        ChatCompletion: OpenAI 응답 객체.
+
+    Raises:
+        ThrottledError: 요청 한도를 넘었거나 429 응답을 받은 경우.
+        DeadlineExceeded: 제한 시간이 지났거나 제한 시간 안에 응답을 받지 못한 경우.
     """
+    client = get_openai()
+    # API 키별 분당 요청 수와 분당 토큰 수(프롬프트 추정치 + max_tokens) 한도 안에서 호출
+    ratelimit.acquire(UPSTREAM_OPENAI, client.api_key, tokens=estimate_request_tokens(messages, max_tokens))
+    if deadline is not None:
+        # 요청 한도를 기다리는 동안 제한 시간이 지났을 수 있음
+        deadline.check(STAGE_LLM)
+        kwargs['timeout'] = deadline.remaining()
     try:
-        response = openai.chat.completions.create(
+        response = client.chat.completions.create(
             model="gpt-4o-mini",
             messages=messages,
             max_tokens=max_tokens,
             temperature=temperature,
+            **kwargs,
         )
-        return response.choices[0].message.content.strip()
     except Exception as e:
-        print(f"OpenAI API 호출 중 오류 발생: {e}")
+        if deadline is not None and deadline.expired():
+            raise exceeded(STAGE_LLM) from e
+        status_code = getattr(e, 'status_code', None)
+        if status_code is not None:
+            metrics.record_http_status('openai', status_code)
+        throttled = throttled_from_openai_error(e, client.api_key)
+        if throttled is not None:
+            raise throttled from e
+        raise
+    metrics.record_http_status('openai', 200)
+    if not kwargs.get('stream'):
+        metrics.record_usage(getattr(response, 'usage', None))
+    return response
+
+
+def throttled_from_openai_error(error, api_key=None):
+    """
+    OpenAI 429 오류이면 Retry-After 동안 같은 API 키의 요청을 멈추고 대응하는 ThrottledError를 반환합니다.
+
+    Returns:
+        ThrottledError: 429 오류인 경우. 그 외에는 None.
+    """
+    if getattr(error, 'status_code', None) != 429:
         return None
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    retry_after = ratelimit.block_for(UPSTREAM_OPENAI, api_key, headers.get('retry-after'))
+    return ThrottledError(UPSTREAM_OPENAI, retry_after or 0.0)
 
 
-def extract_city_and_date(query):
+class ResponseStream:
     """
-    사용자의 질의에서 도시와 날짜를 추출하는 함수.
+    응답 내용 조각(delta)을 도착하는 순서대로 반환하는 이터레이터.
+
+    반복이 끝나면 전체 응답과 시간 측정값을 속성으로 제공합니다.
+
+    Attributes:
+        time_to_first_token (float): 시작부터 첫 조각이 도착할 때까지 걸린 시간(초).
+        total_time (float): 시작부터 마지막 조각이 도착할 때까지 걸린 시간(초).
+    """
+
+    def __init__(self, deltas, started_at=None):
+        self._deltas = deltas
+        self._parts = []
+        self.started_at = time.perf_counter() if started_at is None else started_at
+        self.time_to_first_token = None
+        self.total_time = None
+
+    def __iter__(self):
+        for delta in self._deltas:
+            if self.time_to_first_token is None:
+                self.time_to_first_token = time.perf_counter() - self.started_at
+            self._parts.append(delta)
+            yield delta
+        self.total_time = time.perf_counter() - self.started_at
+
+    @property
+    def text(self):
+        """지금까지 받은 응답 전체를 반환합니다."""
+        return "".join(self._parts)
+
+
+def _iter_openai_deltas(messages, max_tokens, temperature):
+    """
+    OpenAI 스트리밍 응답의 내용 조각을 반환합니다. 응답 전에 오류가 나면 오류 메시지를 반환합니다.
+
+    반복이 끝나면(중단 포함) LLM 단계 소요 시간과 첫 조각까지의 시간을 metrics에 기록합니다.
+    """
+    produced = False
+    error = None
+    started = time.perf_counter()
+    time_to_first_token = None
+    try:
+        stream = create_chat_completion(messages, max_tokens=max_tokens, temperature=temperature, stream=True)
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            if not produced:
+                delta = delta.lstrip()
+                if not delta:
+                    continue
+                time_to_first_token = time.perf_counter() - started
+            produced = True
+            yield delta
+    except ThrottledError as e:
+        print(f"요청 한도 초과: {e}")
+        error = e
+    except Exception as e:
+        print(f"OpenAI API 호출 중 오류 발생: {e}")
+        error = e
+    finally:
+        metrics.record_llm_stream(time.perf_counter() - started, time_to_first_token, failed=error is not None)
+    if not produced:
+        yield THROTTLED_MESSAGE if isinstance(error, ThrottledError) else ERROR_MESSAGE
+
+
+def call_openai_api_stream(messages, max_tokens=150, temperature=0.7):
+    """
+    OpenAI ChatCompletion API를 스트리밍 모드로 호출하는 함수.
 
     Args:
-        query (str): 사용자의 질의 문장.
+        messages (list): 대화 메시지의 리스트.
+        max_tokens (int, optional): 최대 토큰 수. 기본값은 150.
+        temperature (float, optional): 생성 온도. 기본값은 0.7.
 
     Returns:
-        tuple: (city, date_str)
-            - city (str): 추출된 도시 이름 (영어).
-            - date_str (str): 'YYYYMMDDHHMMSS' 형식의 날짜 문자열.
+        ResponseStream: 응답 내용 조각을 반환하는 이터레이터.
     """
-    current_time = get_current_datetime().strftime("%Y%m%d%H%M%S")
-    prompt = make_extracting_prompt(query, current_time)
+    return ResponseStream(_iter_openai_deltas(messages, max_tokens, temperature))
 
-    system_content = "도시와 날짜 추출"
 
-    # OpenAI API 호출
-    messages = [
-        {"role": "system", "content": system_content},
-        {"role": "user", "content": prompt}
+EXTRACTION_SYSTEM_CONTENT = EXTRACTION_INSTRUCTIONS
+# 일반 대화와 날씨 답변이 함께 사용하는 고정 시스템 메시지. 날씨 답변 지시도 여기에 두어
+# 요청마다 달라지는 날씨 정보만 마지막 사용자 메시지에 들어가도록 합니다.
+ASSISTANT_SYSTEM_CONTENT = (
+    "당신은 사용자에게 날씨 정보를 제공하는 친절한 어시스턴트입니다. "
+    "사용자 메시지에 '현재 날씨 정보'가 주어지면 그 정보를 바탕으로 친절하고 자연스러운 답변을 제공해주세요."
+)
+TOOL_SYSTEM_CONTENT = (
+    f"{ASSISTANT_SYSTEM_CONTENT} "
+    "날씨 질문에는 반드시 get_weather 도구로 날씨를 조회한 뒤 그 결과를 바탕으로 친절하고 자연스럽게 답변하세요."
+)
+
+
+def build_extraction_messages(query, current_time):
+    """도시와 날짜 추출을 위한 메시지 목록을 생성합니다."""
+    # 고정된 지시문(시스템 메시지)이 앞, 요청마다 달라지는 시간과 질의가 뒤
+    return [
+        {"role": "system", "content": EXTRACTION_SYSTEM_CONTENT},
+        {"role": "user", "content": make_extraction_query(query, current_time)}
     ]
-    output = call_openai_api(messages)
 
+
+def parse_extraction_output(output, current_time):
+    """
+    추출 응답에서 도시와 날짜를 파싱합니다.
+
+    Args:
+        output (str or None): OpenAI의 응답 내용.
+        current_time (str): 'YYYYMMDDHHMMSS' 형식의 현재 시간. 파싱 실패 시 기본값으로 사용합니다.
+
+    Returns:
+        tuple: (city, date_str)
+    """
     if output is None:
         return 'Seoul', current_time
 
@@ -102,7 +411,7 @@ def extract_city_and_date(query):
         data = json.loads(json_str)
         city = data.get('city', 'Seoul')
         date_str = data.get('date', current_time)
-    except (json.JSONDecodeError, KeyError) as e:
+    except (json.JSONDecodeError, KeyError, IndexError) as e:
         print(f"JSON 파싱 오류: {e}")
         city = 'Seoul'
         date_str = current_time
@@ -110,13 +419,266 @@ def extract_city_and_date(query):
     return city, date_str
 
 
-def generate_weather_info(city, target_date):
+def configure_extraction_cache(maxsize=EXTRACTION_CACHE_SIZE, ttl=EXTRACTION_CACHE_TTL,
+                               time_bucket=EXTRACTION_TIME_BUCKET):
+    """
+    추출 결과 캐시를 설정합니다. 기존 캐시 항목과 통계는 초기화됩니다.
+
+    Args:
+        maxsize (int, optional): 최대 항목 수. 초과 시 LRU 순서로 제거합니다.
+        ttl (float, optional): 항목 만료 시간(초).
+        time_bucket (int, optional): 캐시 키에 사용할 시간 구간 길이(초).
+    """
+    global _extraction_cache, _extraction_time_bucket
+    _extraction_cache = TTLCache(maxsize=maxsize, ttl=ttl)
+    _extraction_time_bucket = time_bucket
+
+
+def get_extraction_cache_stats():
+    """추출 결과 캐시의 통계를 반환합니다. inflight 키에 합쳐진 동시 요청 통계를 포함합니다."""
+    return {**_extraction_cache.stats(), 'inflight': extraction_flights.stats()}
+
+
+def clear_extraction_cache():
+    """추출 결과 캐시를 비웁니다."""
+    _extraction_cache.clear()
+    extraction_flights.clear_stats()
+
+
+def normalize_query(query):
+    """캐시 키로 사용할 수 있도록 질의의 공백, 대소문자, 끝 문장부호를 정규화합니다."""
+    return _WHITESPACE_RE.sub(" ", query).strip(_TRAILING_PUNCTUATION).lower()
+
+
+def extraction_cache_key(query, now):
+    """정규화된 질의와 현재 시간이 속한 시간 구간으로 캐시 키를 생성합니다."""
+    return normalize_query(query), int(now.timestamp()) // _extraction_time_bucket
+
+
+def get_cached_extraction(query, now):
+    """캐시된 추출 결과 (city, date_str)를 반환합니다. 없으면 None을 반환합니다."""
+    return _extraction_cache.get(extraction_cache_key(query, now))
+
+
+def store_extraction(query, now, result):
+    """추출 결과를 캐시에 저장합니다."""
+    _extraction_cache.set(extraction_cache_key(query, now), result)
+
+
+def configure_answer_cache(maxsize=ANSWER_CACHE_SIZE, variants=ANSWER_VARIANTS):
+    """
+    최종 답변 캐시를 설정합니다. 기존 캐시 항목과 통계는 초기화됩니다.
+
+    이전 대화가 없는 날씨 질의의 답변을 (도시, 예보 시간대, 의도, 언어)별로 저장하고,
+    날씨 캐시의 데이터가 갱신되는 시각에 만료합니다.
+
+    Args:
+        maxsize (int, optional): 최대 키 수. 초과 시 LRU 순서로 제거합니다. 0 또는 None이면 캐시를 사용하지 않습니다.
+        variants (int, optional): 키마다 보관할 답변 수. 기본값은 ANSWER_VARIANTS.
+    """
+    global _answer_cache, _answer_variants
+    _answer_cache = TTLCache(maxsize=maxsize) if maxsize else None
+    _answer_variants = max(1, variants)
+
+
+def get_answer_cache_stats():
+    """
+    최종 답변 캐시의 통계를 반환합니다. 캐시를 사용하지 않으면 None을 반환합니다.
+
+    답변이 variants개 모이기 전의 조회는 통계에서는 적중이지만 답변은 새로 생성합니다.
+    실제 답변 재사용 여부는 metrics의 'answer' 캐시 조회 결과로 기록됩니다.
+    """
+    return None if _answer_cache is None else _answer_cache.stats()
+
+
+def clear_answer_cache():
+    """최종 답변 캐시를 비웁니다."""
+    if _answer_cache is not None:
+        _answer_cache.clear()
+
+
+def use_answer_cache(conversation_history, mode):
+    """답변 캐시를 사용할 수 있는 턴이면 True를 반환합니다. (캐시 사용 중, LLM 답변, 이전 대화 없음)"""
+    return _answer_cache is not None and mode == RESPONSE_MODE_RICH and not has_history(conversation_history)
+
+
+def _parse_target_date(target_date):
+    try:
+        return datetime.strptime(target_date, "%Y%m%d%H%M%S")
+    except (TypeError, ValueError):
+        return None
+
+
+def weather_endpoint(target_date):
+    """
+    'YYYYMMDDHHMMSS' 형식 날짜의 날씨를 가져올 API를 반환합니다.
+
+    Returns:
+        str: 오늘은 'weather'(현재 날씨), 그 외에는 'forecast'. 날짜 형식이 잘못되었으면 None.
+    """
+    target = _parse_target_date(target_date)
+    if target is None:
+        return None
+    return 'weather' if is_current_request(target) else 'forecast'
+
+
+def answer_slot(target_date):
+    """
+    답변이 사용하는 날씨 데이터의 시간대를 반환합니다. 날짜 형식이 잘못되었으면 None을 반환합니다.
+
+    오늘은 현재 날씨를 사용하므로 'current'이고, 그 외에는 set_api_datetime()으로 맞춘 예보 시각입니다.
+    """
+    endpoint = weather_endpoint(target_date)
+    if endpoint is None:
+        return None
+    if endpoint == 'weather':
+        return 'current'
+    return set_api_datetime(_parse_target_date(target_date)).strftime("%Y%m%d%H")
+
+
+def answer_cache_key(query, city, target_date):
+    """
+    (도시, 예보 시간대, 정규화된 의도, 언어)로 답변 캐시 키를 생성합니다. 단순 조회의 의도는 'lookup'입니다.
+    도시는 도시 색인의 정식 이름을 사용하므로 'Busan'과 'Pusan'은 같은 키입니다.
+
+    날짜 형식이 잘못되어 시간대를 알 수 없으면 None을 반환합니다. (캐시하지 않음)
+    """
+    slot = answer_slot(target_date)
+    if slot is None:
+        return None
+    return canonical_city(city), slot, query_intent(query) or 'lookup', WEATHER_LANG
+
+
+def get_cached_answer(key, rng=random):
+    """
+    캐시된 답변 중 하나를 반환합니다. 없거나 답변이 아직 다 모이지 않았으면 None을 반환합니다.
+
+    Args:
+        key (tuple): answer_cache_key()로 만든 키.
+        rng (random.Random, optional): 답변을 고를 난수 생성기.
+    """
+    answers = _answer_cache.get(key, ())
+    hit = len(answers) >= _answer_variants
+    metrics.record_cache('answer', hit)
+    return rng.choice(answers) if hit else None
+
+
+def store_answer(key, answer):
+    """
+    답변을 캐시에 추가합니다.
+
+    답변은 근거가 된 날씨 캐시 항목과 함께 만료되며, 날씨 캐시에 항목이 없으면 (만료 시각을 알 수 없으므로) 저장하지 않습니다.
+    """
+    city, slot = key[0], key[1]
+    endpoint = 'weather' if slot == 'current' else 'forecast'
+    expires_at = cache_expires_at(endpoint, city, WEATHER_UNITS, WEATHER_LANG)
+    if expires_at is None:
+        return
+    answers = _answer_cache.peek(key, ())
+    if len(answers) < _answer_variants:
+        _answer_cache.set(key, answers + (answer,), expires_at=expires_at)
+
+
+def speculate_weather(query, conversation_history):
+    """
+    추측 모드(speculation.set_speculation)에서 추출과 동시에 추측한 도시의 날씨 요청을 시작합니다.
+
+    규칙 기반 추출이나 추출 캐시로 바로 끝나는 질의는 겹칠 시간이 없으므로 시작하지 않습니다.
+
+    Returns:
+        Speculation: 시작한 요청 또는 추측하지 않은 경우 None.
+    """
+    if not speculation.speculation_enabled():
+        return None
+    now = get_current_datetime()
+    if parse_query(query, now) is not None or _extraction_cache.peek(extraction_cache_key(query, now)) is not None:
+        return None
+    city = speculation.guess_city(query, conversation_history)
+    if city is None:
+        return None
+    endpoint = speculation.guess_endpoint(query)
+    fetch = load_current_weather if endpoint == 'weather' else load_forecast_weather
+    return speculation.start(city, endpoint, fetch, city, get_weather_api_key(), WEATHER_LANG, WEATHER_UNITS)
+
+
+@metrics.timed('extract')
+def extract_city_and_date(query, use_fastpath=True, use_cache=True, deadline=None):
+    """
+    사용자의 질의에서 도시와 날짜를 추출하는 함수.
+
+    규칙 기반 추출(fastpath)을 먼저 시도하고, 확신할 수 없는 경우에만 GPT를 호출합니다.
+    GPT 추출 결과는 정규화된 질의와 시간 구간별로 캐시되며,
+    같은 키의 추출이 이미 진행 중이면 GPT를 다시 호출하지 않고 그 결과를 함께 받습니다.
+
+    Args:
+        query (str): 사용자의 질의 문장.
+        use_fastpath (bool, optional): 규칙 기반 추출 사용 여부. 기본값은 True.
+        use_cache (bool, optional): 추출 결과 캐시 사용 여부. 기본값은 True.
+        deadline (Deadline, optional): 턴의 제한 시간. GPT 추출이 남은 시간 안에 끝나지 않으면
+            기본값(서울, 현재 시간)을 사용합니다.
+
+    Returns:
+        tuple: (city, date_str)
+            - city (str): 추출된 도시 이름 (영어).
+            - date_str (str): 'YYYYMMDDHHMMSS' 형식의 날짜 문자열.
+    """
+    now = get_current_datetime()
+    if use_fastpath:
+        result = extract_fast(query, now)
+        metrics.record_cache('fastpath', result is not None)
+        if result is not None:
+            return result
+
+    if use_cache:
+        cached = get_cached_extraction(query, now)
+        metrics.record_cache('extraction', cached is not None)
+        if cached is not None:
+            return cached
+
+    # 같은 질의의 추출이 진행 중이면 그 결과를 함께 받음
+    return extraction_flights.do(extraction_cache_key(query, now), request_extraction, query, now, use_cache,
+                                 deadline)
+
+
+def request_extraction(query, now, use_cache=True, deadline=None):
+    """GPT로 도시와 날짜를 추출하고, 성공하면 결과를 캐시에 저장합니다."""
+    current_time = now.strftime("%Y%m%d%H%M%S")
+
+    # OpenAI API 호출
+    messages = build_extraction_messages(query, current_time)
+    try:
+        output = call_openai_api(messages, deadline=deadline)
+    except DeadlineExceeded as e:
+        # 제한 시간 안에 추출하지 못하면 기본 도시와 현재 시간으로 답변
+        print(f"추출 제한 시간 초과: {e}")
+        output = None
+
+    result = parse_extraction_output(output, current_time)
+    # API 호출에 실패한 경우의 기본값은 캐시하지 않음
+    if use_cache and output is not None:
+        store_extraction(query, now, result)
+    return result
+
+
+def build_forecast_params(city, target_date):
+    """forecast()에 전달할 파라미터 딕셔너리를 생성합니다."""
+    return {
+        'city': city,
+        'serviceKey': get_weather_api_key(),
+        'target_date': target_date,
+        'lang': WEATHER_LANG,  # 한국어 설정
+        'units': WEATHER_UNITS,  # 섭씨로 설정
+    }
+
+
+def generate_weather_info(city, target_date, deadline=None):
     """
     날씨 정보를 가져오는 함수.
 
     Args:
         city (str): 도시 이름.
         target_date (str): 'YYYYMMDDHHMMSS' 형식의 날짜 문자열.
+        deadline (Deadline, optional): 턴의 제한 시간.
 
     Returns:
         tuple: (temp, sky, date_time)
@@ -124,16 +686,10 @@ def generate_weather_info(city, target_date):
             - sky (str): 날씨 상태.
             - date_time (str): 날짜 및 시간 문자열.
     """
-    params = {
-        'city': city,
-        'serviceKey': get_weather_api_key(),
-        'target_date': target_date,
-        'lang': 'kr',  # 한국어 설정
-        'units': 'metric',  # 섭씨로 설정
-    }
+    params = build_forecast_params(city, target_date)
 
     # 날씨 정보 가져오기
-    temp, sky, date_time = forecast(params)
+    temp, sky, date_time = forecast(params, deadline=deadline)
 
     if temp is None or sky is None:
         print("날씨 정보를 가져오는 데 실패했습니다.")
@@ -142,89 +698,417 @@ def generate_weather_info(city, target_date):
     return temp, sky, date_time
 
 
-def generate_weather_response(query, conversation_history):
+def format_weather_info(city, temp, sky, date_time):
+    """사용자에게 전달할 날씨 정보 문장을 생성합니다."""
+    return f"{city}의 {date_time} 날씨는 {sky}이며, 기온은 {temp}도입니다."
+
+
+def build_chat_messages(user_content, conversation_history):
+    """
+    이전 대화 기록과 현재 사용자 입력으로 메시지 목록을 생성합니다.
+
+    Args:
+        user_content (str): 현재 사용자 메시지 내용.
+        conversation_history (ConversationHistory or list): 이전 대화 기록.
+
+    Returns:
+        list: OpenAI ChatCompletion API에 전달할 메시지 리스트.
+    """
+    messages = [
+        {"role": "system", "content": ASSISTANT_SYSTEM_CONTENT},
+    ]
+    # 이전 대화 기록 추가 (토큰 예산 안의 요약과 최근 대화)
+    messages.extend(history_messages(conversation_history))
+    messages.append({"role": "user", "content": user_content})
+    return messages
+
+
+def summarize_history(summary, turns):
+    """
+    기존 요약에 새로 밀려난 대화를 더해 갱신된 요약을 생성합니다.
+
+    ConversationHistory의 summarizer로 사용되며, 전체 대화가 아니라
+    기존 요약과 밀려난 턴만 전달하므로 요약 비용이 대화 길이에 비례해 늘지 않습니다.
+
+    Args:
+        summary (str): 기존 요약. 없으면 빈 문자열.
+        turns (list): 요약에 추가할 대화 턴 리스트.
+
+    Returns:
+        str: 갱신된 요약 또는 실패 시 None.
+    """
+    dialogue = "\n".join(f"사용자: {entry['user']}\n어시스턴트: {entry['bot']}" for entry in turns)
+    prompt = (
+        f"기존 요약:\n{summary or '(없음)'}\n\n"
+        f"추가된 대화:\n{dialogue}\n\n"
+        "기존 요약에 추가된 대화의 핵심 내용(언급된 도시, 날짜, 사용자의 관심사)을 반영하여 "
+        "3문장 이내의 한국어 요약으로 갱신해주세요."
+    )
+    messages = [
+        {"role": "system", "content": "대화 요약"},
+        {"role": "user", "content": prompt},
+    ]
+    try:
+        return call_openai_api(messages, max_tokens=150, temperature=0.3)
+    except ThrottledError as e:
+        # ConversationHistory가 요약하지 못한 턴을 보관했다가 다음 요약 때 함께 전달함
+        print(f"요청 한도 초과: {e}")
+        return None
+
+
+def build_weather_messages(query, city, temp, sky, date_time, conversation_history):
+    """날씨 정보를 바탕으로 답변을 생성하기 위한 메시지 목록을 생성합니다."""
+    weather_info = format_weather_info(city, temp, sky, date_time)
+    # 답변 지시는 고정 시스템 메시지에 있으므로, 마지막 메시지에는 질의와 날씨 정보만 담음
+    user_message = f"{query}\n\n현재 날씨 정보:\n{weather_info}"
+    return build_chat_messages(user_message, conversation_history)
+
+
+def build_tool_messages(query, conversation_history, current_time):
+    """도구 호출 모드에서 사용할 메시지 목록을 생성합니다."""
+    messages = build_chat_messages(query, conversation_history)
+    messages[0] = {"role": "system", "content": TOOL_SYSTEM_CONTENT}
+    # 현재 시간은 요청마다 달라지므로 고정된 앞부분(도구 정의, 시스템 메시지, 대화 기록) 뒤에 둠
+    messages.insert(-1, {"role": "system", "content": f"현재 시간은 {current_time}입니다."})
+    return messages
+
+
+def run_weather_tool(tool_call, current_time):
+    """
+    get_weather 도구 호출을 로컬에서 실행합니다.
+
+    Returns:
+        tuple: (도구 결과 문자열, 성공 여부)
+    """
+    try:
+        arguments = json.loads(tool_call.function.arguments or "{}")
+    except json.JSONDecodeError as e:
+        print(f"JSON 파싱 오류: {e}")
+        arguments = {}
+    city = arguments.get('city') or 'Seoul'
+    target_date = arguments.get('date') or current_time
+
+    temp, sky, date_time = generate_weather_info(city, target_date)
+    if temp is None or sky is None:
+        return "날씨 정보를 가져오는 데 실패했습니다.", False
+    return format_weather_info(city, temp, sky, date_time), True
+
+
+def generate_weather_response_with_tools(query, conversation_history):
+    """
+    get_weather 도구 호출을 사용하여 하나의 대화에서 날씨 답변을 생성하는 함수.
+
+    별도의 추출 프롬프트 대신 모델이 도구 인자로 도시와 날짜를 전달하고,
+    도구 결과를 같은 대화에 이어 붙여 최종 답변을 생성합니다.
+
+    Args:
+        query (str): 사용자의 질의 문장.
+        conversation_history (ConversationHistory or list): 이전 대화 기록.
+
+    Returns:
+        str: 사용자를 위한 날씨 정보 응답.
+    """
+    current_time = get_current_datetime().strftime("%Y%m%d%H%M%S")
+    messages = build_tool_messages(query, conversation_history, current_time)
+
+    try:
+        response = create_chat_completion(messages, max_tokens=200, tools=[WEATHER_TOOL])
+        message = response.choices[0].message
+        if not message.tool_calls:
+            # 모델이 도구 없이 바로 답변한 경우
+            return message.content.strip() if message.content else ERROR_MESSAGE
+
+        messages.append({
+            "role": "assistant",
+            "content": message.content,
+            "tool_calls": [
+                {
+                    "id": tool_call.id,
+                    "type": "function",
+                    "function": {"name": tool_call.function.name, "arguments": tool_call.function.arguments},
+                }
+                for tool_call in message.tool_calls
+            ],
+        })
+        succeeded = False
+        for tool_call in message.tool_calls:
+            result, ok = run_weather_tool(tool_call, current_time)
+            succeeded = succeeded or ok
+            messages.append({"role": "tool", "tool_call_id": tool_call.id, "content": result})
+
+        if not succeeded:
+            return WEATHER_FAILURE_MESSAGE
+
+        response = create_chat_completion(messages, max_tokens=200, tools=[WEATHER_TOOL], tool_choice="none")
+        content = response.choices[0].message.content
+        return content.strip() if content else ERROR_MESSAGE
+    except ThrottledError as e:
+        print(f"요청 한도 초과: {e}")
+        return THROTTLED_MESSAGE
+    except Exception as e:
+        print(f"OpenAI API 호출 중 오류 발생: {e}")
+        return ERROR_MESSAGE
+
+
+def has_history(conversation_history):
+    """이전 대화(또는 그 요약)가 있으면 True를 반환합니다."""
+    return len(conversation_history) > 0 or bool(getattr(conversation_history, 'summary', ''))
+
+
+def is_plain_lookup(query, now=None):
+    """
+    질의가 도시, 날짜, 시간 외의 내용이 없는 단순 날씨 조회이면 True를 반환합니다.
+
+    규칙 기반 추출(fastpath)이 질의의 모든 단어를 해석할 수 있는 경우를 단순 조회로 봅니다.
+    """
+    return parse_query(query, now or get_current_datetime()) is not None
+
+
+def resolve_response_mode(query, conversation_history, response_mode=None):
+    """
+    답변 생성 방식('fast' 또는 'rich')을 결정합니다.
+
+    Args:
+        query (str): 사용자의 질의 문장.
+        conversation_history (ConversationHistory or list): 이전 대화 기록.
+        response_mode (str, optional): 'fast', 'rich' 또는 'auto'. 지정하지 않으면 DEFAULT_RESPONSE_MODE를 사용합니다.
+
+    Returns:
+        str: RESPONSE_MODE_FAST 또는 RESPONSE_MODE_RICH.
+    """
+    mode = response_mode or DEFAULT_RESPONSE_MODE
+    if mode == RESPONSE_MODE_AUTO:
+        # 이전 대화를 반영해야 하거나 단순 조회가 아닌 질의는 LLM으로 답변
+        if has_history(conversation_history) or not is_plain_lookup(query):
+            return RESPONSE_MODE_RICH
+        return RESPONSE_MODE_FAST
+    return mode
+
+
+@metrics.timed('weather_response')
+def generate_weather_response(query, conversation_history, extraction_mode=None, response_mode=None, deadline=None):
     """
     사용자의 질의로부터 날씨 정보를 생성하는 함수.
 
+    답변 캐시를 사용하면(configure_answer_cache) 이전 대화가 없는 'rich' 답변을
+    추출 직후 캐시에서 찾으므로, 적중하면 날씨 조회와 답변 생성을 생략합니다.
+
+    추측 모드(speculation.set_speculation)이면 GPT 추출과 동시에 추측한 도시
+    (질의의 도시, 직전 대화의 도시 또는 서울)의 날씨를 가져와 날씨 조회 시간을 추출 시간에 겹칩니다.
+
+    deadline을 지정하면 추출, 날씨 조회, 답변 생성이 각각 남은 시간 안에서만 외부 API를 기다립니다.
+    시간이 부족하면 추출은 기본 도시(서울)로, 답변은 템플릿 답변으로 대신하며,
+    날씨 정보도 가져오지 못하면 DEADLINE_MESSAGE를 반환합니다. (도구 호출 모드에는 적용되지 않습니다.)
+
     Args:
         query (str): 사용자의 질의 문장.
-        conversation_history (list): 이전 대화 기록.
+        conversation_history (ConversationHistory or list): 이전 대화 기록.
+        extraction_mode (str, optional): 'prompt'(추출 후 답변, 기본값) 또는 'tool'(도구 호출).
+            지정하지 않으면 DEFAULT_EXTRACTION_MODE를 사용합니다.
+        response_mode (str, optional): 'rich'(LLM 답변), 'fast'(템플릿 답변) 또는 'auto'.
+            지정하지 않으면 DEFAULT_RESPONSE_MODE를 사용합니다. 'fast' 답변은 도구 호출 대신
+            추출 프롬프트(또는 규칙 기반 추출)를 사용하므로 LLM 호출이 1회 이하입니다.
+        deadline (Deadline or float, optional): 턴의 제한 시간 또는 지금부터의 제한 시간(초).
 
     Returns:
         str: 사용자를 위한 날씨 정보 응답.
     """
-    # 도시와 날짜 추출
-    city, target_date = extract_city_and_date(query)
+    mode = resolve_response_mode(query, conversation_history, response_mode)
+    metrics.record_response_mode(mode)
+    if mode == RESPONSE_MODE_RICH and (extraction_mode or DEFAULT_EXTRACTION_MODE) == EXTRACTION_MODE_TOOL:
+        return generate_weather_response_with_tools(query, conversation_history)
 
-    # 날씨 정보 가져오기
-    temp, sky, date_time = generate_weather_info(city, target_date)
+    deadline = as_deadline(deadline)
+    # 추측 모드이면 추출하는 동안 추측한 도시의 날씨를 미리 가져옴
+    speculative = speculate_weather(query, conversation_history)
+    try:
+        # 도시와 날짜 추출
+        city, target_date = extract_city_and_date(query, deadline=deadline)
+        if speculative is not None:
+            # 추측이 맞으면 미리 가져온 날씨를 사용하고, 틀리면 버림
+            speculative.resolve(canonical_city(city), weather_endpoint(target_date), deadline)
 
-    if temp is None or sky is None:
-        return "죄송합니다, 날씨 정보를 가져오는 데 실패했습니다."
+        # 같은 도시, 시간대, 의도의 답변이 캐시에 있으면 그대로 사용
+        answer_key = answer_cache_key(query, city, target_date) if use_answer_cache(conversation_history, mode) else None
+        if answer_key is not None:
+            cached = get_cached_answer(answer_key)
+            if cached is not None:
+                return cached
 
-    # 사용자에게 전달할 날씨 정보 생성
-    weather_info = f"{city}의 {date_time} 날씨는 {sky}이며, 기온은 {temp}도입니다."
+        # 날씨 정보 가져오기
+        temp, sky, date_time = generate_weather_info(city, target_date, deadline=deadline)
 
-    # 대화 기록을 바탕으로 메시지 생성
-    messages = [
-        {"role": "system", "content": "당신은 사용자에게 날씨 정보를 제공하는 친절한 어시스턴트입니다."},
-    ]
-    # 이전 대화 기록 추가
-    for entry in conversation_history:
-        messages.append({"role": "user", "content": entry["user"]})
-        messages.append({"role": "assistant", "content": entry["bot"]})
-    # 현재 사용자 입력과 날씨 정보를 포함한 메시지 추가
-    user_message = f"{query}\n\n현재 날씨 정보:\n{weather_info}\n\n위의 날씨 정보를 바탕으로 사용자에게 친절하고 자연스러운 답변을 제공해주세요."
-    messages.append({"role": "user", "content": user_message})
+        if temp is None or sky is None:
+            return WEATHER_FAILURE_MESSAGE
 
-    # GPT를 사용하여 응답 생성
-    response = call_openai_api(messages, max_tokens=200)
+        if mode == RESPONSE_MODE_FAST:
+            # 템플릿으로 답변 (두 번째 LLM 호출 생략)
+            return render_weather_answer(city, temp, sky, date_time)
+
+        messages = build_weather_messages(query, city, temp, sky, date_time, conversation_history)
+
+        # GPT를 사용하여 응답 생성
+        try:
+            response = call_openai_api(messages, max_tokens=200, deadline=deadline)
+        except DeadlineExceeded as e:
+            # 날씨 정보는 있으므로 템플릿으로 답변
+            print(f"답변 생성 제한 시간 초과: {e}")
+            return render_weather_answer(city, temp, sky, date_time)
+    except ThrottledError as e:
+        print(f"요청 한도 초과: {e}")
+        return THROTTLED_MESSAGE
+    except DeadlineExceeded as e:
+        print(f"날씨 조회 제한 시간 초과: {e}")
+        return DEADLINE_MESSAGE
 
     if response is None:
-        return "죄송합니다, 요청을 처리하는 중 오류가 발생했습니다."
+        return ERROR_MESSAGE
 
+    if answer_key is not None:
+        store_answer(answer_key, response)
     return response
 
 
-def chat_loop():
+def generate_weather_response_stream(query, conversation_history, response_mode=None):
+    """
+    generate_weather_response의 스트리밍 버전.
+
+    도시/날짜 추출과 날씨 조회는 반복을 시작할 때 수행되므로,
+    time_to_first_token에는 추출과 날씨 조회 시간이 포함됩니다.
+
+    Args:
+        query (str): 사용자의 질의 문장.
+        conversation_history (ConversationHistory or list): 이전 대화 기록.
+        response_mode (str, optional): 'rich', 'fast' 또는 'auto'. 'fast'이면 템플릿 답변을 한 번에 반환합니다.
+
+    Returns:
+        ResponseStream: 응답 내용 조각을 반환하는 이터레이터.
+    """
+    mode = resolve_response_mode(query, conversation_history, response_mode)
+
+    def deltas():
+        try:
+            city, target_date = extract_city_and_date(query)
+            temp, sky, date_time = generate_weather_info(city, target_date)
+        except ThrottledError as e:
+            print(f"요청 한도 초과: {e}")
+            yield THROTTLED_MESSAGE
+            return
+
+        if temp is None or sky is None:
+            yield WEATHER_FAILURE_MESSAGE
+            return
+
+        if mode == RESPONSE_MODE_FAST:
+            yield render_weather_answer(city, temp, sky, date_time)
+            return
+
+        messages = build_weather_messages(query, city, temp, sky, date_time, conversation_history)
+        yield from _iter_openai_deltas(messages, 200, 0.7)
+
+    return ResponseStream(deltas())
+
+
+def is_weather_query(query):
+    """질의에 '날씨'라는 단어가 들어 있으면 날씨 질의로 처리합니다."""
+    return WEATHER_KEYWORD in query
+
+
+def generate_chat_response(query, conversation_history, extraction_mode=None, response_mode=None, deadline=None):
+    """
+    사용자 입력 한 턴에 대한 응답을 생성하는 함수. chat_loop와 server가 사용합니다.
+
+    날씨 질의는 generate_weather_response로, 그 외의 질의는 대화 기록을 바탕으로 한 일반 대화로 처리합니다.
+    대화 기록에 현재 턴을 추가하는 것은 호출자가 합니다.
+
+    Args:
+        query (str): 사용자의 질의 문장.
+        conversation_history (ConversationHistory or list): 이전 대화 기록.
+        extraction_mode (str, optional): 날씨 질의 처리 방식 ('prompt' 또는 'tool').
+        response_mode (str, optional): 날씨 답변 생성 방식 ('rich', 'fast' 또는 'auto').
+        deadline (Deadline or float, optional): 턴의 제한 시간 또는 지금부터의 제한 시간(초).
+
+    Returns:
+        str: 응답 또는 일반 대화의 OpenAI 호출에 실패한 경우 None.
+            요청 한도를 넘은 경우 THROTTLED_MESSAGE, 일반 대화가 제한 시간을 넘은 경우 DEADLINE_MESSAGE.
+    """
+    if is_weather_query(query):
+        return generate_weather_response(query, conversation_history, extraction_mode=extraction_mode,
+                                         response_mode=response_mode, deadline=deadline)
+
+    # 대화 기록을 바탕으로 자유로운 질문에 대한 응답 생성
+    messages = build_chat_messages(query, conversation_history)
+    try:
+        return call_openai_api(messages, max_tokens=200, deadline=as_deadline(deadline))
+    except ThrottledError as e:
+        print(f"요청 한도 초과: {e}")
+        return THROTTLED_MESSAGE
+    except DeadlineExceeded as e:
+        print(f"제한 시간 초과: {e}")
+        return DEADLINE_MESSAGE
+
+
+def print_stream(stream):
+    """응답 조각이 도착하는 대로 출력하고 전체 응답을 반환합니다."""
+    print("응답: ", end="", flush=True)
+    for delta in stream:
+        print(delta, end="", flush=True)
+    print()
+    return stream.text
+
+
+def chat_loop(stream=False, session_store=None, response_mode=None):
     """
     사용자가 'exit'을 입력할 때까지 반복적으로 질문을 받고 응답하는 함수.
     사용자의 질문에 '날씨'라는 단어가 들어가면 날씨 정보를 제공하며,
     그렇지 않은 경우 일반 대화로 처리하고 이전 대화를 기억합니다.
     날씨 질문에도 이전 대화를 기억하여 응답에 반영합니다.
+
+    Args:
+        stream (bool, optional): True이면 응답을 생성되는 대로 출력합니다. 기본값은 False.
+        session_store (SessionStore, optional): 대화 기록을 저장할 세션 저장소.
+            SQLiteSessionBackend를 사용하면 다음 실행에서 이전 대화를 이어갑니다.
+            없으면 메모리에만 저장하는 저장소를 사용합니다.
+        response_mode (str, optional): 날씨 답변 생성 방식 ('rich', 'fast' 또는 'auto').
     """
     print("챗봇을 시작합니다. 'exit'을 입력하여 종료할 수 있습니다.")
     print("날씨 정보를 얻기 위해 꼭 %%'날씨'%% 라는 단어를 포함한 질문을 입력하세요.")
     print("ex) '서울 날씨 어때?', '내일 부산 날씨 알려줘'")
 
-    # 대화 기록을 저장할 리스트
-    conversation_history = []
-
-    while True:
-        user_input = input("질문을 입력하세요: ")
-
-        if user_input.lower() == "exit":
-            print("챗봇을 종료합니다.")
-            break
-
-        # 사용자의 입력에 '날씨'가 포함되어 있는지 확인
-        if '날씨' in user_input:
-            # generate_weather_response 함수를 사용하여 날씨 정보 응답 생성
-            response = generate_weather_response(user_input, conversation_history)
-        else:
-            # 대화 기록을 바탕으로 메시지 생성
-            messages = [
-                {"role": "system", "content": "당신은 사용자에게 날씨 정보를 제공하는 친절한 어시스턴트입니다."},
-            ]
-            for entry in conversation_history:
-                messages.append({"role": "user", "content": entry["user"]})
-                messages.append({"role": "assistant", "content": entry["bot"]})
-            messages.append({"role": "user", "content": user_input})
-
-            # 자유로운 질문에 대한 응답 생성
-            response = call_openai_api(messages, max_tokens=200)
-
-        print(f"응답: {response}")
-
-        # 현재 대화를 기록에 추가
-        conversation_history.append({"user": user_input, "bot": response})
+    # 첫 질문을 입력하는 동안 openai를 미리 임포트
+    preload_openai()
+
+    # 토큰 예산 안에서 최근 대화를 유지하고 오래된 대화는 요약하는 대화 기록
+    owns_store = session_store is None
+    if owns_store:
+        session_store = SessionStore(summarizer=summarize_history)
+    conversation_history = session_store.get(CLI_SESSION_ID)
+
+    try:
+        while True:
+            user_input = input("질문을 입력하세요: ")
+
+            if user_input.lower() == "exit":
+                print("챗봇을 종료합니다.")
+                break
+
+            if stream:
+                # 사용자의 입력에 '날씨'가 포함되어 있는지 확인
+                if is_weather_query(user_input):
+                    response = print_stream(generate_weather_response_stream(
+                        user_input, conversation_history, response_mode=response_mode))
+                else:
+                    messages = build_chat_messages(user_input, conversation_history)
+                    response = print_stream(call_openai_api_stream(messages, max_tokens=200))
+            else:
+                response = generate_chat_response(user_input, conversation_history, response_mode=response_mode)
+
+            if not stream:
+                print(f"응답: {response}")
+
+            # 현재 대화를 기록에 추가 (요청 한도 초과 응답은 대화 내용이 아니므로 제외)
+            if response != THROTTLED_MESSAGE:
+                conversation_history.add_turn(user_input, response)
+    finally:
+        if owns_store:
+            session_store.close()
@@ -1,12 +1,34 @@
 # config.py
-from dotenv import load_dotenv
 import os
 
-# 기본적으로 프로젝트 루트에서 .env 파일을 찾습니다
-load_dotenv()
+_loaded = False
+
+
+def load_config():
+    """
+    .env 파일의 환경 변수를 한 번만 로드합니다.
+
+    모듈 임포트 시점이 아니라 설정 값을 처음 읽을 때 호출되므로,
+    설정을 사용하지 않는 코드 경로는 python-dotenv를 임포트하지 않습니다.
+    이미 설정된 환경 변수는 덮어쓰지 않습니다.
+    """
+    global _loaded
+    if _loaded:
+        return
+    from dotenv import load_dotenv
+
+    # 기본적으로 프로젝트 루트에서 .env 파일을 찾습니다
+    load_dotenv()
+    _loaded = True
 
 def get_openai_api_key():
+    load_config()
     return os.getenv("OPENAI_API_KEY")
 
 def get_weather_api_key():
+    load_config()
     return os.getenv("WEATHER_API_KEY")
+
+def get_weather_api_base_url():
+    load_config()
+    return os.getenv("WEATHER_API_BASE_URL", "https://api.openweathermap.org").rstrip("/")
@@ -0,0 +1,86 @@
+import time
+
+from chatweather import metrics
+
+# 파이프라인 단계 이름 (DeadlineExceeded.stage와 metrics의 stage 레이블에 사용)
+STAGE_EXTRACT = "extract"
+STAGE_WEATHER = "weather"
+STAGE_LLM = "llm"
+
+
+class DeadlineExceeded(Exception):
+    """
+    턴의 제한 시간이 지나 단계를 끝내지 못한 경우의 예외.
+
+    Attributes:
+        stage (str): 제한 시간을 넘은 단계 ('extract', 'weather', 'llm').
+    """
+
+    def __init__(self, stage):
+        super().__init__(f"{stage} 단계에서 제한 시간 초과")
+        self.stage = stage
+
+
+class Deadline:
+    """
+    한 턴의 제한 시간.
+
+    턴을 시작할 때 만들어 generate_weather_response부터 각 단계로 전달하며,
+    각 단계는 remaining()/timeout()으로 남은 시간만큼만 외부 API를 기다립니다.
+
+    Args:
+        budget (float): 턴 전체의 제한 시간(초).
+        clock (callable, optional): 현재 시각(초)을 반환하는 함수. 기본값은 time.monotonic.
+    """
+
+    def __init__(self, budget, clock=time.monotonic):
+        self.budget = budget
+        self._clock = clock
+        self.expires_at = clock() + budget
+
+    def remaining(self):
+        """남은 시간(초)을 반환합니다. 지났으면 0을 반환합니다."""
+        return max(0.0, self.expires_at - self._clock())
+
+    def expired(self):
+        """제한 시간이 지났으면 True를 반환합니다."""
+        return self.remaining() <= 0
+
+    def timeout(self, maximum=None):
+        """남은 시간과 maximum 중 작은 값을 반환합니다. 단계별 기본 타임아웃을 남은 시간으로 줄일 때 사용합니다."""
+        remaining = self.remaining()
+        return remaining if maximum is None else min(remaining, maximum)
+
+    def check(self, stage):
+        """
+        제한 시간이 지났으면 DeadlineExceeded를 발생시킵니다.
+
+        Raises:
+            DeadlineExceeded: 제한 시간이 지난 경우.
+        """
+        if self.expired():
+            raise exceeded(stage)
+
+    def __repr__(self):
+        return f"Deadline(budget={self.budget}, remaining={self.remaining():.3f})"
+
+
+def as_deadline(deadline):
+    """
+    제한 시간 인자를 Deadline으로 변환합니다.
+
+    Args:
+        deadline (Deadline or float or None): Deadline 객체, 지금부터의 제한 시간(초) 또는 None.
+
+    Returns:
+        Deadline: 변환된 제한 시간. None이면 None(제한 없음)을 반환합니다.
+    """
+    if deadline is None or isinstance(deadline, Deadline):
+        return deadline
+    return Deadline(deadline)
+
+
+def exceeded(stage):
+    """단계의 제한 시간 초과를 기록하고 발생시킬 DeadlineExceeded를 반환합니다."""
+    metrics.record_deadline_exceeded(stage)
+    return DeadlineExceeded(stage)
@@ -0,0 +1,163 @@
+import sqlite3
+import threading
+import time
+
+# 다른 프로세스가 쓰는 중일 때 잠금을 기다리는 최대 시간(초)
+DEFAULT_BUSY_TIMEOUT = 5.0
+
+
+class DiskCache:
+    """
+    같은 호스트의 여러 프로세스가 공유하는 SQLite(WAL 모드) 기반 캐시.
+
+    항목은 (kind, key)별로 바이트열 값, 가져온 시각, 만료 시각을 저장합니다.
+    만료 시각이 지난 항목은 읽지 않으므로 메모리 캐시(TTLCache)와 같은 만료 규칙을 따릅니다.
+    프로세스 안에서는 잠금으로 보호하는 연결 하나를 모든 스레드가 공유하므로,
+    짧게 사는 스레드가 많아도 연결과 파일 디스크립터가 늘지 않습니다.
+
+    Args:
+        path (str): 데이터베이스 파일 경로.
+        busy_timeout (float, optional): 쓰기 잠금을 기다리는 최대 시간(초).
+        clock (callable, optional): 현재 시각(초)을 반환하는 함수. 기본값은 time.time.
+    """
+
+    def __init__(self, path, busy_timeout=DEFAULT_BUSY_TIMEOUT, clock=time.time):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._clock = clock
+        self._conn = None
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.errors = 0
+
+        self._execute("PRAGMA journal_mode=WAL")
+        self._execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value BLOB NOT NULL,
+                fetched_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (kind, key)
+            ) WITHOUT ROWID
+        """)
+
+    def _connection(self):
+        # self._lock을 잡은 상태에서 호출
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn = conn
+        return self._conn
+
+    def _execute(self, sql, params=(), fetch=None):
+        """
+        공유 연결에서 SQL을 실행합니다.
+
+        Args:
+            fetch (str, optional): 'one'이면 첫 행, 'rowcount'이면 변경된 행 수를 반환합니다.
+        """
+        with self._lock:
+            cursor = self._connection().execute(sql, params)
+            if fetch == 'one':
+                return cursor.fetchone()
+            if fetch == 'rowcount':
+                return cursor.rowcount
+            return None
+
+    def _count(self, name):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def get(self, kind, key):
+        """
+        만료되지 않은 항목을 반환합니다.
+
+        Returns:
+            tuple: (value, fetched_at, expires_at) 또는 없거나 만료되었으면 None.
+        """
+        try:
+            row = self._execute(
+                "SELECT value, fetched_at, expires_at FROM entries WHERE kind = ? AND key = ? AND expires_at > ?",
+                (kind, key, self._clock()), fetch='one',
+            )
+        except sqlite3.Error as err:
+            self._count('errors')
+            print(f"디스크 캐시 읽기 중 오류 발생: {err}")
+            return None
+        self._count('hits' if row is not None else 'misses')
+        return row
+
+    def set(self, kind, key, value, expires_at, fetched_at=None):
+        """
+        항목을 저장합니다. 이미 더 최근에 가져온 항목이 있으면 덮어쓰지 않습니다.
+
+        Args:
+            kind (str): 항목 종류 (예: 'forecast', 'weather').
+            key (str): 항목 키.
+            value (bytes): 저장할 값.
+            expires_at (float): 만료 시각(epoch 초).
+            fetched_at (float, optional): 가져온 시각(epoch 초). 기본값은 현재 시각.
+        """
+        if fetched_at is None:
+            fetched_at = self._clock()
+        try:
+            self._execute(
+                """
+                INSERT INTO entries (kind, key, value, fetched_at, expires_at) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (kind, key) DO UPDATE SET
+                    value = excluded.value, fetched_at = excluded.fetched_at, expires_at = excluded.expires_at
+                WHERE excluded.fetched_at >= entries.fetched_at
+                """,
+                (kind, key, value, fetched_at, expires_at),
+            )
+        except sqlite3.Error as err:
+            self._count('errors')
+            print(f"디스크 캐시 쓰기 중 오류 발생: {err}")
+            return
+        self._count('writes')
+
+    def delete(self, kind, key):
+        """항목을 삭제합니다."""
+        self._execute("DELETE FROM entries WHERE kind = ? AND key = ?", (kind, key))
+
+    def purge_expired(self):
+        """
+        만료된 항목을 삭제합니다.
+
+        Returns:
+            int: 삭제한 항목 수.
+        """
+        return self._execute("DELETE FROM entries WHERE expires_at <= ?", (self._clock(),), fetch='rowcount')
+
+    def clear(self):
+        """모든 항목과 통계를 초기화합니다."""
+        self._execute("DELETE FROM entries")
+        with self._stats_lock:
+            self.hits = 0
+            self.misses = 0
+            self.writes = 0
+            self.errors = 0
+
+    def stats(self):
+        """
+        캐시 통계를 반환합니다.
+
+        Returns:
+            dict: size, hits, misses, writes, errors 키를 포함하는 딕셔너리.
+        """
+        size = self._execute("SELECT COUNT(*) FROM entries", fetch='one')[0]
+        with self._stats_lock:
+            return {'size': size, 'hits': self.hits, 'misses': self.misses,
+                    'writes': self.writes, 'errors': self.errors}
+
+    def close(self):
+        """연결을 닫습니다. 닫은 뒤에 다시 사용하면 새 연결을 엽니다."""
+        with self._lock:
+            conn, self._conn = self._conn, None
+        if conn is not None:
+            conn.close()
@@ -0,0 +1,342 @@
+import re
+import threading
+from datetime import timedelta
+
+# 한국어/영어 도시 이름과 흔한 오탈자 -> OpenWeatherMap 영어 도시 이름
+CITY_GAZETTEER = {
+    '서울': 'Seoul', '서을': 'Seoul', '써울': 'Seoul', '서울시': 'Seoul',
+    '부산': 'Busan', '부싼': 'Busan', '부신': 'Busan', '부산시': 'Busan',
+    '인천': 'Incheon', '인쳔': 'Incheon',
+    '대구': 'Daegu', '대긔': 'Daegu',
+    '대전': 'Daejeon', '대젼': 'Daejeon',
+    '광주': 'Gwangju',
+    '울산': 'Ulsan',
+    '세종': 'Sejong',
+    '수원': 'Suwon',
+    '성남': 'Seongnam',
+    '고양': 'Goyang',
+    '용인': 'Yongin',
+    '창원': 'Changwon',
+    '청주': 'Cheongju',
+    '전주': 'Jeonju',
+    '천안': 'Cheonan',
+    '포항': 'Pohang',
+    '김해': 'Gimhae',
+    '제주': 'Jeju City', '제주도': 'Jeju City', '제주시': 'Jeju City',
+    '서귀포': 'Seogwipo',
+    '춘천': 'Chuncheon',
+    '강릉': 'Gangneung', '강능': 'Gangneung',
+    '원주': 'Wonju',
+    '속초': 'Sokcho',
+    '경주': 'Gyeongju',
+    '안동': 'Andong',
+    '여수': 'Yeosu',
+    '목포': 'Mokpo',
+    '순천': 'Suncheon',
+    '군산': 'Gunsan',
+    '도쿄': 'Tokyo', '동경': 'Tokyo',
+    '오사카': 'Osaka',
+    '후쿠오카': 'Fukuoka',
+    '베이징': 'Beijing', '북경': 'Beijing',
+    '상하이': 'Shanghai', '상해': 'Shanghai',
+    '홍콩': 'Hong Kong',
+    '타이베이': 'Taipei',
+    '방콕': 'Bangkok',
+    '하노이': 'Hanoi',
+    '다낭': 'Da Nang',
+    '싱가포르': 'Singapore', '싱가폴': 'Singapore',
+    '시드니': 'Sydney',
+    '런던': 'London',
+    '파리': 'Paris',
+    '뉴욕': 'New York',
+    '로스앤젤레스': 'Los Angeles', '엘에이': 'Los Angeles',
+}
+
+# 영어 이름 (소문자) -> 도시 이름
+_ENGLISH_CITIES = {name.lower(): name for name in set(CITY_GAZETTEER.values())}
+_ENGLISH_CITIES.update({'pusan': 'Busan', 'jeju': 'Jeju City', 'la': 'Los Angeles'})
+
+# 상대 날짜
+RELATIVE_DAYS = {
+    '오늘': 0,
+    '금일': 0,
+    '내일': 1,
+    '낼': 1,
+    '명일': 1,
+    '내일모레': 2,
+    '모레': 2,
+    '글피': 3,
+}
+
+# 시간대 표현 -> 기본 시각(시)
+TIME_OF_DAY = {
+    '새벽': 3,
+    '아침': 9,
+    '오전': 9,
+    '점심': 12,
+    '정오': 12,
+    '낮': 12,
+    '오후': 15,
+    '저녁': 18,
+    '밤': 21,
+    '자정': 0,
+}
+
+# 질의에 흔히 포함되는, 도시/날짜와 무관한 단어
+FILLER_WORDS = {
+    '날씨', '날씨는', '날씨가', '날씨를', '기온', '기온은', '예보', '온도', '하늘',
+    '어때', '어때요', '어떄', '어떄요', '어떤가요', '어떻게', '어떨까', '어떨까요', '어떻니', '어떰',
+    '알려줘', '알려주세요', '알려줄래', '알려', '줘', '주세요', '말해줘', '봐줘', '궁금해', '궁금해요',
+    '좀', '지금', '현재', '요', '는', '은', '이', '가', '의', '에', '날',
+    'weather', 'forecast',
+}
+
+# 도시/날짜/시간 단어 뒤에 붙는 조사
+_PARTICLES = ('에서는', '에서', '에는', '의', '에', '은', '는', '이', '가', '도', '엔', '쯤', '경')
+
+# 붙여 쓴 표현을 나눌 때 사용하는 단어 (긴 단어 우선)
+_VOCABULARY = sorted(
+    set(CITY_GAZETTEER) | set(RELATIVE_DAYS) | set(TIME_OF_DAY) | {'날씨'},
+    key=len, reverse=True,
+)
+
+_TOKEN_RE = re.compile(r"[0-9A-Za-z가-힣]+")
+_HOUR_RE = re.compile(r"^(\d{1,2})시(반|(\d{1,2})분)?$")
+_MINUTE_RE = re.compile(r"^(\d{1,2})분$")
+
+_stats_lock = threading.Lock()
+_hits = 0
+_misses = 0
+
+
+def _strip_particle(token):
+    """토큰 끝의 조사를 제거한 후보 목록을 반환합니다."""
+    candidates = [token]
+    for particle in _PARTICLES:
+        if token.endswith(particle) and len(token) > len(particle):
+            candidates.append(token[:-len(particle)])
+    return candidates
+
+
+def _classify(token):
+    """
+    토큰을 분류합니다.
+
+    Returns:
+        tuple: (종류, 값). 종류는 'city', 'day', 'period', 'hour', 'minute', 'filler', 'unknown' 중 하나.
+    """
+    for candidate in _strip_particle(token):
+        if candidate in CITY_GAZETTEER:
+            return 'city', CITY_GAZETTEER[candidate]
+        if candidate.lower() in _ENGLISH_CITIES:
+            return 'city', _ENGLISH_CITIES[candidate.lower()]
+        if candidate in RELATIVE_DAYS:
+            return 'day', RELATIVE_DAYS[candidate]
+        if candidate in TIME_OF_DAY:
+            return 'period', candidate
+        match = _HOUR_RE.match(candidate)
+        if match:
+            minute = 30 if match.group(2) == '반' else int(match.group(3) or 0)
+            return 'hour', (int(match.group(1)), minute)
+        match = _MINUTE_RE.match(candidate)
+        if match:
+            return 'minute', int(match.group(1))
+        if candidate == '반':
+            return 'minute', 30
+        if candidate in FILLER_WORDS:
+            return 'filler', None
+    return 'unknown', None
+
+
+def _segment(token):
+    """
+    붙여 쓴 표현을 알려진 단어로 나눕니다. (예: '내일아침', '부산날씨')
+
+    Returns:
+        list: 나눈 토큰 목록 또는 나눌 수 없는 경우 None.
+    """
+    if _classify(token)[0] != 'unknown':
+        return [token]
+    for word in _VOCABULARY:
+        if token.startswith(word) and len(token) > len(word):
+            rest = _segment(token[len(word):])
+            if rest is not None:
+                return [word] + rest
+    return None
+
+
+def _tokenize(query):
+    """질의를 토큰으로 나눕니다."""
+    tokens = []
+    for token in _TOKEN_RE.findall(query):
+        tokens.extend(_segment(token) or [token])
+    return tokens
+
+
+def parse_query(query, now):
+    """
+    규칙 기반으로 질의에서 도시와 날짜를 추출합니다.
+
+    make_extracting_prompt와 같은 기본값을 사용합니다.
+    - 도시가 언급되지 않으면 'Seoul'
+    - 날짜(오늘/내일/모레/글피)만 언급되고 시간이 없으면 12시 정각
+    - 오늘 또는 날짜 언급 없이 시간도 없으면 현재 시간
+    - 오전/오후 없이 1~11시만 언급되면 확신할 수 없으므로 None (LLM에 맡김)
+    - 자정과 밤/저녁 12시는 다음 날 0시, 밤 1~5시는 다음 날 1~5시
+    - 새벽 12시는 확신할 수 없으므로 None
+
+    Args:
+        query (str): 사용자의 질의 문장.
+        now (datetime): 현재 시간.
+
+    Returns:
+        tuple: (city, date_str) 또는 확신할 수 없는 경우 None.
+    """
+    cities = set()
+    days = set()
+    periods = set()
+    hour = None
+    minute = 0
+
+    for token in _tokenize(query):
+        kind, value = _classify(token)
+        if kind == 'unknown':
+            return None
+        if kind == 'city':
+            cities.add(value)
+        elif kind == 'day':
+            days.add(value)
+        elif kind == 'period':
+            periods.add(value)
+        elif kind == 'hour':
+            if hour is not None:
+                return None
+            hour, minute = value
+        elif kind == 'minute':
+            minute = value
+
+    # 서로 다른 도시나 날짜가 여러 개면 LLM에 맡김
+    if len(cities) > 1 or len(days) > 1 or len(periods) > 1:
+        return None
+
+    city = cities.pop() if cities else 'Seoul'
+    day_offset = days.pop() if days else None
+    period = periods.pop() if periods else None
+
+    # 자정(밤/저녁 12시)과 밤 1~5시는 다음 날 새벽
+    next_day = False
+    if hour is not None:
+        if hour > 23 or minute > 59:
+            return None
+        if period is None and 1 <= hour <= 11:
+            # '3시'만으로는 오전/오후를 알 수 없으므로 LLM에 맡김
+            return None
+        if period == '새벽' and hour == 12:
+            # 이미 지난 0시인지 다음 날 0시인지 알 수 없으므로 LLM에 맡김
+            return None
+        if period in ('밤', '저녁', '자정') and hour == 12:
+            hour, next_day = 0, True
+        elif period == '밤' and 1 <= hour <= 5:
+            # '밤 1시'는 다음 날 1시
+            next_day = True
+        elif period in ('오후', '저녁', '밤') and hour < 12:
+            # '오후 3시', '저녁 7시'처럼 12시간제로 표현한 경우
+            hour += 12
+    elif period is not None:
+        hour = TIME_OF_DAY[period]
+        next_day = period == '자정'
+
+    if hour is None:
+        if day_offset in (None, 0):
+            # 오늘의 날씨이고 특정 시간을 언급하지 않은 경우 현재 시간
+            target = now
+        else:
+            target = (now + timedelta(days=day_offset)).replace(hour=12, minute=0, second=0, microsecond=0)
+    else:
+        target = (now + timedelta(days=(day_offset or 0) + next_day)).replace(
+            hour=hour, minute=minute, second=0, microsecond=0
+        )
+
+    return city, target.strftime("%Y%m%d%H%M%S")
+
+
+def query_intent(query):
+    """
+    질의에서 도시, 날짜, 시간, 흔한 단어를 제외한 나머지 단어로 의도를 나타내는 문자열을 만듭니다.
+
+    예를 들어 '내일 부산 날씨 알려줘'와 '부산 내일 날씨'는 같은 의도('')이고,
+    '내일 부산에 우산 필요해?'는 '우산 필요해'입니다.
+
+    Args:
+        query (str): 사용자의 질의 문장.
+
+    Returns:
+        str: 소문자로 정규화한 나머지 단어들. 단순 날씨 조회이면 빈 문자열.
+    """
+    words = [token.lower() for token in _tokenize(query) if _classify(token)[0] == 'unknown']
+    return " ".join(words)
+
+
+def mentioned_cities(text):
+    """텍스트에 언급된 도시(영어 이름)를 언급된 순서대로 중복 없이 반환합니다. 해석할 수 없는 단어는 무시합니다."""
+    cities = []
+    for token in _tokenize(text):
+        kind, value = _classify(token)
+        if kind == 'city' and value not in cities:
+            cities.append(value)
+    return cities
+
+
+def mentioned_days(text):
+    """텍스트에 언급된 상대 날짜(오늘=0, 내일=1, ...)를 중복 없이 반환합니다."""
+    days = []
+    for token in _tokenize(text):
+        kind, value = _classify(token)
+        if kind == 'day' and value not in days:
+            days.append(value)
+    return days
+
+
+def extract_fast(query, now):
+    """
+    규칙 기반 추출을 시도하고 적중률 통계를 기록합니다.
+
+    Args:
+        query (str): 사용자의 질의 문장.
+        now (datetime): 현재 시간.
+
+    Returns:
+        tuple: (city, date_str) 또는 LLM 추출이 필요한 경우 None.
+    """
+    global _hits, _misses
+    result = parse_query(query, now)
+    with _stats_lock:
+        if result is None:
+            _misses += 1
+        else:
+            _hits += 1
+    return result
+
+
+def get_fastpath_stats():
+    """
+    규칙 기반 추출의 적중률 통계를 반환합니다.
+
+    Returns:
+        dict: hits, misses, hit_rate 키를 포함하는 딕셔너리.
+    """
+    with _stats_lock:
+        total = _hits + _misses
+        return {
+            'hits': _hits,
+            'misses': _misses,
+            'hit_rate': _hits / total if total else 0.0,
+        }
+
+
+def reset_fastpath_stats():
+    """적중률 통계를 초기화합니다."""
+    global _hits, _misses
+    with _stats_lock:
+        _hits = 0
+        _misses = 0
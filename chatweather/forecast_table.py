@@ -0,0 +1,194 @@
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from datetime import datetime
+
+# OpenWeatherMap 예보 슬롯 간격 (3시간)
+SLOT_SECONDS = 3 * 60 * 60
+
+LOOKUP_EXACT = "exact"
+LOOKUP_NEAREST = "nearest"
+LOOKUP_INTERPOLATE = "interpolate"
+
+# to_bytes() 형식: 버전, 슬롯 수, 설명 수 헤더 뒤에 times/temps/codes/sky_indexes 배열과 '\n'으로 연결한 설명 문자열
+_FORMAT_VERSION = 1
+_HEADER = struct.Struct('<BIH')
+
+
+class ForecastTable:
+    """
+    5일/3시간 예보 응답을 병렬 배열로 저장한 조회 테이블.
+
+    응답을 한 번만 파싱하여 시각(epoch 초), 기온, 날씨 코드, 날씨 설명 인덱스를
+    array로 저장하므로, 딕셔너리 목록보다 메모리를 적게 쓰고 이진 탐색으로 슬롯을 찾습니다.
+
+    Args:
+        times (array): 슬롯 시각(epoch 초)의 오름차순 배열.
+        temps (array): 슬롯별 기온 배열.
+        codes (array): 슬롯별 OpenWeatherMap 날씨 코드 배열.
+        sky_indexes (array): 슬롯별 날씨 설명 인덱스 배열.
+        descriptions (tuple): 날씨 설명 문자열 목록.
+    """
+
+    __slots__ = ('times', 'temps', 'codes', 'sky_indexes', 'descriptions')
+
+    def __init__(self, times, temps, codes, sky_indexes, descriptions):
+        self.times = times
+        self.temps = temps
+        self.codes = codes
+        self.sky_indexes = sky_indexes
+        self.descriptions = descriptions
+
+    @classmethod
+    def from_list(cls, weather_list):
+        """
+        예보 응답의 'list' 항목으로 테이블을 생성합니다.
+
+        Args:
+            weather_list (list): 'dt', 'main.temp', 'weather[0]'을 포함하는 예보 항목 리스트.
+
+        Returns:
+            ForecastTable: 생성된 테이블.
+        """
+        items = sorted(weather_list, key=lambda item: item['dt'])
+        times = array('q')
+        temps = array('d')
+        codes = array('H')
+        sky_indexes = array('H')
+        descriptions = []
+        description_index = {}
+
+        for item in items:
+            weather = item['weather'][0]
+            description = weather['description']
+            index = description_index.get(description)
+            if index is None:
+                index = description_index[description] = len(descriptions)
+                # 같은 설명 문자열을 여러 테이블이 공유하도록 intern
+                descriptions.append(sys.intern(description))
+            times.append(int(item['dt']))
+            temps.append(float(item['main']['temp']))
+            codes.append(int(weather.get('id', 0)))
+            sky_indexes.append(index)
+
+        return cls(times, temps, codes, sky_indexes, tuple(descriptions))
+
+    def to_bytes(self):
+        """
+        테이블을 압축된 바이트열로 직렬화합니다. (배열은 현재 플랫폼의 바이트 순서를 사용합니다.)
+
+        Returns:
+            bytes: from_bytes()로 복원할 수 있는 바이트열.
+        """
+        return b''.join((
+            _HEADER.pack(_FORMAT_VERSION, len(self.times), len(self.descriptions)),
+            self.times.tobytes(),
+            self.temps.tobytes(),
+            self.codes.tobytes(),
+            self.sky_indexes.tobytes(),
+            '\n'.join(self.descriptions).encode('utf-8'),
+        ))
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        to_bytes()로 직렬화한 바이트열에서 테이블을 복원합니다.
+
+        Raises:
+            ValueError: 형식이 올바르지 않은 경우.
+        """
+        view = memoryview(data)
+        try:
+            version, count, description_count = _HEADER.unpack_from(view)
+        except struct.error as err:
+            raise ValueError(f"예보 테이블 형식이 올바르지 않습니다: {err}") from None
+        if version != _FORMAT_VERSION:
+            raise ValueError(f"지원하지 않는 예보 테이블 형식 버전입니다: {version}")
+
+        offset = _HEADER.size
+        arrays = []
+        for typecode in ('q', 'd', 'H', 'H'):
+            values = array(typecode)
+            end = offset + count * values.itemsize
+            if end > len(view):
+                raise ValueError("예보 테이블 데이터가 잘렸습니다.")
+            values.frombytes(view[offset:end])
+            arrays.append(values)
+            offset = end
+
+        descriptions = ()
+        if description_count:
+            text = bytes(view[offset:]).decode('utf-8')
+            descriptions = tuple(sys.intern(description) for description in text.split('\n'))
+        return cls(*arrays, descriptions)
+
+    def __len__(self):
+        return len(self.times)
+
+    def sky(self, index):
+        """슬롯의 날씨 설명을 반환합니다."""
+        return self.descriptions[self.sky_indexes[index]]
+
+    def slot(self, index):
+        """
+        슬롯 정보를 반환합니다.
+
+        Returns:
+            tuple: (기온, 하늘 상태, 날짜시간)
+        """
+        return self.temps[index], self.sky(index), datetime.fromtimestamp(self.times[index])
+
+    def covers(self, timestamp):
+        """시각이 테이블 범위(양 끝에서 반 슬롯 이내)에 포함되는지 확인합니다."""
+        if not self.times:
+            return False
+        half = SLOT_SECONDS // 2
+        return self.times[0] - half <= timestamp <= self.times[-1] + half
+
+    def nearest_index(self, timestamp):
+        """가장 가까운 슬롯의 인덱스를 반환합니다. 범위를 벗어나면 None을 반환합니다."""
+        if not self.covers(timestamp):
+            return None
+        position = bisect_left(self.times, timestamp)
+        if position == 0:
+            return 0
+        if position == len(self.times):
+            return position - 1
+        before, after = self.times[position - 1], self.times[position]
+        return position if after - timestamp < timestamp - before else position - 1
+
+    def lookup(self, date_time, method=LOOKUP_INTERPOLATE):
+        """
+        날짜시간의 예보를 찾습니다.
+
+        Args:
+            date_time (datetime): 조회할 날짜시간.
+            method (str, optional): 조회 방식.
+                - 'exact': 슬롯 시각과 정확히 일치하는 경우만 반환
+                - 'nearest': 가장 가까운 슬롯을 반환 (날짜시간은 해당 슬롯의 시각)
+                - 'interpolate': 앞뒤 슬롯의 기온을 선형 보간하고, 하늘 상태는 가까운 슬롯을 사용 (기본값)
+
+        Returns:
+            tuple: (기온, 하늘 상태, 날짜시간) 또는 찾지 못한 경우 None.
+        """
+        timestamp = date_time.timestamp()
+        position = bisect_left(self.times, timestamp)
+        if position < len(self.times) and self.times[position] == timestamp:
+            return self.temps[position], self.sky(position), date_time
+
+        if method == LOOKUP_EXACT:
+            return None
+
+        index = self.nearest_index(timestamp)
+        if index is None:
+            return None
+
+        if method == LOOKUP_NEAREST or position == 0 or position == len(self.times):
+            return self.slot(index)
+
+        # 앞뒤 슬롯 사이의 선형 보간
+        before, after = position - 1, position
+        ratio = (timestamp - self.times[before]) / (self.times[after] - self.times[before])
+        temp = self.temps[before] + (self.temps[after] - self.temps[before]) * ratio
+        return round(temp, 2), self.sky(index), date_time
@@ -0,0 +1,175 @@
+import os
+import threading
+from collections import namedtuple
+
+# 패키지에 포함된 도시 색인 파일
+DEFAULT_INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cities.tsv')
+
+# 색인의 도시. name은 날씨 캐시 키에 사용하는 정식 이름(영어)입니다.
+Location = namedtuple('Location', ['name', 'lat', 'lon'])
+
+
+def normalize_name(name):
+    """
+    도시 이름을 색인의 키로 정규화합니다.
+
+    OpenWeatherMap 형식의 국가 코드(', KR')를 제거하고, 대소문자와 공백/문장 부호를 무시합니다.
+    예를 들어 'Jeju City', 'jeju-city', 'Jeju City, KR'은 모두 'jejucity'입니다.
+
+    Args:
+        name (str): 도시 이름 (영어 또는 한국어).
+
+    Returns:
+        str: 정규화된 키. 비어 있을 수 있습니다.
+    """
+    name = name.split(',', 1)[0]
+    return ''.join(char for char in name.casefold() if char.isalnum())
+
+
+class CityIndex:
+    """
+    정규화된 도시 이름(영어, 한국어, 별칭)을 정식 이름과 좌표로 바꾸는 로컬 색인.
+
+    색인 파일은 '키\\t정식 이름\\t위도\\t경도' 형식의 줄을 키의 UTF-8 바이트 순서로 정렬한 텍스트 파일입니다.
+    파일을 읽어 들이지 않고 메모리 맵으로 열어 이진 탐색하므로, 여러 프로세스가 같은 페이지를 공유합니다.
+
+    Args:
+        path (str): 색인 파일 경로. build_index()로 만들 수 있습니다.
+    """
+
+    def __init__(self, path):
+        import mmap
+
+        self.path = path
+        with open(path, 'rb') as file:
+            size = os.fstat(file.fileno()).st_size
+            # 빈 파일은 메모리 맵으로 열 수 없음
+            self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+
+    def _find(self, key):
+        """키의 줄을 찾아 (정식 이름, 위도, 경도) 필드를 반환합니다. 없으면 None을 반환합니다."""
+        data = self._data
+        lo, hi = 0, len(data)
+        # lo와 hi는 항상 줄의 시작 위치(또는 파일 끝)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            newline = data.rfind(b'\n', lo, mid)
+            start = lo if newline < 0 else newline + 1
+            end = data.find(b'\n', start)
+            if end < 0:
+                end = len(data)
+            current = data[start:data.find(b'\t', start, end)]
+            if current == key:
+                return data[start:end].split(b'\t')[1:]
+            if current < key:
+                lo = end + 1
+            else:
+                hi = start
+        return None
+
+    def lookup(self, name):
+        """
+        도시 이름의 정식 이름과 좌표를 찾습니다.
+
+        Args:
+            name (str): 도시 이름 (영어 또는 한국어, 별칭 포함).
+
+        Returns:
+            Location: 찾은 도시 또는 색인에 없으면 None.
+        """
+        key = normalize_name(name or '')
+        if not key:
+            return None
+        fields = self._find(key.encode('utf-8'))
+        if fields is None:
+            return None
+        canonical, lat, lon = fields
+        return Location(canonical.decode('utf-8'), float(lat), float(lon))
+
+    def close(self):
+        """메모리 맵을 닫습니다."""
+        if not isinstance(self._data, bytes):
+            self._data.close()
+        self._data = b''
+
+
+def build_index(entries, path):
+    """
+    도시 목록으로 색인 파일을 만듭니다.
+
+    Args:
+        entries (iterable): (정식 이름, 위도, 경도, 별칭 목록) 튜플. 정식 이름도 키로 등록됩니다.
+        path (str): 저장할 파일 경로.
+
+    Raises:
+        ValueError: 같은 키가 서로 다른 도시를 가리키는 경우.
+    """
+    rows = {}
+    for name, lat, lon, aliases in entries:
+        for alias in (name, *aliases):
+            key = normalize_name(alias)
+            if not key:
+                continue
+            if key in rows and rows[key][0] != name:
+                raise ValueError(f"Error: '{alias}'가 '{rows[key][0]}'와 '{name}'에 중복 등록되었습니다.")
+            rows[key] = (name, lat, lon)
+
+    with open(path, 'wb') as file:
+        for key in sorted(rows, key=lambda key: key.encode('utf-8')):
+            name, lat, lon = rows[key]
+            file.write(f"{key}\t{name}\t{lat:.4f}\t{lon:.4f}\n".encode('utf-8'))
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_city_index():
+    """
+    날씨 요청에 사용하는 도시 색인을 반환합니다. 기본 색인은 처음 사용할 때 엽니다.
+
+    Returns:
+        CityIndex: 도시 색인. set_city_index(None)으로 끈 경우 None.
+    """
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = CityIndex(DEFAULT_INDEX_PATH)
+    return _index or None
+
+
+def set_city_index(index):
+    """
+    날씨 요청에 사용할 도시 색인을 교체합니다.
+
+    Args:
+        index (CityIndex): 도시 색인. None이면 색인을 사용하지 않고 도시 이름으로 요청합니다.
+
+    Returns:
+        이전 도시 색인 (열지 않았거나 사용하지 않았으면 None).
+    """
+    global _index
+    with _index_lock:
+        previous = _index or None
+        # False는 '사용하지 않음', None은 '아직 열지 않음'
+        _index = index if index is not None else False
+    return previous
+
+
+def reset_city_index():
+    """기본 색인(패키지의 cities.tsv)을 다시 사용합니다. 다음 조회 때 엽니다."""
+    global _index
+    with _index_lock:
+        _index = None
+
+
+def lookup(name):
+    """
+    도시 색인에서 이름의 정식 이름과 좌표를 찾습니다.
+
+    Returns:
+        Location: 찾은 도시 또는 색인에 없거나 색인을 사용하지 않으면 None.
+    """
+    index = get_city_index()
+    return None if index is None else index.lookup(name)
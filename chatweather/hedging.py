@@ -0,0 +1,243 @@
+import contextvars
+import math
+import threading
+import time
+from collections import deque
+
+from chatweather import metrics
+from chatweather.deadline import exceeded
+
+# 지연 시간 분포에서 두 번째 요청을 보낼 기준 백분위수
+DEFAULT_PERCENTILE = 0.95
+# 기준을 계산할 최근 요청 수
+DEFAULT_WINDOW = 200
+# 기준을 계산하기 위한 최소 표본 수. 모이기 전에는 두 번째 요청을 보내지 않습니다.
+DEFAULT_MIN_SAMPLES = 20
+# 두 번째 요청을 보내기 전 최소 대기 시간(초). 매우 빠른 외부 API에서 요청이 두 배가 되는 것을 막습니다.
+DEFAULT_MIN_DELAY = 0.05
+# 요청을 실행하는 스레드 수
+HEDGE_MAX_WORKERS = 16
+
+OUTCOME_SINGLE = "single"    # 첫 요청이 기준 안에 끝나 두 번째 요청을 보내지 않음
+OUTCOME_PRIMARY = "primary"  # 두 번째 요청을 보냈지만 첫 요청이 먼저 끝남
+OUTCOME_HEDGE = "hedge"      # 두 번째 요청이 먼저 끝남
+
+
+class LatencyTracker:
+    """
+    최근 요청의 지연 시간을 유지하고 백분위수를 계산하는 스레드 안전한 객체.
+
+    Args:
+        window (int, optional): 유지할 최근 표본 수.
+        min_samples (int, optional): 백분위수를 계산하기 위한 최소 표본 수.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW, min_samples=DEFAULT_MIN_SAMPLES):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        """지연 시간(초)을 기록합니다."""
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, fraction):
+        """지연 시간의 백분위수(초)를 반환합니다. 표본이 min_samples보다 적으면 None을 반환합니다."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+        return ordered[index]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._samples)
+
+
+class Hedger:
+    """
+    지연 시간이 긴 요청에 두 번째 요청(hedged request)을 보내 먼저 끝난 결과를 사용하는 객체.
+
+    첫 요청이 최근 지연 시간의 백분위수(기본 p95)를 넘도록 끝나지 않으면 같은 요청을 한 번 더 보내고,
+    먼저 성공한 결과를 반환합니다. 늦게 끝난 요청의 결과는 버립니다.
+    요청은 공유 스레드 풀에서 실행되므로 멱등인 요청에만 사용해야 합니다.
+
+    Args:
+        upstream (str): 외부 API 이름 ('weather' 또는 'openai').
+        percentile (float, optional): 두 번째 요청을 보낼 기준 백분위수.
+        window (int, optional): 기준을 계산할 최근 요청 수.
+        min_samples (int, optional): 기준을 계산하기 위한 최소 표본 수.
+        min_delay (float, optional): 두 번째 요청을 보내기 전 최소 대기 시간(초).
+        executor (concurrent.futures.Executor, optional): 요청을 실행할 풀. 없으면 공유 풀을 사용합니다.
+    """
+
+    def __init__(self, upstream, percentile=DEFAULT_PERCENTILE, window=DEFAULT_WINDOW,
+                 min_samples=DEFAULT_MIN_SAMPLES, min_delay=DEFAULT_MIN_DELAY, executor=None):
+        self.upstream = upstream
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.latencies = LatencyTracker(window=window, min_samples=min_samples)
+        self._executor = executor
+        self._lock = threading.Lock()
+        self._counts = {OUTCOME_SINGLE: 0, OUTCOME_PRIMARY: 0, OUTCOME_HEDGE: 0}
+
+    def threshold(self):
+        """두 번째 요청을 보낼 대기 시간(초)을 반환합니다. 표본이 부족하면 None을 반환합니다."""
+        latency = self.latencies.percentile(self.percentile)
+        return None if latency is None else max(self.min_delay, latency)
+
+    def _submit(self, fn):
+        def timed():
+            started = time.perf_counter()
+            result = fn()
+            self.latencies.record(time.perf_counter() - started)
+            return result
+
+        # 지표의 현재 단계(span)가 요청 스레드에서도 이어지도록 컨텍스트를 복사
+        context = contextvars.copy_context()
+        return (self._executor or _get_executor()).submit(context.run, timed)
+
+    def _record(self, outcome):
+        with self._lock:
+            self._counts[outcome] += 1
+        metrics.record_hedge(self.upstream, outcome)
+
+    def call(self, fn, deadline=None, stage=None):
+        """
+        fn()을 실행하고 결과를 반환합니다. 첫 요청이 늦으면 fn()을 한 번 더 실행하여 먼저 성공한 결과를 사용합니다.
+
+        Args:
+            fn (callable): 인자 없이 호출하는 요청 함수.
+            deadline (Deadline, optional): 턴의 제한 시간. 남은 시간 안에 끝나지 않으면 기다리지 않습니다.
+            stage (str, optional): 제한 시간 초과 시 DeadlineExceeded에 담을 단계 이름. 기본값은 upstream.
+
+        Returns:
+            먼저 성공한 fn()의 결과.
+
+        Raises:
+            DeadlineExceeded: 제한 시간 안에 어느 요청도 끝나지 않은 경우.
+            Exception: 모든 요청이 실패한 경우 마지막 예외.
+        """
+        from concurrent.futures import FIRST_COMPLETED, wait
+
+        threshold = self.threshold()
+        if threshold is None and deadline is None:
+            # 기준을 계산할 표본이 모일 때까지는 호출 스레드에서 바로 실행
+            started = time.perf_counter()
+            result = fn()
+            self.latencies.record(time.perf_counter() - started)
+            self._record(OUTCOME_SINGLE)
+            return result
+
+        primary = self._submit(fn)
+        pending = {primary}
+        hedged = False
+        wait_time = threshold
+        if deadline is not None:
+            wait_time = deadline.timeout(threshold)
+        done, _ = wait(pending, timeout=wait_time)
+        if not done and threshold is not None and (deadline is None or not deadline.expired()):
+            hedged = True
+            pending.add(self._submit(fn))
+
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=None if deadline is None else deadline.remaining(),
+                                 return_when=FIRST_COMPLETED)
+            if not done:
+                raise exceeded(stage or self.upstream)
+            for future in done:
+                if future.exception() is None:
+                    if not hedged:
+                        self._record(OUTCOME_SINGLE)
+                    else:
+                        self._record(OUTCOME_PRIMARY if future is primary else OUTCOME_HEDGE)
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def stats(self):
+        """
+        결과별 요청 수와 현재 기준을 반환합니다.
+
+        Returns:
+            dict: single, primary, hedge, threshold, samples 키를 포함하는 딕셔너리.
+        """
+        with self._lock:
+            counts = dict(self._counts)
+        return {**counts, 'threshold': self.threshold(), 'samples': len(self.latencies)}
+
+
+_hedgers = {}
+_hedgers_lock = threading.Lock()
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _hedgers_lock:
+            if _executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+
+                _executor = ThreadPoolExecutor(max_workers=HEDGE_MAX_WORKERS, thread_name_prefix="hedge")
+    return _executor
+
+
+def configure_hedging(upstream, enabled=True, percentile=DEFAULT_PERCENTILE, window=DEFAULT_WINDOW,
+                      min_samples=DEFAULT_MIN_SAMPLES, min_delay=DEFAULT_MIN_DELAY):
+    """
+    외부 API의 hedged request를 켜거나 끕니다. 기존 지연 시간 표본과 통계는 초기화됩니다.
+
+    Args:
+        upstream (str): 외부 API 이름 ('weather' 또는 'openai').
+        enabled (bool, optional): False이면 끕니다. 기본값은 True.
+        percentile (float, optional): 두 번째 요청을 보낼 기준 백분위수. 기본값은 0.95.
+        window (int, optional): 기준을 계산할 최근 요청 수.
+        min_samples (int, optional): 기준을 계산하기 위한 최소 표본 수.
+        min_delay (float, optional): 두 번째 요청을 보내기 전 최소 대기 시간(초).
+
+    Returns:
+        Hedger: 설정된 Hedger. 끈 경우 None.
+    """
+    with _hedgers_lock:
+        if not enabled:
+            _hedgers.pop(upstream, None)
+            return None
+        hedger = _hedgers[upstream] = Hedger(upstream, percentile=percentile, window=window,
+                                            min_samples=min_samples, min_delay=min_delay)
+        return hedger
+
+
+def get_hedger(upstream):
+    """외부 API의 Hedger를 반환합니다. hedged request를 사용하지 않으면 None을 반환합니다."""
+    return _hedgers.get(upstream)
+
+
+def call(upstream, fn, deadline=None, stage=None):
+    """
+    외부 API 요청 fn()을 실행합니다. hedged request를 켠 외부 API이면 Hedger.call()로 실행합니다.
+
+    Args:
+        upstream (str): 외부 API 이름.
+        fn (callable): 인자 없이 호출하는 요청 함수.
+        deadline (Deadline, optional): 턴의 제한 시간.
+        stage (str, optional): 제한 시간 초과 시 DeadlineExceeded에 담을 단계 이름.
+    """
+    hedger = _hedgers.get(upstream)
+    if hedger is None:
+        return fn()
+    return hedger.call(fn, deadline=deadline, stage=stage)
+
+
+def reset_hedging():
+    """모든 외부 API의 hedged request를 끕니다."""
+    with _hedgers_lock:
+        _hedgers.clear()
+
+
+def get_hedging_stats():
+    """외부 API별 hedged request 통계를 반환합니다."""
+    return {upstream: hedger.stats() for upstream, hedger in list(_hedgers.items())}
@@ -0,0 +1,188 @@
+import sys
+from collections import deque
+
+# 대화 기록에 사용할 기본 토큰 예산
+DEFAULT_TOKEN_BUDGET = 1500
+# 메시지 하나당 역할/구분자에 쓰이는 토큰 수
+MESSAGE_OVERHEAD_TOKENS = 4
+# 요약하지 못한 채 다음 요약을 기다리는 최대 턴 수. 넘으면 가장 오래된 턴부터 버립니다.
+MAX_UNSUMMARIZED_TURNS = 20
+
+
+def estimate_tokens(text):
+    """
+    문자열의 토큰 수를 대략적으로 추정합니다.
+
+    영문/숫자는 약 4자당 1토큰, 한글 등 비ASCII 문자는 1자당 약 1토큰으로 계산합니다.
+
+    Args:
+        text (str): 토큰 수를 추정할 문자열.
+
+    Returns:
+        int: 추정 토큰 수.
+    """
+    if not text:
+        return 0
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+def turn_tokens(entry):
+    """대화 한 턴(Turn 또는 {"user": ..., "bot": ...})의 추정 토큰 수를 반환합니다."""
+    return (estimate_tokens(entry["user"]) + estimate_tokens(entry["bot"])
+            + 2 * MESSAGE_OVERHEAD_TOKENS)
+
+
+class Turn:
+    """
+    대화 한 턴의 기록.
+
+    __slots__로 인스턴스 딕셔너리 없이 저장하고, 토큰 수를 생성 시 한 번만 계산합니다.
+    기존 딕셔너리 형식과 같이 turn["user"], turn["bot"]으로도 읽을 수 있습니다.
+
+    Args:
+        user (str): 사용자 메시지.
+        bot (str): 챗봇 응답. None이면 빈 문자열로 저장합니다.
+    """
+
+    __slots__ = ('user', 'bot', 'tokens')
+
+    def __init__(self, user, bot):
+        self.user = user
+        self.bot = bot or ""
+        self.tokens = (estimate_tokens(self.user) + estimate_tokens(self.bot)
+                       + 2 * MESSAGE_OVERHEAD_TOKENS)
+
+    def __getitem__(self, key):
+        if key == "user":
+            return self.user
+        if key == "bot":
+            return self.bot
+        raise KeyError(key)
+
+    def nbytes(self):
+        """이 턴이 차지하는 대략적인 메모리(바이트)를 반환합니다."""
+        return sys.getsizeof(self) + sys.getsizeof(self.user) + sys.getsizeof(self.bot)
+
+    def __repr__(self):
+        return f"Turn(user={self.user!r}, bot={self.bot!r})"
+
+
+class ConversationHistory:
+    """
+    토큰 예산 안에서 최근 대화만 유지하고, 오래된 대화는 요약으로 접어 두는 대화 기록.
+
+    새 턴을 추가해 예산을 넘으면 가장 오래된 턴부터 꺼내어
+    기존 요약과 꺼낸 턴만으로 요약을 갱신합니다. (전체 대화를 다시 요약하지 않음)
+
+    Args:
+        token_budget (int, optional): 요약과 최근 대화에 사용할 최대 토큰 수.
+        summarizer (callable, optional): summarizer(summary, turns)로 호출되어 갱신된 요약 문자열을 반환하는 함수.
+            None을 반환하면(예: 요청 한도 초과) 꺼낸 턴을 보관했다가 다음 요약 때 함께 전달합니다.
+            (최대 MAX_UNSUMMARIZED_TURNS개) 지정하지 않으면 꺼낸 턴은 버려집니다.
+        min_recent_turns (int, optional): 예산을 넘더라도 유지할 최근 턴 수. 기본값은 1.
+        max_turns (int, optional): 유지할 최대 턴 수. 넘으면 예산과 관계없이 오래된 턴부터 요약으로 접습니다.
+    """
+
+    def __init__(self, token_budget=DEFAULT_TOKEN_BUDGET, summarizer=None, min_recent_turns=1, max_turns=None):
+        self.token_budget = token_budget
+        self.summarizer = summarizer
+        self.min_recent_turns = min_recent_turns
+        self.max_turns = max_turns
+        self.summary = ""
+        self._turns = deque()
+        self._turn_tokens = 0
+        # 꺼냈지만 요약에 반영하지 못한 턴
+        self._unsummarized = deque(maxlen=MAX_UNSUMMARIZED_TURNS)
+
+    def add_turn(self, user, bot):
+        """대화 한 턴을 추가하고, 예산이나 최대 턴 수를 넘으면 오래된 턴을 요약으로 접습니다."""
+        turn = Turn(user, bot)
+        self._turns.append(turn)
+        self._turn_tokens += turn.tokens
+        self._compact()
+        return turn
+
+    def _over_limit(self):
+        if len(self._turns) <= self.min_recent_turns:
+            return False
+        if self.max_turns is not None and len(self._turns) > self.max_turns:
+            return True
+        return self.total_tokens() > self.token_budget
+
+    def _compact(self):
+        evicted = []
+        while self._over_limit():
+            entry = self._turns.popleft()
+            self._turn_tokens -= entry.tokens
+            evicted.append(entry)
+
+        if evicted and self.summarizer is not None:
+            # 이전에 요약하지 못한 턴도 함께 요약
+            turns = list(self._unsummarized) + evicted
+            summary = self.summarizer(self.summary, turns)
+            if summary:
+                self.summary = summary
+                self._unsummarized.clear()
+            else:
+                self._unsummarized.extend(evicted)
+
+    def total_tokens(self):
+        """요약과 최근 대화의 추정 토큰 수 합계를 반환합니다."""
+        summary_tokens = estimate_tokens(self.summary) + MESSAGE_OVERHEAD_TOKENS if self.summary else 0
+        return summary_tokens + self._turn_tokens
+
+    def to_messages(self):
+        """요약과 최근 대화를 OpenAI 메시지 목록으로 반환합니다."""
+        messages = []
+        if self.summary:
+            messages.append({"role": "system", "content": f"이전 대화 요약:\n{self.summary}"})
+        for entry in self._turns:
+            messages.append({"role": "user", "content": entry["user"]})
+            messages.append({"role": "assistant", "content": entry["bot"]})
+        return messages
+
+    def clear(self):
+        """요약과 대화를 모두 지웁니다."""
+        self.summary = ""
+        self._turns.clear()
+        self._turn_tokens = 0
+        self._unsummarized.clear()
+
+    def __iter__(self):
+        return iter(self._turns)
+
+    def __len__(self):
+        return len(self._turns)
+
+
+def history_messages(conversation_history, token_budget=DEFAULT_TOKEN_BUDGET):
+    """
+    대화 기록을 OpenAI 메시지 목록으로 변환합니다.
+
+    ConversationHistory는 요약과 최근 대화를 그대로 사용하고,
+    일반 리스트는 토큰 예산 안에 들어가는 최근 턴만 사용합니다.
+
+    Args:
+        conversation_history (ConversationHistory or list): 이전 대화 기록.
+        token_budget (int, optional): 리스트일 때 사용할 최대 토큰 수.
+
+    Returns:
+        list: 메시지 리스트.
+    """
+    if hasattr(conversation_history, "to_messages"):
+        return conversation_history.to_messages()
+
+    recent = []
+    used = 0
+    for entry in reversed(conversation_history):
+        used += turn_tokens(entry)
+        if used > token_budget and recent:
+            break
+        recent.append(entry)
+
+    messages = []
+    for entry in reversed(recent):
+        messages.append({"role": "user", "content": entry["user"]})
+        messages.append({"role": "assistant", "content": entry["bot"]})
+    return messages
@@ -0,0 +1,639 @@
+import contextvars
+import functools
+import threading
+import time
+
+# 단계별 소요 시간 히스토그램의 기본 구간(초)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 코루틴 함수의 코드 플래그 (inspect.CO_COROUTINE). inspect는 임포트 비용이 커서 직접 확인합니다.
+_CO_COROUTINE = 0x80
+
+OUTCOME_OK = "ok"
+OUTCOME_ERROR = "error"
+
+CACHE_HIT = "hit"
+CACHE_MISS = "miss"
+
+
+def _escape(value):
+    """Prometheus 레이블 값의 특수 문자를 이스케이프합니다."""
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Counter:
+    """
+    레이블별로 누적되는 카운터.
+
+    Args:
+        name (str): 지표 이름.
+        documentation (str): 지표 설명 (Prometheus HELP).
+        labelnames (tuple, optional): 레이블 이름 목록.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        try:
+            return tuple(str(labels[name]) for name in self.labelnames)
+        except KeyError as err:
+            raise ValueError(f"'{self.name}' 지표에 레이블 {err}가 필요합니다.")
+
+    def inc(self, amount=1, **labels):
+        """레이블에 해당하는 값을 amount만큼 증가시킵니다."""
+        if amount < 0:
+            raise ValueError("카운터는 감소할 수 없습니다.")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        """레이블에 해당하는 현재 값을 반환합니다."""
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        """(이름, 레이블 문자열, 값) 목록을 반환합니다."""
+        with self._lock:
+            items = sorted(self._values.items())
+        return [(self.name, _format_labels(self.labelnames, key), value) for key, value in items]
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram:
+    """
+    레이블별로 관측값의 분포를 구간(bucket)으로 기록하는 히스토그램.
+
+    Args:
+        name (str): 지표 이름.
+        documentation (str): 지표 설명 (Prometheus HELP).
+        labelnames (tuple, optional): 레이블 이름 목록.
+        buckets (tuple, optional): 오름차순 구간 상한 목록. 기본값은 DEFAULT_BUCKETS.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    _key = Counter._key
+
+    def observe(self, value, **labels):
+        """관측값을 기록합니다."""
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # [구간별 개수..., +Inf 개수], 합계
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            counts = entry[0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[-1] += 1
+            entry[1] += value
+
+    def count(self, **labels):
+        """레이블에 해당하는 관측 횟수를 반환합니다."""
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return sum(entry[0]) if entry else 0
+
+    def sum(self, **labels):
+        """레이블에 해당하는 관측값의 합계를 반환합니다."""
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return entry[1] if entry else 0.0
+
+    def samples(self):
+        """(이름, 레이블 문자열, 값) 목록을 누적 구간 형식으로 반환합니다."""
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        samples = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, (("le", _format_value(float(bound))),))
+                samples.append((f"{self.name}_bucket", labels, cumulative))
+            labels = _format_labels(self.labelnames, key)
+            samples.append((f"{self.name}_sum", labels, total))
+            samples.append((f"{self.name}_count", labels, cumulative))
+        return samples
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class MetricsRegistry:
+    """프로세스 내 지표를 모아 Prometheus 텍스트 형식으로 내보내는 레지스트리."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"'{name}' 지표가 다른 형식으로 이미 등록되어 있습니다.")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        """카운터를 등록하거나 이미 등록된 카운터를 반환합니다."""
+        return self._register(Counter, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        """히스토그램을 등록하거나 이미 등록된 히스토그램을 반환합니다."""
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name):
+        """이름으로 지표를 찾습니다. 없으면 None을 반환합니다."""
+        with self._lock:
+            return self._metrics.get(name)
+
+    def clear(self):
+        """등록된 지표는 유지하고 기록된 값만 초기화합니다."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.clear()
+
+    def export_prometheus(self):
+        """
+        모든 지표를 Prometheus 텍스트 형식(0.0.4)으로 반환합니다.
+
+        Returns:
+            str: /metrics 응답 본문으로 사용할 수 있는 문자열.
+        """
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+class Span:
+    """
+    계측된 단계 한 번의 실행 정보. 추적 콜백에 전달됩니다.
+
+    Attributes:
+        name (str): 단계 이름 (예: 'extract', 'forecast', 'llm').
+        attributes (dict): 단계 실행 중 기록된 속성 (예: cache, http_status, prompt_tokens).
+        started_at (float): 시작 시각 (time.perf_counter 기준).
+        duration (float): 소요 시간(초). 실행 중에는 None.
+        error (Exception): 단계에서 발생한 예외. 없으면 None.
+    """
+
+    __slots__ = ('name', 'attributes', 'started_at', 'duration', 'error', '_parent', '_token')
+
+    def __init__(self, name, attributes=None):
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.started_at = time.perf_counter()
+        self.duration = None
+        self.error = None
+        self._parent = None
+        self._token = None
+
+    def set(self, key, value):
+        """속성을 기록합니다."""
+        self.attributes[key] = value
+
+    @property
+    def outcome(self):
+        return OUTCOME_OK if self.error is None else OUTCOME_ERROR
+
+
+class _NoopSpan:
+    """계측이 꺼져 있을 때 사용하는, 아무 것도 기록하지 않는 Span."""
+
+    __slots__ = ()
+
+    def set(self, key, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+_registry = MetricsRegistry()
+_enabled = False
+_tracers = ()
+# 지표 또는 추적 콜백 중 하나라도 켜져 있으면 True. 꺼져 있으면 계측 지점은 이 값만 확인합니다.
+_active = False
+# 현재 실행 중인 단계. 스레드와 asyncio 태스크마다 따로 유지됩니다.
+_current_span = contextvars.ContextVar('chatweather_current_span', default=None)
+
+STAGE_DURATION = "chatweather_stage_duration_seconds"
+LLM_TOKENS = "chatweather_llm_tokens_total"
+HTTP_RESPONSES = "chatweather_http_responses_total"
+CACHE_REQUESTS = "chatweather_cache_requests_total"
+RATE_LIMIT_REQUESTS = "chatweather_rate_limit_requests_total"
+RESPONSE_MODES = "chatweather_weather_responses_total"
+DEADLINE_EXCEEDED = "chatweather_deadline_exceeded_total"
+HEDGED_REQUESTS = "chatweather_hedged_requests_total"
+SPECULATIONS = "chatweather_speculative_fetches_total"
+SPECULATION_SAVED = "chatweather_speculation_saved_seconds"
+LLM_TIME_TO_FIRST_TOKEN = "chatweather_llm_time_to_first_token_seconds"
+
+
+def _register_default_metrics(registry):
+    registry.histogram(STAGE_DURATION, "단계별 소요 시간(초)", ("stage", "outcome"))
+    registry.counter(LLM_TOKENS, "OpenAI 응답의 usage로 집계한 토큰 수", ("type",))
+    registry.counter(HTTP_RESPONSES, "외부 API의 HTTP 응답 상태 코드별 횟수", ("upstream", "status"))
+    registry.counter(CACHE_REQUESTS, "캐시 조회 결과별 횟수", ("cache", "outcome"))
+    registry.counter(RATE_LIMIT_REQUESTS, "클라이언트 요청 한도 확인 결과별 횟수", ("upstream", "outcome"))
+    registry.counter(RESPONSE_MODES, "날씨 답변 생성 방식별 횟수", ("mode",))
+    registry.counter(DEADLINE_EXCEEDED, "턴의 제한 시간을 넘은 단계별 횟수", ("stage",))
+    registry.counter(HEDGED_REQUESTS, "hedged request 결과별 횟수", ("upstream", "outcome"))
+    registry.counter(SPECULATIONS, "추출과 동시에 시작한 날씨 요청의 추측 적중/실패 횟수", ("outcome",))
+    registry.histogram(SPECULATION_SAVED, "추측이 맞은 턴에서 추출과 겹쳐 줄인 날씨 조회 시간(초)")
+    registry.histogram(LLM_TIME_TO_FIRST_TOKEN, "스트리밍 응답에서 OpenAI 요청부터 첫 내용 조각까지 걸린 시간(초)")
+
+
+_register_default_metrics(_registry)
+
+
+def _update_active():
+    global _active
+    _active = _enabled or bool(_tracers)
+
+
+def get_registry():
+    """기본 지표 레지스트리를 반환합니다."""
+    return _registry
+
+
+def enable_metrics(registry=None):
+    """
+    지표 기록을 켭니다.
+
+    Args:
+        registry (MetricsRegistry, optional): 사용할 레지스트리. 없으면 기존 기본 레지스트리를 사용합니다.
+    """
+    global _enabled, _registry
+    if registry is not None:
+        _register_default_metrics(registry)
+        _registry = registry
+    _enabled = True
+    _update_active()
+
+
+def disable_metrics():
+    """지표 기록을 끕니다. 이미 기록된 값은 유지됩니다."""
+    global _enabled
+    _enabled = False
+    _update_active()
+
+
+def metrics_enabled():
+    """지표 기록이 켜져 있는지 반환합니다."""
+    return _enabled
+
+
+def export_prometheus():
+    """기본 레지스트리의 지표를 Prometheus 텍스트 형식으로 반환합니다."""
+    return _registry.export_prometheus()
+
+
+def add_tracer(callback):
+    """
+    추적 콜백을 등록합니다.
+
+    콜백은 계측된 단계가 끝날 때마다 callback(span)으로 호출됩니다.
+    span.name, span.duration, span.attributes, span.error와 부모 단계(parent_of(span))를 사용할 수 있습니다.
+    콜백에서 발생한 예외는 출력만 하고 무시합니다.
+
+    Args:
+        callback (callable): Span 하나를 인자로 받는 함수.
+    """
+    global _tracers
+    _tracers = _tracers + (callback,)
+    _update_active()
+
+
+def remove_tracer(callback):
+    """등록된 추적 콜백을 제거합니다."""
+    global _tracers
+    _tracers = tuple(tracer for tracer in _tracers if tracer is not callback)
+    _update_active()
+
+
+def parent_of(span):
+    """같은 스레드 또는 asyncio 태스크에서 span을 감싸는 부모 단계를 반환합니다. 없으면 None을 반환합니다."""
+    return span._parent
+
+
+def current_span():
+    """현재 실행 중인 단계의 Span을 반환합니다. 계측이 꺼져 있거나 단계 밖이면 None을 반환합니다."""
+    if not _active:
+        return None
+    return _current_span.get()
+
+
+def set_attribute(key, value):
+    """현재 실행 중인 단계에 속성을 기록합니다. 계측이 꺼져 있으면 아무 것도 하지 않습니다."""
+    if _active:
+        span = _current_span.get()
+        if span is not None:
+            span.attributes[key] = value
+
+
+def _start(name, attributes):
+    span = Span(name, attributes)
+    span._parent = _current_span.get()
+    span._token = _current_span.set(span)
+    return span
+
+
+def _finish(span, error=None):
+    span.duration = time.perf_counter() - span.started_at
+    span.error = error
+    try:
+        _current_span.reset(span._token)
+    except ValueError:
+        # 시작한 컨텍스트와 다른 컨텍스트에서 끝난 경우
+        _current_span.set(span._parent)
+    span._token = None
+
+    if _enabled:
+        _registry.get(STAGE_DURATION).observe(span.duration, stage=span.name, outcome=span.outcome)
+    for tracer in _tracers:
+        try:
+            tracer(span)
+        except Exception as err:
+            print(f"추적 콜백 실행 중 오류 발생: {err}")
+
+
+class _SpanContext:
+    __slots__ = ('name', 'attributes', 'span')
+
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = attributes
+        self.span = None
+
+    def __enter__(self):
+        self.span = _start(self.name, self.attributes)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        _finish(self.span, exc)
+        return False
+
+
+def span(name, **attributes):
+    """
+    코드 블록의 소요 시간을 측정하는 컨텍스트 매니저를 반환합니다.
+
+    계측이 꺼져 있으면 아무 것도 기록하지 않는 공유 객체를 반환합니다.
+
+    사용 예:
+        with metrics.span('forecast', city=city) as s:
+            ...
+            s.set('cache', 'hit')
+    """
+    if not _active:
+        return _NOOP_SPAN
+    return _SpanContext(name, attributes)
+
+
+def timed(name):
+    """
+    함수 실행 시간을 name 단계로 측정하는 데코레이터. 코루틴 함수도 지원합니다.
+
+    계측이 꺼져 있으면 원래 함수를 바로 호출하므로 추가 비용은 전역 변수 확인 한 번입니다.
+    """
+    def decorator(func):
+        code = getattr(func, '__code__', None)
+        if code is not None and code.co_flags & _CO_COROUTINE:
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not _active:
+                    return await func(*args, **kwargs)
+                span = _start(name, None)
+                try:
+                    result = await func(*args, **kwargs)
+                except BaseException as err:
+                    _finish(span, err)
+                    raise
+                _finish(span)
+                return result
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _active:
+                return func(*args, **kwargs)
+            span = _start(name, None)
+            try:
+                result = func(*args, **kwargs)
+            except BaseException as err:
+                _finish(span, err)
+                raise
+            _finish(span)
+            return result
+        return wrapper
+    return decorator
+
+
+def record_cache(cache, hit):
+    """
+    캐시 조회 결과를 기록합니다.
+
+    Args:
+        cache (str): 캐시 이름 (예: 'forecast', 'current', 'extraction', 'fastpath', 'answer').
+        hit (bool): 적중 여부.
+    """
+    if not _active:
+        return
+    outcome = CACHE_HIT if hit else CACHE_MISS
+    if _enabled:
+        _registry.get(CACHE_REQUESTS).inc(cache=cache, outcome=outcome)
+    set_attribute(f"{cache}_cache", outcome)
+
+
+def record_http_status(upstream, status_code):
+    """
+    외부 API의 HTTP 응답 상태 코드를 기록합니다.
+
+    Args:
+        upstream (str): 외부 API 이름 ('weather' 또는 'openai').
+        status_code (int): HTTP 상태 코드.
+    """
+    if not _active:
+        return
+    if _enabled:
+        _registry.get(HTTP_RESPONSES).inc(upstream=upstream, status=status_code)
+    set_attribute(f"{upstream}_http_status", status_code)
+
+
+def _usage_field(usage, field):
+    return usage.get(field) if isinstance(usage, dict) else getattr(usage, field, None)
+
+
+def record_usage(usage):
+    """
+    OpenAI 응답의 usage(prompt_tokens, completion_tokens)와
+    프롬프트 캐시에서 재사용된 입력 토큰 수(prompt_tokens_details.cached_tokens)를 기록합니다.
+
+    Args:
+        usage: OpenAI 응답의 usage 객체 또는 딕셔너리. None이면 무시합니다.
+    """
+    if not _active or usage is None:
+        return
+    details = _usage_field(usage, "prompt_tokens_details")
+    values = {
+        "prompt": _usage_field(usage, "prompt_tokens"),
+        "completion": _usage_field(usage, "completion_tokens"),
+        "cached": _usage_field(details, "cached_tokens") if details is not None else None,
+    }
+    for token_type, value in values.items():
+        if not isinstance(value, int):
+            continue
+        if _enabled:
+            _registry.get(LLM_TOKENS).inc(value, type=token_type)
+        set_attribute(f"{token_type}_tokens", value)
+
+
+def record_rate_limit(upstream, outcome, wait=0.0):
+    """
+    클라이언트 요청 한도 확인 결과를 기록합니다.
+
+    Args:
+        upstream (str): 외부 API 이름 ('weather' 또는 'openai').
+        outcome (str): 'immediate'(바로 통과), 'queued'(기다린 뒤 통과), 'throttled'(최대 대기 시간 초과).
+        wait (float, optional): 기다린 시간(초).
+    """
+    if not _active:
+        return
+    if _enabled:
+        _registry.get(RATE_LIMIT_REQUESTS).inc(upstream=upstream, outcome=outcome)
+    set_attribute(f"{upstream}_rate_limit", outcome)
+    if wait:
+        set_attribute(f"{upstream}_rate_limit_wait", round(wait, 6))
+
+
+def record_response_mode(mode):
+    """
+    날씨 답변 생성 방식을 기록합니다.
+
+    Args:
+        mode (str): 'fast'(템플릿) 또는 'rich'(LLM).
+    """
+    if not _active:
+        return
+    if _enabled:
+        _registry.get(RESPONSE_MODES).inc(mode=mode)
+    set_attribute("response_mode", mode)
+
+
+def record_deadline_exceeded(stage):
+    """
+    턴의 제한 시간 초과를 기록합니다.
+
+    Args:
+        stage (str): 제한 시간을 넘은 단계 ('extract', 'weather', 'llm').
+    """
+    if not _active:
+        return
+    if _enabled:
+        _registry.get(DEADLINE_EXCEEDED).inc(stage=stage)
+    set_attribute("deadline_exceeded", stage)
+
+
+def record_hedge(upstream, outcome):
+    """
+    hedged request 결과를 기록합니다.
+
+    Args:
+        upstream (str): 외부 API 이름 ('weather' 또는 'openai').
+        outcome (str): 'single'(두 번째 요청 없음), 'primary'(첫 요청이 먼저 끝남), 'hedge'(두 번째 요청이 먼저 끝남).
+    """
+    if not _active:
+        return
+    if _enabled:
+        _registry.get(HEDGED_REQUESTS).inc(upstream=upstream, outcome=outcome)
+    set_attribute(f"{upstream}_hedge", outcome)
+
+
+def record_speculation(outcome, saved=0.0):
+    """
+    추측한 날씨 요청의 결과를 기록합니다.
+
+    Args:
+        outcome (str): 'hit'(추출한 도시와 같음) 또는 'miss'(다름).
+        saved (float, optional): 추측이 맞은 경우 추출과 겹쳐 줄인 시간(초).
+    """
+    if not _active:
+        return
+    if _enabled:
+        _registry.get(SPECULATIONS).inc(outcome=outcome)
+        if outcome == "hit":
+            _registry.get(SPECULATION_SAVED).observe(saved)
+    set_attribute("speculation", outcome)
+    if saved:
+        set_attribute("speculation_saved", round(saved, 6))
+
+
+def record_llm_stream(duration, time_to_first_token=None, failed=False):
+    """
+    스트리밍 OpenAI 호출을 기록합니다.
+
+    스트리밍 응답은 반복이 끝나야 소요 시간을 알 수 있어 timed('llm')로 감쌀 수 없으므로,
+    반복이 끝날 때 같은 단계 지표(stage='llm')에 기록합니다.
+
+    Args:
+        duration (float): 요청부터 마지막 조각까지(또는 중단될 때까지) 걸린 시간(초).
+        time_to_first_token (float, optional): 요청부터 첫 내용 조각까지 걸린 시간(초). 조각이 없으면 None.
+        failed (bool, optional): 오류로 끝났는지 여부.
+    """
+    if not _enabled:
+        return
+    _registry.get(STAGE_DURATION).observe(duration, stage="llm", outcome=OUTCOME_ERROR if failed else OUTCOME_OK)
+    if time_to_first_token is not None:
+        _registry.get(LLM_TIME_TO_FIRST_TOKEN).observe(time_to_first_token)
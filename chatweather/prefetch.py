@@ -0,0 +1,279 @@
+import atexit
+import heapq
+import threading
+import time
+from collections import deque
+
+from chatweather import metrics, weather
+
+# 요청 빈도가 절반으로 줄어드는 시간(초)
+DEFAULT_HALF_LIFE = 60 * 60
+# 미리 갱신할 상위 도시 수
+DEFAULT_TOP_N = 10
+# 분당 최대 갱신 요청 수 (OpenWeatherMap 무료 요금제 제한은 분당 60회)
+DEFAULT_REFRESH_BUDGET = 30
+# 만료 몇 초 전부터 갱신할지
+DEFAULT_LEAD_TIME = 60
+# 갱신 대상을 확인하는 간격(초)
+DEFAULT_INTERVAL = 5.0
+# 집계하는 최대 도시 수. 넘으면 빈도가 낮은 도시부터 버립니다.
+DEFAULT_MAX_KEYS = 1024
+
+_BUDGET_WINDOW = 60.0
+# 가중치가 이 값을 넘으면 모든 점수를 다시 정규화합니다. (부동소수점 범위 초과 방지)
+_RESCALE_THRESHOLD = 2.0 ** 64
+
+
+class DecayedCounter:
+    """
+    시간이 지날수록 지수적으로 줄어드는 빈도 카운터.
+
+    모든 점수를 매번 줄이는 대신, 새 요청에 시간에 따라 커지는 가중치를 곱해 더하므로
+    add()와 점수 비교가 항목 수와 관계없이 O(1)입니다.
+
+    Args:
+        half_life (float, optional): 점수가 절반으로 줄어드는 시간(초).
+        max_keys (int, optional): 유지하는 최대 키 수.
+        clock (callable, optional): 현재 시각(초)을 반환하는 함수. 기본값은 time.time.
+    """
+
+    def __init__(self, half_life=DEFAULT_HALF_LIFE, max_keys=DEFAULT_MAX_KEYS, clock=time.time):
+        if half_life <= 0:
+            raise ValueError("half_life는 0보다 커야 합니다.")
+        self.half_life = half_life
+        self.max_keys = max_keys
+        self._clock = clock
+        self._origin = clock()
+        self._scores = {}
+        self._lock = threading.Lock()
+
+    def _weight(self, now):
+        return 2.0 ** ((now - self._origin) / self.half_life)
+
+    def add(self, key, amount=1.0):
+        """키의 빈도를 amount만큼 늘립니다."""
+        now = self._clock()
+        with self._lock:
+            weight = self._weight(now)
+            if weight > _RESCALE_THRESHOLD:
+                self._scores = {k: score / weight for k, score in self._scores.items()}
+                self._origin = now
+                weight = 1.0
+            self._scores[key] = self._scores.get(key, 0.0) + amount * weight
+            if len(self._scores) > self.max_keys:
+                # 빈도가 높은 3/4만 남김 (매 요청마다 정렬하지 않도록 여유를 둠)
+                keep = heapq.nlargest(self.max_keys * 3 // 4, self._scores.items(), key=lambda item: item[1])
+                self._scores = dict(keep)
+
+    def score(self, key):
+        """키의 현재 (감쇠된) 빈도를 반환합니다."""
+        now = self._clock()
+        with self._lock:
+            return self._scores.get(key, 0.0) / self._weight(now)
+
+    def top(self, n):
+        """
+        빈도가 높은 키 n개를 반환합니다.
+
+        Returns:
+            list: (key, 현재 빈도) 튜플의 리스트. 빈도가 높은 순서입니다.
+        """
+        now = self._clock()
+        with self._lock:
+            weight = self._weight(now)
+            return [(key, score / weight)
+                    for key, score in heapq.nlargest(n, self._scores.items(), key=lambda item: item[1])]
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._scores
+
+    def __len__(self):
+        with self._lock:
+            return len(self._scores)
+
+
+class PrefetchScheduler:
+    """
+    자주 요청되는 도시의 현재 날씨와 예보를 만료 전에 미리 갱신하는 백그라운드 스케줄러.
+
+    start()하면 weather.forecast() 호출을 DecayedCounter로 집계하고,
+    interval초마다 빈도 상위 top_n개 도시의 캐시 만료 시각을 확인하여 갱신합니다.
+
+    - 현재 날씨: 만료 lead_time초 전부터 갱신합니다.
+    - 예보: 예보 갱신 시각(3시간 경계) 전에 다시 받아도 같은 데이터이므로, 경계가 지나 만료된 뒤 갱신합니다.
+
+    갱신 요청은 최근 60초 동안 refresh_budget개를 넘지 않으며,
+    사용자 요청과 같은 SingleFlight를 사용하므로 동시에 들어온 사용자 요청과 합쳐집니다.
+
+    Args:
+        top_n (int, optional): 갱신할 상위 도시 수.
+        refresh_budget (int, optional): 분당 최대 갱신 요청 수.
+        lead_time (float, optional): 만료 몇 초 전부터 갱신할지.
+        interval (float, optional): 갱신 대상을 확인하는 간격(초).
+        half_life (float, optional): 요청 빈도가 절반으로 줄어드는 시간(초).
+        clock (callable, optional): 현재 시각(초)을 반환하는 함수. 기본값은 time.time.
+    """
+
+    def __init__(self, top_n=DEFAULT_TOP_N, refresh_budget=DEFAULT_REFRESH_BUDGET, lead_time=DEFAULT_LEAD_TIME,
+                 interval=DEFAULT_INTERVAL, half_life=DEFAULT_HALF_LIFE, clock=time.time):
+        self.top_n = top_n
+        self.refresh_budget = refresh_budget
+        self.lead_time = lead_time
+        self.interval = interval
+        self.counter = DecayedCounter(half_life=half_life, clock=clock)
+        self._clock = clock
+        # (city, units, lang) -> 마지막 요청의 API 키
+        self._api_keys = {}
+        self._refreshed_at = deque()
+        self._stop = threading.Event()
+        self._thread = None
+        self._previous_observer = None
+        self._lock = threading.Lock()
+        self.refreshes = 0
+        self.errors = 0
+        self.throttled = 0
+        self.disk_hits = 0
+
+    def record(self, city, api_key, lang, units):
+        """도시 요청을 집계합니다. start() 후에는 weather.forecast()가 호출합니다."""
+        key = (city, units, lang)
+        self.counter.add(key)
+        self._api_keys[key] = api_key
+
+    def _take_budget(self, now):
+        while self._refreshed_at and self._refreshed_at[0] <= now - _BUDGET_WINDOW:
+            self._refreshed_at.popleft()
+        if len(self._refreshed_at) >= self.refresh_budget:
+            return False
+        self._refreshed_at.append(now)
+        return True
+
+    def _fresh_expiry(self, endpoint, now):
+        """만료 시각이 이보다 이르면 갱신합니다."""
+        if endpoint == 'forecast':
+            # 예보는 지금 받아도 만료 시각이 늘어나지 않으면 갱신하지 않음
+            return weather.next_forecast_update(now)
+        return now + self.lead_time
+
+    def _needs_refresh(self, endpoint, key, now):
+        city, units, lang = key
+        expires_at = weather.cache_expires_at(endpoint, city, units, lang)
+        return expires_at is None or expires_at < self._fresh_expiry(endpoint, now)
+
+    def _load_from_disk(self, endpoint, key, now):
+        """다른 프로세스가 이미 갱신하여 디스크 캐시에 있으면 그 항목을 사용합니다."""
+        city, units, lang = key
+        if weather.load_disk_entry(endpoint, city, units, lang,
+                                   min_expires_at=self._fresh_expiry(endpoint, now)) is None:
+            return False
+        with self._lock:
+            self.disk_hits += 1
+        return True
+
+    def _refresh(self, endpoint, key, api_key):
+        city, units, lang = key
+        request = weather.request_current_weather if endpoint == 'weather' else weather.request_forecast_weather
+        try:
+            with metrics.span('prefetch', endpoint=endpoint, city=city):
+                weather.weather_flights.do((endpoint, city, units, lang), request, city, api_key, lang, units)
+            with self._lock:
+                self.refreshes += 1
+        except Exception as err:
+            with self._lock:
+                self.errors += 1
+            print(f"'{city}' 날씨 미리 가져오기 중 오류 발생: {err}")
+
+    def run_once(self):
+        """
+        상위 도시 중 갱신이 필요한 항목을 예산 안에서 갱신합니다.
+
+        Returns:
+            int: 갱신을 시도한 요청 수.
+        """
+        if len(self._api_keys) > self.counter.max_keys:
+            # 카운터에서 버려진 도시의 API 키 정리
+            self._api_keys = {key: api_key for key, api_key in self._api_keys.items() if key in self.counter}
+
+        attempted = 0
+        for key, _ in self.counter.top(self.top_n):
+            api_key = self._api_keys.get(key)
+            if api_key is None:
+                continue
+            for endpoint in ('weather', 'forecast'):
+                now = self._clock()
+                if not self._needs_refresh(endpoint, key, now) or self._load_from_disk(endpoint, key, now):
+                    continue
+                if not self._take_budget(now):
+                    with self._lock:
+                        self.throttled += 1
+                    return attempted
+                self._refresh(endpoint, key, api_key)
+                attempted += 1
+        return attempted
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as err:
+                print(f"날씨 미리 가져오기 중 오류 발생: {err}")
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """요청 집계와 백그라운드 갱신을 시작합니다. 프로세스가 종료될 때 자동으로 멈춥니다."""
+        if self.running:
+            return self
+        self._stop.clear()
+        self._previous_observer = weather.set_request_observer(self.record)
+        self._thread = threading.Thread(target=self._run, name="weather-prefetch", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+        return self
+
+    def stop(self, timeout=5.0):
+        """
+        백그라운드 갱신을 멈추고 요청 집계를 해제합니다. 진행 중인 갱신 요청이 끝날 때까지 최대 timeout초 기다립니다.
+
+        Returns:
+            bool: 스레드가 종료되었으면 True.
+        """
+        if self._thread is None:
+            return True
+        self._stop.set()
+        current = weather.set_request_observer(self._previous_observer)
+        if current != self.record:
+            # 그 사이에 다른 observer가 설정된 경우 그대로 둠
+            weather.set_request_observer(current)
+        self._thread.join(timeout)
+        stopped = not self._thread.is_alive()
+        self._thread = None
+        atexit.unregister(self.stop)
+        return stopped
+
+    def stats(self):
+        """
+        스케줄러 통계를 반환합니다.
+
+        Returns:
+            dict: running, tracked(집계 중인 도시 수), top(상위 도시와 빈도), refreshes, errors, throttled,
+                disk_hits(디스크 캐시로 갱신한 수) 키를 포함하는 딕셔너리.
+        """
+        with self._lock:
+            counts = {'refreshes': self.refreshes, 'errors': self.errors, 'throttled': self.throttled,
+                      'disk_hits': self.disk_hits}
+        return {
+            'running': self.running,
+            'tracked': len(self.counter),
+            'top': [(key[0], round(score, 3)) for key, score in self.counter.top(self.top_n)],
+            **counts,
+        }
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
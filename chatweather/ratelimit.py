@@ -0,0 +1,329 @@
+import threading
+import time
+
+from chatweather import metrics
+from chatweather.history import MESSAGE_OVERHEAD_TOKENS, estimate_tokens
+
+# 외부 API 이름 (metrics.record_http_status의 upstream과 같음)
+UPSTREAM_WEATHER = "weather"
+UPSTREAM_OPENAI = "openai"
+
+# 한도를 넘었을 때 기다리는 최대 시간(초). 넘으면 ThrottledError를 발생시킵니다.
+DEFAULT_MAX_WAIT = 5.0
+
+# 외부 API별 기본 한도 (분당 요청 수, 분당 토큰 수)
+# - OpenWeatherMap 무료 요금제: 분당 60회
+# - OpenAI gpt-4o-mini Tier 1: 분당 500회, 분당 200,000 토큰
+DEFAULT_LIMITS = {
+    UPSTREAM_WEATHER: {'requests_per_minute': 60},
+    UPSTREAM_OPENAI: {'requests_per_minute': 500, 'tokens_per_minute': 200_000},
+}
+
+OUTCOME_IMMEDIATE = "immediate"
+OUTCOME_QUEUED = "queued"
+OUTCOME_THROTTLED = "throttled"
+
+
+class ThrottledError(Exception):
+    """
+    요청 한도 때문에 요청을 보내지 못한 경우의 예외.
+
+    Attributes:
+        upstream (str): 외부 API 이름.
+        retry_after (float): 다시 시도할 수 있을 때까지의 예상 시간(초).
+    """
+
+    def __init__(self, upstream, retry_after):
+        super().__init__(f"{upstream} 요청 한도 초과 ({retry_after:.1f}초 후 다시 시도)")
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    토큰 버킷. 초당 rate개씩 최대 capacity개까지 채워집니다.
+
+    reserve()는 토큰이 부족해도 미리 차감하여 잔량이 음수가 될 수 있으며,
+    먼저 예약한 호출자부터 순서대로 기다리게 됩니다.
+    """
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated_at')
+
+    def __init__(self, rate, capacity, now):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = now
+
+    def refill(self, now):
+        if now > self.updated_at:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+
+    def wait_time(self, amount):
+        """amount개를 차감했을 때 잔량이 0 이상이 될 때까지 기다려야 하는 시간(초)."""
+        # 버킷보다 큰 요청은 버킷이 가득 찼을 때 통과시킵니다.
+        amount = min(amount, self.capacity)
+        shortage = amount - self.tokens
+        return shortage / self.rate if shortage > 0 else 0.0
+
+    def take(self, amount):
+        self.tokens -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    """
+    외부 API 하나(와 API 키 하나)의 클라이언트 요청 한도.
+
+    분당 요청 수와 분당 토큰 수를 토큰 버킷으로 제한하며, 한도를 넘으면 순서대로 기다렸다가 요청합니다.
+    기다려야 하는 시간이 max_wait를 넘으면 기다리지 않고 ThrottledError를 발생시킵니다.
+    429 응답의 Retry-After는 block_for()로 반영합니다.
+
+    Args:
+        upstream (str): 외부 API 이름.
+        requests_per_minute (float, optional): 분당 최대 요청 수. None이면 제한하지 않습니다.
+        tokens_per_minute (float, optional): 분당 최대 토큰 수. None이면 제한하지 않습니다.
+        max_wait (float, optional): 최대 대기 시간(초).
+        clock (callable, optional): 단조 증가 시각(초)을 반환하는 함수. 기본값은 time.monotonic.
+        sleep (callable, optional): 대기 함수. 기본값은 time.sleep.
+    """
+
+    def __init__(self, upstream, requests_per_minute=None, tokens_per_minute=None, max_wait=DEFAULT_MAX_WAIT,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.upstream = upstream
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_wait = max_wait
+        self._clock = clock
+        self._sleep = sleep
+        now = clock()
+        # 버킷 크기는 분당 한도와 같으므로 한 번에 최대 1분치까지 몰아서 보낼 수 있습니다.
+        self._requests = TokenBucket(requests_per_minute / 60, requests_per_minute, now) \
+            if requests_per_minute else None
+        self._tokens = TokenBucket(tokens_per_minute / 60, tokens_per_minute, now) if tokens_per_minute else None
+        self._blocked_until = now
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.queued = 0
+        self.throttled = 0
+        self.waited = 0.0
+
+    def reserve(self, tokens=0, max_wait=None):
+        """
+        요청 하나(와 토큰 tokens개)를 예약하고 기다려야 하는 시간(초)을 반환합니다.
+
+        Raises:
+            ThrottledError: 기다려야 하는 시간이 max_wait를 넘는 경우. 이때는 예약하지 않습니다.
+        """
+        max_wait = self.max_wait if max_wait is None else max_wait
+        with self._lock:
+            now = self._clock()
+            wait = max(0.0, self._blocked_until - now)
+            if self._requests is not None:
+                self._requests.refill(now)
+                wait = max(wait, self._requests.wait_time(1))
+            if self._tokens is not None and tokens:
+                self._tokens.refill(now)
+                wait = max(wait, self._tokens.wait_time(tokens))
+
+            if wait > max_wait:
+                self.throttled += 1
+                outcome = OUTCOME_THROTTLED
+            else:
+                if self._requests is not None:
+                    self._requests.take(1)
+                if self._tokens is not None and tokens:
+                    self._tokens.take(tokens)
+                self.acquired += 1
+                if wait > 0:
+                    self.queued += 1
+                    self.waited += wait
+                outcome = OUTCOME_QUEUED if wait > 0 else OUTCOME_IMMEDIATE
+        metrics.record_rate_limit(self.upstream, outcome, wait)
+        if outcome == OUTCOME_THROTTLED:
+            raise ThrottledError(self.upstream, wait)
+        return wait
+
+    def acquire(self, tokens=0, max_wait=None):
+        """
+        요청을 보낼 수 있을 때까지 기다립니다.
+
+        Args:
+            tokens (int, optional): 요청이 사용할 토큰 수 (분당 토큰 한도에 반영).
+            max_wait (float, optional): 이 호출의 최대 대기 시간(초). 없으면 생성 시 설정한 값을 사용합니다.
+
+        Returns:
+            float: 기다린 시간(초).
+
+        Raises:
+            ThrottledError: 최대 대기 시간 안에 보낼 수 없는 경우.
+        """
+        wait = self.reserve(tokens, max_wait)
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens=0, max_wait=None):
+        """acquire()의 asyncio 버전. 이벤트 루프를 막지 않고 기다립니다."""
+        import asyncio
+
+        wait = self.reserve(tokens, max_wait)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def block_for(self, seconds):
+        """seconds초 동안 새 요청을 보내지 않습니다. 429 응답의 Retry-After를 반영할 때 사용합니다."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, self._clock() + seconds)
+
+    def stats(self):
+        """
+        한도 통계를 반환합니다.
+
+        Returns:
+            dict: acquired, queued, throttled, waited_seconds 키를 포함하는 딕셔너리.
+        """
+        with self._lock:
+            return {
+                'acquired': self.acquired,
+                'queued': self.queued,
+                'throttled': self.throttled,
+                'waited_seconds': round(self.waited, 6),
+            }
+
+
+# (upstream, key) -> 한도 설정. key가 None인 항목은 그 외부 API의 기본 설정입니다.
+_limits = {upstream: dict(limits) for upstream, limits in DEFAULT_LIMITS.items()}
+# (upstream, key) -> RateLimiter
+_limiters = {}
+_limiters_lock = threading.Lock()
+_enabled = True
+
+
+def configure_rate_limit(upstream, key=None, requests_per_minute=None, tokens_per_minute=None,
+                         max_wait=DEFAULT_MAX_WAIT):
+    """
+    외부 API의 요청 한도를 설정합니다. 기존 한도의 상태는 초기화됩니다.
+
+    Args:
+        upstream (str): 외부 API 이름 ('weather' 또는 'openai').
+        key (str, optional): API 키. 지정하면 그 키에만 적용하고, 없으면 키별 설정이 없는 모든 키에 적용합니다.
+        requests_per_minute (float, optional): 분당 최대 요청 수. None이면 제한하지 않습니다.
+        tokens_per_minute (float, optional): 분당 최대 토큰 수. None이면 제한하지 않습니다.
+        max_wait (float, optional): 최대 대기 시간(초).
+    """
+    with _limiters_lock:
+        _limits[upstream if key is None else (upstream, key)] = {
+            'requests_per_minute': requests_per_minute,
+            'tokens_per_minute': tokens_per_minute,
+            'max_wait': max_wait,
+        }
+        for limiter_key in [k for k in _limiters if k[0] == upstream and (key is None or k[1] == key)]:
+            del _limiters[limiter_key]
+
+
+def get_rate_limiter(upstream, key=None):
+    """
+    외부 API와 API 키의 RateLimiter를 반환합니다. 없으면 설정에 따라 새로 만듭니다.
+
+    한도는 API 키마다 따로 적용되므로, 같은 외부 API라도 키가 다르면 다른 RateLimiter를 사용합니다.
+    """
+    limiter_key = (upstream, key)
+    limiter = _limiters.get(limiter_key)
+    if limiter is not None:
+        return limiter
+    with _limiters_lock:
+        limiter = _limiters.get(limiter_key)
+        if limiter is None:
+            limits = _limits.get(limiter_key) or _limits.get(upstream) or {}
+            limiter = _limiters[limiter_key] = RateLimiter(upstream, **limits)
+        return limiter
+
+
+def acquire(upstream, key=None, tokens=0):
+    """
+    외부 API 요청 전에 호출하여 한도 안에서 요청할 수 있을 때까지 기다립니다.
+
+    Raises:
+        ThrottledError: 최대 대기 시간 안에 요청할 수 없는 경우.
+    """
+    if not _enabled:
+        return 0.0
+    return get_rate_limiter(upstream, key).acquire(tokens)
+
+
+async def acquire_async(upstream, key=None, tokens=0):
+    """acquire()의 asyncio 버전."""
+    if not _enabled:
+        return 0.0
+    return await get_rate_limiter(upstream, key).acquire_async(tokens)
+
+
+def block_for(upstream, key, retry_after):
+    """429 응답의 Retry-After 값(초 또는 HTTP 날짜 문자열)만큼 요청을 멈춥니다. 잘못된 값은 무시합니다."""
+    seconds = parse_retry_after(retry_after)
+    if _enabled and seconds:
+        get_rate_limiter(upstream, key).block_for(seconds)
+    return seconds
+
+
+def set_rate_limiting(enabled):
+    """요청 한도 적용을 켜거나 끕니다. (테스트나 벤치마크용)"""
+    global _enabled
+    _enabled = enabled
+
+
+def reset_rate_limiters():
+    """모든 한도 설정을 기본값으로 되돌리고 상태를 초기화합니다."""
+    with _limiters_lock:
+        _limits.clear()
+        _limits.update({upstream: dict(limits) for upstream, limits in DEFAULT_LIMITS.items()})
+        _limiters.clear()
+
+
+def get_rate_limit_stats():
+    """외부 API와 키별 한도 통계를 반환합니다. API 키는 마지막 4자리만 표시합니다."""
+    with _limiters_lock:
+        limiters = list(_limiters.items())
+    return {
+        f"{upstream}:{'*' if key is None else '...' + str(key)[-4:]}": limiter.stats()
+        for (upstream, key), limiter in limiters
+    }
+
+
+def parse_retry_after(value, now=None):
+    """
+    Retry-After 헤더 값을 초로 변환합니다.
+
+    Args:
+        value (str or float): 초 단위 숫자 또는 HTTP 날짜 문자열.
+        now (float, optional): 기준 시각(epoch 초). 기본값은 현재 시각.
+
+    Returns:
+        float: 기다릴 시간(초). 값이 없거나 잘못되었으면 None.
+    """
+    if value is None or value == "":
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    from email.utils import parsedate_to_datetime
+
+    try:
+        retry_at = parsedate_to_datetime(str(value)).timestamp()
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+    return max(0.0, retry_at - (time.time() if now is None else now))
+
+
+def estimate_request_tokens(messages, max_tokens=0):
+    """
+    OpenAI 요청이 분당 토큰 한도에서 사용할 토큰 수를 추정합니다.
+
+    OpenAI는 프롬프트 토큰과 max_tokens를 합하여 한도에 반영하므로 둘을 더합니다.
+    """
+    prompt_tokens = sum(estimate_tokens(message.get("content") or "") + MESSAGE_OVERHEAD_TOKENS
+                        for message in messages)
+    return prompt_tokens + (max_tokens or 0)
@@ -0,0 +1,498 @@
+"""
+여러 사용자의 대화를 동시에 처리하는 HTTP 챗봇 서버.
+
+세션 ID별로 대화 기록을 유지하며 chat_loop와 같은 응답 로직(generate_chat_response)을 사용합니다.
+
+엔드포인트:
+    POST /chat      {"session_id": "...", "message": "..."} -> {"session_id": "...", "response": "..."}
+    GET  /healthz   서버 상태 (세션 수, 처리 중인 요청 수 등)
+    GET  /metrics   Prometheus 텍스트 형식의 지표 (metrics 모듈)
+"""
+import argparse
+import json
+import re
+import signal
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from chatweather import chatbot, hedging, metrics, speculation, weather
+from chatweather.prefetch import DEFAULT_REFRESH_BUDGET, PrefetchScheduler
+from chatweather.sessions import (DEFAULT_IDLE_TTL, DEFAULT_MAX_MEMORY_BYTES, SessionStore,
+                                  SQLiteSessionBackend)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+# 동시에 응답을 생성하는 최대 요청 수
+DEFAULT_MAX_CONCURRENCY = 16
+# 처리 슬롯을 기다리는 최대 시간(초). 넘으면 503으로 거절합니다.
+DEFAULT_QUEUE_TIMEOUT = 1.0
+# 요청 하나의 응답 생성 제한 시간(초). 넘으면 504를 반환합니다.
+DEFAULT_REQUEST_TIMEOUT = 30.0
+# 기본 responder가 턴마다 사용하는 제한 시간(초). 요청 제한 시간보다 짧게 두어,
+# 외부 API가 늦으면 504 대신 기본 도시나 템플릿 답변으로 응답합니다.
+DEFAULT_TURN_BUDGET = 25.0
+# 동시에 유지하는 최대 연결 수. 넘는 연결은 바로 503으로 거절합니다.
+DEFAULT_MAX_CONNECTIONS = 256
+# keep-alive 연결의 유휴 제한 시간 및 요청 읽기 제한 시간(초)
+DEFAULT_KEEPALIVE_TIMEOUT = 5.0
+DEFAULT_MAX_BODY_SIZE = 64 * 1024
+# 종료 시 처리 중인 요청을 기다리는 최대 시간(초)
+DEFAULT_DRAIN_TIMEOUT = 30.0
+RETRY_AFTER_SECONDS = 1
+
+OVERLOADED_MESSAGE = "서버가 혼잡합니다. 잠시 후 다시 시도해주세요."
+SHUTTING_DOWN_MESSAGE = "서버가 종료 중입니다."
+TIMEOUT_MESSAGE = "응답 시간이 초과되었습니다."
+
+_SESSION_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,128}$")
+
+_REJECT_BODY = json.dumps({'error': OVERLOADED_MESSAGE}, ensure_ascii=False).encode('utf-8')
+_REJECT_RESPONSE = (
+    b"HTTP/1.1 503 Service Unavailable\r\n"
+    b"Content-Type: application/json; charset=utf-8\r\n"
+    + f"Retry-After: {RETRY_AFTER_SECONDS}\r\n".encode('ascii')
+    + f"Content-Length: {len(_REJECT_BODY)}\r\n".encode('ascii')
+    + b"Connection: close\r\n\r\n"
+    + _REJECT_BODY
+)
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    """연결 수를 제한하는 ThreadingHTTPServer. 제한을 넘는 연결은 accept 스레드에서 바로 거절합니다."""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, handler, owner):
+        self.owner = owner
+        super().__init__(address, handler)
+
+    def process_request(self, request, client_address):
+        if not self.owner._acquire_connection():
+            try:
+                request.sendall(_REJECT_RESPONSE)
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+        try:
+            super().process_request(request, client_address)
+        except Exception:
+            self.owner._release_connection()
+            raise
+
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self.owner._release_connection()
+
+
+class ChatRequestHandler(BaseHTTPRequestHandler):
+    """ChatServer의 HTTP 요청 처리기. keep-alive(HTTP/1.1)를 지원합니다."""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "chatweather"
+
+    def setup(self):
+        # 소켓 읽기 제한 시간: 유휴 keep-alive 연결과 느린 클라이언트가 스레드를 붙잡지 않도록 합니다.
+        self.timeout = self.server.owner.keepalive_timeout
+        super().setup()
+
+    @property
+    def owner(self):
+        return self.server.owner
+
+    def log_message(self, format, *args):
+        if self.owner.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status, body, content_type, headers=None):
+        if self.owner.draining:
+            self.close_connection = True
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if self.close_connection:
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self._send(status, body, 'application/json; charset=utf-8', headers)
+        self.owner._count_response(status)
+
+    def do_GET(self):
+        if self.path == '/healthz':
+            self._send_json(200, self.owner.stats())
+        elif self.path == '/metrics':
+            body = metrics.export_prometheus().encode('utf-8')
+            self._send(200, body, 'text/plain; version=0.0.4; charset=utf-8')
+        else:
+            self._send_json(404, {'error': "찾을 수 없는 경로입니다."})
+
+    def do_POST(self):
+        if self.path != '/chat':
+            self.close_connection = True
+            self._send_json(404, {'error': "찾을 수 없는 경로입니다."})
+            return
+
+        length = self.headers.get('Content-Length')
+        if length is None or not length.isdigit():
+            self.close_connection = True
+            self._send_json(411, {'error': "Content-Length 헤더가 필요합니다."})
+            return
+        length = int(length)
+        if length > self.owner.max_body_size:
+            # 본문을 읽지 않았으므로 연결을 재사용할 수 없음
+            self.close_connection = True
+            self._send_json(413, {'error': "요청 본문이 너무 큽니다."})
+            return
+
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            self._send_json(400, {'error': "잘못된 JSON 요청입니다."})
+            return
+        if not isinstance(payload, dict):
+            self._send_json(400, {'error': "잘못된 JSON 요청입니다."})
+            return
+
+        message = payload.get('message')
+        if not isinstance(message, str) or not message.strip():
+            self._send_json(400, {'error': "'message'가 필요합니다."})
+            return
+
+        session_id = payload.get('session_id') or uuid.uuid4().hex
+        if not isinstance(session_id, str) or not _SESSION_ID_RE.match(session_id):
+            self._send_json(400, {'error': "잘못된 'session_id'입니다."})
+            return
+
+        status, body, headers = self.owner.chat(session_id, message.strip())
+        self._send_json(status, body, headers)
+
+
+class ChatServer:
+    """
+    세션 ID별 대화 기록을 유지하며 여러 요청을 동시에 처리하는 HTTP 챗봇 서버.
+
+    - 연결마다 스레드 하나가 요청을 읽고, 응답 생성은 최대 max_concurrency개의 작업 스레드에서 실행합니다.
+    - 작업 스레드가 모두 사용 중이면 queue_timeout초까지 기다린 뒤 503(Retry-After)으로 거절합니다.
+    - 응답 생성이 request_timeout초를 넘으면 504를 반환합니다.
+    - 외부 API 요청 한도를 넘어 응답하지 못하면 429(Retry-After)를 반환하고 대화 기록에 남기지 않습니다.
+    - 기본 responder는 턴마다 turn_budget초의 제한 시간을 두며, 그 안에 날씨 정보도 가져오지 못하면
+      504를 반환하고 대화 기록에 남기지 않습니다.
+    - shutdown()은 새 연결을 받지 않고 처리 중인 요청이 끝날 때까지 기다립니다.
+
+    Args:
+        host (str, optional): 바인딩할 주소. 기본값은 '127.0.0.1'.
+        port (int, optional): 바인딩할 포트. 0이면 임의의 빈 포트를 사용합니다.
+        max_concurrency (int, optional): 동시에 응답을 생성하는 최대 요청 수.
+        queue_timeout (float, optional): 처리 슬롯을 기다리는 최대 시간(초).
+        request_timeout (float, optional): 요청 하나의 응답 생성 제한 시간(초).
+        max_connections (int, optional): 동시에 유지하는 최대 연결 수.
+        keepalive_timeout (float, optional): 유휴 연결과 요청 읽기 제한 시간(초).
+        max_body_size (int, optional): 요청 본문의 최대 크기(바이트).
+        responder (callable, optional): responder(query, conversation_history)로 응답을 생성하는 함수.
+            기본값은 chatbot.generate_chat_response.
+        extraction_mode (str, optional): 기본 responder에 전달할 날씨 질의 처리 방식.
+        response_mode (str, optional): 기본 responder에 전달할 날씨 답변 생성 방식 ('rich', 'fast', 'auto').
+        turn_budget (float, optional): 기본 responder의 턴 제한 시간(초). None이면 제한하지 않습니다.
+        session_store (SessionStore, optional): 세션 저장소. 없으면 메모리에만 저장하는 저장소를 만듭니다.
+        verbose (bool, optional): True이면 요청 로그를 출력합니다.
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                 queue_timeout=DEFAULT_QUEUE_TIMEOUT, request_timeout=DEFAULT_REQUEST_TIMEOUT,
+                 max_connections=DEFAULT_MAX_CONNECTIONS, keepalive_timeout=DEFAULT_KEEPALIVE_TIMEOUT,
+                 max_body_size=DEFAULT_MAX_BODY_SIZE, responder=None, extraction_mode=None, response_mode=None,
+                 turn_budget=DEFAULT_TURN_BUDGET, session_store=None, verbose=False):
+        if max_concurrency <= 0 or max_connections <= 0:
+            raise ValueError("max_concurrency와 max_connections는 1 이상이어야 합니다.")
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.request_timeout = request_timeout
+        self.max_connections = max_connections
+        self.keepalive_timeout = keepalive_timeout
+        self.max_body_size = max_body_size
+        self.extraction_mode = extraction_mode
+        self.response_mode = response_mode
+        self.turn_budget = turn_budget
+        self.responder = responder or self._default_responder
+        self.verbose = verbose
+
+        self._owns_store = session_store is None
+        self.sessions = session_store or SessionStore(summarizer=chatbot.summarize_history)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="chat-worker")
+        self._state = threading.Condition()
+        self._connections = 0
+        self._in_flight = 0
+        # 제출했지만 끝나지 않은 작업 (종료 시 시작하지 않은 작업을 취소)
+        self._pending = set()
+        self._counts = {'requests': 0, 'rejected': 0, 'throttled': 0, 'timeouts': 0, 'errors': 0}
+        self._draining = threading.Event()
+        self._thread = None
+        self._closed = False
+        self._httpd = _HTTPServer((host, port), ChatRequestHandler, self)
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def draining(self):
+        return self._draining.is_set()
+
+    def _default_responder(self, query, conversation_history):
+        return chatbot.generate_chat_response(query, conversation_history, extraction_mode=self.extraction_mode,
+                                              response_mode=self.response_mode, deadline=self.turn_budget)
+
+    def _acquire_connection(self):
+        with self._state:
+            if self._connections >= self.max_connections or self.draining:
+                self._counts['rejected'] += 1
+                return False
+            self._connections += 1
+            return True
+
+    def _release_connection(self):
+        with self._state:
+            self._connections -= 1
+
+    def _count_response(self, status):
+        if metrics.metrics_enabled():
+            metrics.get_registry().counter(
+                "chatweather_server_responses_total", "챗봇 서버의 HTTP 응답 상태 코드별 횟수", ("status",)
+            ).inc(status=status)
+
+    def get_session(self, session_id):
+        """세션을 반환합니다. 없으면 새로 만듭니다."""
+        return self.sessions.get(session_id)
+
+    def _respond(self, session_id, message):
+        session = self.get_session(session_id)
+        # 같은 세션의 턴은 순서대로 처리해야 대화 기록이 섞이지 않음
+        with session.lock:
+            response = self.responder(message, session)
+            if response is None:
+                response = chatbot.ERROR_MESSAGE
+            # 요청 한도/제한 시간 초과 응답은 클라이언트가 다시 보낼 것이므로 대화 기록에 남기지 않음
+            if response not in (chatbot.THROTTLED_MESSAGE, chatbot.DEADLINE_MESSAGE):
+                session.add_turn(message, response)
+        return response
+
+    def _finish(self, future):
+        self._slots.release()
+        with self._state:
+            self._in_flight -= 1
+            self._pending.discard(future)
+            self._state.notify_all()
+
+    def chat(self, session_id, message):
+        """
+        세션의 대화 한 턴을 처리합니다.
+
+        Returns:
+            tuple: (HTTP 상태 코드, 응답 본문 dict, 추가 헤더 dict)
+        """
+        if self.draining:
+            return 503, {'error': SHUTTING_DOWN_MESSAGE}, {'Retry-After': str(RETRY_AFTER_SECONDS)}
+
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            with self._state:
+                self._counts['rejected'] += 1
+            return 503, {'error': OVERLOADED_MESSAGE}, {'Retry-After': str(RETRY_AFTER_SECONDS)}
+
+        with self._state:
+            self._in_flight += 1
+            self._counts['requests'] += 1
+        try:
+            future = self._executor.submit(self._respond, session_id, message)
+        except RuntimeError:
+            # 종료 중에 작업 스레드 풀이 닫힌 경우
+            self._finish(None)
+            return 503, {'error': SHUTTING_DOWN_MESSAGE}, {'Retry-After': str(RETRY_AFTER_SECONDS)}
+        with self._state:
+            self._pending.add(future)
+        # 제한 시간이 지나도 작업은 계속 실행되므로, 슬롯은 작업이 실제로 끝날 때 반환합니다.
+        future.add_done_callback(self._finish)
+
+        try:
+            response = future.result(timeout=self.request_timeout)
+        except FutureTimeout:
+            with self._state:
+                self._counts['timeouts'] += 1
+            return 504, {'error': TIMEOUT_MESSAGE, 'session_id': session_id}, {}
+        except Exception as err:
+            print(f"응답 생성 중 오류 발생: {err}")
+            with self._state:
+                self._counts['errors'] += 1
+            return 500, {'error': chatbot.ERROR_MESSAGE, 'session_id': session_id}, {}
+        if response == chatbot.THROTTLED_MESSAGE:
+            with self._state:
+                self._counts['throttled'] += 1
+            return 429, {'error': response, 'session_id': session_id}, {'Retry-After': str(RETRY_AFTER_SECONDS)}
+        if response == chatbot.DEADLINE_MESSAGE:
+            with self._state:
+                self._counts['timeouts'] += 1
+            return 504, {'error': response, 'session_id': session_id}, {}
+        return 200, {'session_id': session_id, 'response': response}, {}
+
+    def stats(self):
+        """서버 상태를 반환합니다."""
+        sessions = self.sessions.stats()
+        with self._state:
+            return {
+                'status': 'draining' if self.draining else 'ok',
+                'sessions': sessions['sessions'],
+                'session_memory_bytes': sessions['memory_bytes'],
+                'session_evictions': sessions['evictions'],
+                'session_expirations': sessions['expirations'],
+                'connections': self._connections,
+                'in_flight': self._in_flight,
+                **self._counts,
+            }
+
+    def serve_forever(self):
+        """현재 스레드에서 요청을 처리합니다. shutdown()이 호출될 때까지 반환하지 않습니다."""
+        self._httpd.serve_forever(poll_interval=0.2)
+
+    def start(self):
+        """백그라운드 스레드에서 요청 처리를 시작합니다."""
+        self._thread = threading.Thread(target=self.serve_forever, name="chat-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def shutdown(self, drain_timeout=DEFAULT_DRAIN_TIMEOUT):
+        """
+        새 연결과 요청을 거절하고, 처리 중인 요청이 끝나기를 기다린 뒤 서버를 종료합니다.
+
+        serve_forever()를 실행 중인 스레드가 아닌 다른 스레드에서 호출해야 합니다.
+
+        Args:
+            drain_timeout (float, optional): 처리 중인 요청을 기다리는 최대 시간(초).
+
+        Returns:
+            bool: 처리 중인 요청이 모두 끝났으면 True.
+        """
+        if self._closed:
+            return True
+        self._closed = True
+        self._draining.set()
+        self._httpd.shutdown()
+        with self._state:
+            drained = self._state.wait_for(lambda: self._in_flight == 0, timeout=drain_timeout)
+        # Python 3.8의 shutdown()에는 cancel_futures가 없으므로 시작하지 않은 작업을 직접 취소
+        with self._state:
+            pending = list(self._pending)
+        for future in pending:
+            future.cancel()
+        self._executor.shutdown(wait=False)
+        self._httpd.server_close()
+        if self._owns_store:
+            self.sessions.close()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        return drained
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="chatweather HTTP 챗봇 서버")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--max-concurrency', type=int, default=DEFAULT_MAX_CONCURRENCY,
+                        help="동시에 응답을 생성하는 최대 요청 수")
+    parser.add_argument('--queue-timeout', type=float, default=DEFAULT_QUEUE_TIMEOUT,
+                        help="처리 슬롯을 기다리는 최대 시간(초)")
+    parser.add_argument('--request-timeout', type=float, default=DEFAULT_REQUEST_TIMEOUT,
+                        help="요청 하나의 응답 생성 제한 시간(초)")
+    parser.add_argument('--turn-budget', type=float, default=DEFAULT_TURN_BUDGET,
+                        help="턴마다 외부 API를 기다리는 제한 시간(초). 0이면 제한하지 않습니다.")
+    parser.add_argument('--max-connections', type=int, default=DEFAULT_MAX_CONNECTIONS)
+    parser.add_argument('--drain-timeout', type=float, default=DEFAULT_DRAIN_TIMEOUT,
+                        help="종료 시 처리 중인 요청을 기다리는 최대 시간(초)")
+    parser.add_argument('--session-db', help="세션을 저장할 SQLite 파일 경로. 없으면 메모리에만 저장합니다.")
+    parser.add_argument('--session-ttl', type=float, default=DEFAULT_IDLE_TTL,
+                        help="사용하지 않는 세션을 만료하는 시간(초)")
+    parser.add_argument('--max-session-memory', type=int, default=DEFAULT_MAX_MEMORY_BYTES,
+                        help="메모리에 유지할 세션의 최대 크기(바이트)")
+    parser.add_argument('--weather-cache-db',
+                        help="여러 프로세스가 공유할 날씨 디스크 캐시(SQLite) 파일 경로")
+    parser.add_argument('--prefetch-top-n', type=int, default=0,
+                        help="요청 빈도 상위 N개 도시의 날씨를 만료 전에 미리 갱신합니다 (0이면 끔)")
+    parser.add_argument('--prefetch-budget', type=int, default=DEFAULT_REFRESH_BUDGET,
+                        help="미리 갱신에 사용할 분당 최대 날씨 API 요청 수")
+    parser.add_argument('--extraction-mode', choices=(chatbot.EXTRACTION_MODE_PROMPT, chatbot.EXTRACTION_MODE_TOOL))
+    parser.add_argument('--response-mode', choices=chatbot.RESPONSE_MODES,
+                        help="날씨 답변 생성 방식 (fast: 템플릿, rich: LLM, auto: 첫 턴의 단순 조회만 템플릿)")
+    parser.add_argument('--answer-cache-size', type=int, default=0,
+                        help="이전 대화가 없는 날씨 답변을 캐시할 최대 키 수 (0이면 끔)")
+    parser.add_argument('--hedge', action='append', choices=('weather', 'openai'), default=[],
+                        help="응답이 p95보다 늦으면 같은 요청을 한 번 더 보낼 외부 API (여러 번 지정 가능)")
+    parser.add_argument('--speculate', action='store_true',
+                        help="GPT 추출과 동시에 추측한 도시의 날씨를 미리 가져옵니다")
+    parser.add_argument('--metrics', action='store_true', help="지표 기록을 켭니다 (/metrics)")
+    parser.add_argument('--verbose', action='store_true', help="요청 로그를 출력합니다")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """서버를 실행하고 SIGINT/SIGTERM을 받으면 처리 중인 요청을 마친 뒤 종료합니다."""
+    args = parse_args(argv)
+    if args.metrics:
+        metrics.enable_metrics()
+
+    store = SessionStore(
+        summarizer=chatbot.summarize_history, idle_ttl=args.session_ttl,
+        max_memory_bytes=args.max_session_memory,
+        backend=SQLiteSessionBackend(args.session_db) if args.session_db else None,
+    )
+    server = ChatServer(
+        host=args.host, port=args.port, max_concurrency=args.max_concurrency,
+        queue_timeout=args.queue_timeout, request_timeout=args.request_timeout,
+        max_connections=args.max_connections, extraction_mode=args.extraction_mode,
+        response_mode=args.response_mode, turn_budget=args.turn_budget or None, session_store=store,
+        verbose=args.verbose,
+    )
+    if args.weather_cache_db:
+        weather.configure_disk_cache(args.weather_cache_db)
+    for upstream in args.hedge:
+        hedging.configure_hedging(upstream)
+    if args.answer_cache_size > 0:
+        chatbot.configure_answer_cache(maxsize=args.answer_cache_size)
+    speculation.set_speculation(args.speculate)
+    prefetcher = None
+    if args.prefetch_top_n > 0:
+        prefetcher = PrefetchScheduler(top_n=args.prefetch_top_n, refresh_budget=args.prefetch_budget).start()
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop.set())
+
+    server.start()
+    print(f"챗봇 서버를 시작합니다: {server.url} (종료: Ctrl+C)")
+    while not stop.wait(0.5):
+        pass
+
+    print("챗봇 서버를 종료합니다. 처리 중인 요청을 기다립니다...")
+    if not server.shutdown(drain_timeout=args.drain_timeout):
+        print("제한 시간 안에 끝나지 않은 요청이 있습니다.")
+    if prefetcher is not None:
+        prefetcher.stop()
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
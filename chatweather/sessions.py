@@ -0,0 +1,419 @@
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from chatweather.history import DEFAULT_TOKEN_BUDGET, ConversationHistory, Turn
+
+# 세션별 최대 턴 수. 넘는 턴은 요약으로 접힙니다.
+DEFAULT_MAX_TURNS = 20
+# 마지막 사용 후 세션을 만료하는 시간(초)
+DEFAULT_IDLE_TTL = 30 * 60
+# 모든 세션이 메모리에서 사용할 수 있는 대략적인 최대 크기(바이트)
+DEFAULT_MAX_MEMORY_BYTES = 64 * 1024 * 1024
+# 세션 하나의 고정 메모리 사용량 추정치(바이트)
+SESSION_OVERHEAD_BYTES = 1024
+# 저장소에서 만료된 세션을 정리하는 최소 간격(초)
+IDLE_SWEEP_INTERVAL = 60
+
+
+class Session(ConversationHistory):
+    """
+    SessionStore가 관리하는 세션 하나의 대화 기록.
+
+    ConversationHistory와 같이 사용할 수 있으며, 턴이 추가되면 저장소에 알려
+    메모리 사용량을 갱신하고 영속 저장소에 기록합니다.
+
+    Attributes:
+        session_id (str): 세션 ID.
+        lock (threading.Lock): 같은 세션의 턴을 순서대로 처리하기 위한 잠금.
+        last_access (float): 마지막 사용 시각(초).
+    """
+
+    def __init__(self, session_id, store=None, **history_options):
+        super().__init__(**history_options)
+        self.session_id = session_id
+        self.lock = threading.Lock()
+        self.last_access = 0.0
+        # 다음에 추가될 턴의 일련번호. 영속 저장소에서 밀려난 턴을 지울 때 사용합니다.
+        self.next_seq = 0
+        self._store = store
+
+    def add_turn(self, user, bot):
+        turn = super().add_turn(user, bot)
+        self.next_seq += 1
+        if self._store is not None:
+            self._store._on_change(self)
+        return turn
+
+    def clear(self):
+        super().clear()
+        if self._store is not None:
+            self._store._on_change(self)
+
+    @property
+    def first_seq(self):
+        """메모리에 남아 있는 가장 오래된 턴의 일련번호."""
+        return self.next_seq - len(self._turns)
+
+    def memory_bytes(self):
+        """세션이 차지하는 대략적인 메모리(바이트)를 반환합니다."""
+        return (SESSION_OVERHEAD_BYTES + sys.getsizeof(self.summary)
+                + sum(turn.nbytes() for turn in self._turns)
+                + sum(turn.nbytes() for turn in self._unsummarized))
+
+    def snapshot(self):
+        """영속 저장소에 기록할 (요약, 첫 턴 일련번호, [(user, bot), ...])를 반환합니다."""
+        return self.summary, self.first_seq, [(turn.user, turn.bot) for turn in self._turns]
+
+    def restore(self, summary, first_seq, turns):
+        """영속 저장소에서 읽은 요약과 턴으로 상태를 복원합니다. 요약 함수는 호출하지 않습니다."""
+        self.summary = summary
+        self._turns.clear()
+        self._turn_tokens = 0
+        for user, bot in turns:
+            turn = Turn(user, bot)
+            self._turns.append(turn)
+            self._turn_tokens += turn.tokens
+        self.next_seq = first_seq + len(turns)
+
+
+class SessionStore:
+    """
+    세션 ID별 대화 기록 저장소.
+
+    - 세션마다 max_turns와 token_budget을 넘는 턴은 요약으로 접습니다.
+    - idle_ttl초 동안 사용되지 않은 세션은 만료되어 메모리와 영속 저장소에서 삭제됩니다.
+    - 전체 메모리 사용량이 max_memory_bytes를 넘으면 가장 오래 사용되지 않은 세션부터 메모리에서 제거합니다.
+      영속 저장소(backend)가 있으면 제거된 세션은 다음에 사용할 때 다시 읽어 옵니다.
+
+    Args:
+        token_budget (int, optional): 세션별 요약과 최근 대화에 사용할 최대 토큰 수.
+        summarizer (callable, optional): ConversationHistory의 summarizer.
+        max_turns (int, optional): 세션별 최대 턴 수. 기본값은 DEFAULT_MAX_TURNS.
+        idle_ttl (float, optional): 세션 만료 시간(초). None이면 만료하지 않습니다.
+        max_memory_bytes (int, optional): 메모리에 유지할 세션의 최대 크기(바이트).
+        backend (SQLiteSessionBackend, optional): 영속 저장소. 없으면 메모리에만 저장합니다.
+        clock (callable, optional): 현재 시각(초)을 반환하는 함수. 기본값은 time.time.
+    """
+
+    def __init__(self, token_budget=DEFAULT_TOKEN_BUDGET, summarizer=None, max_turns=DEFAULT_MAX_TURNS,
+                 idle_ttl=DEFAULT_IDLE_TTL, max_memory_bytes=DEFAULT_MAX_MEMORY_BYTES, backend=None,
+                 clock=time.time):
+        self.token_budget = token_budget
+        self.summarizer = summarizer
+        self.max_turns = max_turns
+        self.idle_ttl = idle_ttl
+        self.max_memory_bytes = max_memory_bytes
+        self.backend = backend
+        self._clock = clock
+        # 마지막 사용 순서 (LRU)
+        self._sessions = OrderedDict()
+        self._sizes = {}
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._last_sweep = clock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def _new_session(self, session_id):
+        return Session(session_id, store=self, token_budget=self.token_budget,
+                       summarizer=self.summarizer, max_turns=self.max_turns)
+
+    def _is_expired(self, last_access, now):
+        return self.idle_ttl is not None and last_access + self.idle_ttl <= now
+
+    def get(self, session_id):
+        """
+        세션을 반환합니다. 메모리에 없으면 영속 저장소에서 읽고, 거기에도 없으면 새로 만듭니다.
+
+        Args:
+            session_id (str): 세션 ID.
+
+        Returns:
+            Session: 세션.
+        """
+        now = self._clock()
+        with self._lock:
+            self._expire_idle(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._new_session(session_id)
+                if self.backend is not None:
+                    stored = self.backend.load(session_id)
+                    if stored is not None:
+                        last_access, summary, first_seq, turns = stored
+                        if self._is_expired(last_access, now):
+                            self.backend.delete(session_id)
+                            self.expirations += 1
+                        else:
+                            session.restore(summary, first_seq, turns)
+                self._sessions[session_id] = session
+                self._account(session)
+            else:
+                self._sessions.move_to_end(session_id)
+            session.last_access = now
+            self._enforce_memory_cap(keep=session_id)
+            return session
+
+    def _on_change(self, session):
+        """세션의 턴이나 요약이 바뀌었을 때 Session이 호출합니다."""
+        now = self._clock()
+        with self._lock:
+            session.last_access = now
+            current = self._sessions.get(session.session_id)
+            if current is None:
+                # 사용 중에 메모리에서 제거된 세션이 다시 사용된 경우
+                self._sessions[session.session_id] = session
+                current = session
+            if current is session:
+                self._sessions.move_to_end(session.session_id)
+                self._account(session)
+                self._enforce_memory_cap(keep=session.session_id)
+        if self.backend is not None:
+            self.backend.save(session.session_id, now, *session.snapshot())
+
+    def _account(self, session):
+        size = session.memory_bytes()
+        self._memory_bytes += size - self._sizes.get(session.session_id, 0)
+        self._sizes[session.session_id] = size
+
+    def _remove(self, session_id):
+        self._sessions.pop(session_id, None)
+        self._memory_bytes -= self._sizes.pop(session_id, 0)
+
+    def _enforce_memory_cap(self, keep=None):
+        while self._memory_bytes > self.max_memory_bytes and len(self._sessions) > 1:
+            session_id = next(iter(self._sessions))
+            if session_id == keep:
+                self._sessions.move_to_end(session_id)
+                session_id = next(iter(self._sessions))
+            self._remove(session_id)
+            self.evictions += 1
+
+    def _expire_idle(self, now):
+        if self.idle_ttl is None:
+            return
+        # 사용 순서대로 정렬되어 있으므로 앞쪽의 만료된 세션만 확인합니다.
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if not self._is_expired(session.last_access, now):
+                break
+            self._remove(session_id)
+            self.expirations += 1
+            if self.backend is not None:
+                self.backend.delete(session_id)
+        if self.backend is not None and now - self._last_sweep >= IDLE_SWEEP_INTERVAL:
+            self._last_sweep = now
+            self.backend.delete_idle(now - self.idle_ttl)
+
+    def evict_idle(self):
+        """만료된 세션을 지금 정리합니다."""
+        now = self._clock()
+        with self._lock:
+            self._expire_idle(now)
+            if self.backend is not None:
+                self._last_sweep = now
+                self.backend.delete_idle(now - self.idle_ttl if self.idle_ttl is not None else float('-inf'))
+
+    def delete(self, session_id):
+        """세션을 메모리와 영속 저장소에서 삭제합니다."""
+        with self._lock:
+            self._remove(session_id)
+        if self.backend is not None:
+            self.backend.delete(session_id)
+
+    def stats(self):
+        """
+        저장소 통계를 반환합니다.
+
+        Returns:
+            dict: sessions, memory_bytes, max_memory_bytes, evictions, expirations 키를 포함하는 딕셔너리.
+        """
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'memory_bytes': self._memory_bytes,
+                'max_memory_bytes': self.max_memory_bytes,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+    def flush(self):
+        """영속 저장소에 대기 중인 쓰기를 기록합니다."""
+        if self.backend is not None:
+            self.backend.flush()
+
+    def close(self):
+        """대기 중인 쓰기를 기록하고 영속 저장소를 닫습니다."""
+        if self.backend is not None:
+            self.backend.close()
+
+    def __contains__(self, session_id):
+        with self._lock:
+            return session_id in self._sessions
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+
+class SQLiteSessionBackend:
+    """
+    세션을 SQLite에 저장하는 영속 저장소.
+
+    쓰기는 바로 기록하지 않고 세션별로 모아 두었다가(같은 세션의 여러 변경은 마지막 상태 하나로 합침),
+    batch_size개가 쌓이거나 flush_interval초가 지나면 백그라운드 스레드가 한 트랜잭션으로 기록합니다.
+
+    Args:
+        path (str): 데이터베이스 파일 경로. ':memory:'이면 메모리 데이터베이스를 사용합니다.
+        batch_size (int, optional): 이 수만큼 세션 변경이 쌓이면 바로 기록합니다. 기본값은 64.
+        flush_interval (float, optional): 최대 기록 지연 시간(초). 기본값은 1.
+    """
+
+    def __init__(self, path, batch_size=64, flush_interval=1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ':memory:':
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                summary TEXT NOT NULL,
+                first_seq INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS sessions_last_access ON sessions (last_access);
+            CREATE TABLE IF NOT EXISTS turns (
+                session_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                user TEXT NOT NULL,
+                bot TEXT NOT NULL,
+                PRIMARY KEY (session_id, seq)
+            ) WITHOUT ROWID;
+        """)
+        # session_id -> (last_access, summary, first_seq, turns) 또는 삭제 예정이면 None
+        self._pending = {}
+        self._idle_cutoff = None
+        self._pending_cond = threading.Condition()
+        self._db_lock = threading.Lock()
+        self._closed = False
+        self.batches = 0
+        self._writer = threading.Thread(target=self._run, name="session-writer", daemon=True)
+        self._writer.start()
+
+    def save(self, session_id, last_access, summary, first_seq, turns):
+        """세션의 현재 상태를 기록 대기열에 넣습니다."""
+        with self._pending_cond:
+            self._pending[session_id] = (last_access, summary, first_seq, turns)
+            if len(self._pending) >= self.batch_size:
+                self._pending_cond.notify()
+
+    def delete(self, session_id):
+        """세션 삭제를 기록 대기열에 넣습니다."""
+        with self._pending_cond:
+            self._pending[session_id] = None
+
+    def delete_idle(self, cutoff):
+        """마지막 사용 시각이 cutoff 이전인 세션의 삭제를 기록 대기열에 넣습니다."""
+        with self._pending_cond:
+            self._idle_cutoff = cutoff if self._idle_cutoff is None else max(self._idle_cutoff, cutoff)
+
+    def load(self, session_id):
+        """
+        세션을 읽습니다. 기록 대기 중인 변경이 있으면 그 상태를 반환합니다.
+
+        Returns:
+            tuple: (last_access, summary, first_seq, [(user, bot), ...]) 또는 없으면 None.
+        """
+        with self._pending_cond:
+            if session_id in self._pending:
+                return self._pending[session_id]
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT last_access, summary, first_seq FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            turns = self._conn.execute(
+                "SELECT user, bot FROM turns WHERE session_id = ? AND seq >= ? ORDER BY seq",
+                (session_id, row[2]),
+            ).fetchall()
+        return row[0], row[1], row[2], turns
+
+    def flush(self):
+        """기록 대기 중인 변경을 한 트랜잭션으로 기록합니다."""
+        # 대기열을 비우는 동안 load()가 데이터베이스의 이전 상태를 읽지 않도록 db 잠금을 먼저 잡습니다.
+        with self._db_lock:
+            with self._pending_cond:
+                pending, self._pending = self._pending, {}
+                cutoff, self._idle_cutoff = self._idle_cutoff, None
+            if not pending and cutoff is None:
+                return
+            self._write(pending, cutoff)
+            self.batches += 1
+
+    def _write(self, pending, cutoff):
+        conn = self._conn
+        conn.execute("BEGIN")
+        try:
+            if cutoff is not None:
+                conn.execute("DELETE FROM turns WHERE session_id IN "
+                             "(SELECT session_id FROM sessions WHERE last_access < ?)", (cutoff,))
+                conn.execute("DELETE FROM sessions WHERE last_access < ?", (cutoff,))
+            deleted = [(session_id,) for session_id, state in pending.items() if state is None]
+            conn.executemany("DELETE FROM turns WHERE session_id = ?", deleted)
+            conn.executemany("DELETE FROM sessions WHERE session_id = ?", deleted)
+
+            saved = [(session_id, state) for session_id, state in pending.items() if state is not None]
+            conn.executemany(
+                "INSERT OR REPLACE INTO sessions (session_id, summary, first_seq, last_access) VALUES (?, ?, ?, ?)",
+                [(session_id, summary, first_seq, last_access)
+                 for session_id, (last_access, summary, first_seq, _) in saved],
+            )
+            # 요약으로 접혀 메모리에서 밀려난 턴 삭제
+            conn.executemany(
+                "DELETE FROM turns WHERE session_id = ? AND seq < ?",
+                [(session_id, first_seq) for session_id, (_, _, first_seq, _) in saved],
+            )
+            # 턴은 추가된 뒤 바뀌지 않으므로 이미 기록된 턴은 건너뜁니다.
+            conn.executemany(
+                "INSERT OR IGNORE INTO turns (session_id, seq, user, bot) VALUES (?, ?, ?, ?)",
+                [(session_id, first_seq + index, user, bot)
+                 for session_id, (_, _, first_seq, turns) in saved
+                 for index, (user, bot) in enumerate(turns)],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _run(self):
+        while True:
+            with self._pending_cond:
+                self._pending_cond.wait_for(
+                    lambda: self._closed or len(self._pending) >= self.batch_size,
+                    timeout=self.flush_interval,
+                )
+                closed = self._closed
+            try:
+                self.flush()
+            except sqlite3.Error as err:
+                print(f"세션 기록 중 오류 발생: {err}")
+            if closed:
+                return
+
+    def close(self):
+        """대기 중인 변경을 기록하고 연결을 닫습니다."""
+        with self._pending_cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._pending_cond.notify()
+        self._writer.join()
+        with self._db_lock:
+            self._conn.close()
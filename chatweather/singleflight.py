@@ -0,0 +1,135 @@
+import threading
+
+from chatweather import metrics
+
+
+class _Call:
+    """진행 중인 동기 호출 하나의 결과를 기다리는 호출자들이 공유하는 상태."""
+
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    같은 키로 동시에 들어온 호출을 하나로 합치는 객체.
+
+    키에 해당하는 호출이 진행 중이면 새 호출은 함수를 다시 실행하지 않고
+    진행 중인 호출의 결과를 함께 받습니다. 예외가 발생하면 기다리던 호출자 모두에게 같은 예외가 전달됩니다.
+    호출이 끝나면 키는 바로 제거되므로 결과를 보관하지 않습니다. (결과 보관은 캐시의 역할)
+
+    스레드 호출자는 do(), asyncio 호출자는 do_async()를 사용합니다.
+    두 방식의 호출은 서로 합쳐지지 않습니다.
+
+    Args:
+        name (str, optional): 지표 이름. 지정하면 호출이 합쳐졌는지 여부를
+            metrics.record_cache(name, shared)로 기록합니다.
+    """
+
+    def __init__(self, name=None):
+        self.name = name
+        self._calls = {}
+        self._tasks = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.shared = 0
+
+    def _record(self, shared):
+        with self._lock:
+            if shared:
+                self.shared += 1
+            else:
+                self.leaders += 1
+        if self.name is not None:
+            metrics.record_cache(self.name, shared)
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        같은 키의 호출이 진행 중이면 그 결과를 기다려 반환하고, 아니면 fn(*args, **kwargs)를 실행합니다.
+
+        Args:
+            key: 합칠 호출을 구분하는 키 (해시 가능해야 함).
+            fn (callable): 실행할 함수.
+
+        Returns:
+            fn의 반환값.
+
+        Raises:
+            fn에서 발생한 예외.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        self._record(not leader)
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as err:
+            call.error = err
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key, fn, *args, **kwargs):
+        """
+        do()의 asyncio 버전. fn은 코루틴 함수입니다.
+
+        fn은 별도 태스크로 실행되므로, 기다리던 호출자 하나가 취소되어도
+        다른 호출자가 기다리는 요청은 취소되지 않습니다.
+        """
+        # 이벤트 루프 안에서만 호출되므로 asyncio는 이미 임포트되어 있습니다. (모듈 임포트 시간 절약)
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        # 태스크는 이벤트 루프에 묶여 있으므로 루프별로 따로 합칩니다.
+        task_key = (loop, key)
+        task = self._tasks.get(task_key)
+        shared = task is not None
+        if not shared:
+            task = loop.create_task(fn(*args, **kwargs))
+            self._tasks[task_key] = task
+            task.add_done_callback(lambda done: self._finish_task(task_key, done))
+        self._record(shared)
+        return await asyncio.shield(task)
+
+    def _finish_task(self, task_key, task):
+        self._tasks.pop(task_key, None)
+        # 기다리던 호출자가 모두 취소된 경우 'exception was never retrieved' 경고를 막습니다.
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight(self):
+        """진행 중인 호출 수를 반환합니다."""
+        with self._lock:
+            return len(self._calls) + len(self._tasks)
+
+    def stats(self):
+        """
+        호출 통계를 반환합니다.
+
+        Returns:
+            dict: leaders(실제로 실행한 호출 수), shared(진행 중인 호출에 합쳐진 호출 수) 키를 포함하는 딕셔너리.
+        """
+        with self._lock:
+            return {'leaders': self.leaders, 'shared': self.shared}
+
+    def clear_stats(self):
+        """통계를 초기화합니다."""
+        with self._lock:
+            self.leaders = 0
+            self.shared = 0
@@ -0,0 +1,198 @@
+import re
+import threading
+import time
+
+from chatweather import metrics
+from chatweather.fastpath import mentioned_cities, mentioned_days
+
+# 추측할 단서가 없을 때의 도시 (추출 프롬프트의 기본값과 같음)
+DEFAULT_CITY = 'Seoul'
+# 추측한 날씨를 가져오는 스레드 수
+SPECULATION_MAX_WORKERS = 8
+
+# 상대 날짜 단어가 없어도 오늘이 아닌 날짜를 가리키는 표현 (예: '다음주 화요일', '이번 주말', '11월 3일')
+_FUTURE_RE = re.compile(r"다음|주말|요일|\d+\s*(월|일)")
+
+# 추측 결과 (metrics의 outcome 레이블)
+OUTCOME_HIT = "hit"
+OUTCOME_MISS = "miss"
+
+_enabled = False
+_executor = None
+_lock = threading.Lock()
+_hits = 0
+_misses = 0
+_saved_seconds = 0.0
+
+
+def set_speculation(enabled):
+    """추출과 동시에 날씨를 미리 가져오는 추측 모드를 켜거나 끕니다. 기본값은 꺼져 있습니다."""
+    global _enabled
+    _enabled = enabled
+
+
+def speculation_enabled():
+    """추측 모드가 켜져 있는지 반환합니다."""
+    return _enabled
+
+
+def guess_city(query, conversation_history=()):
+    """
+    질의의 날씨 도시를 추측합니다.
+
+    질의에 한국어(또는 영어) 도시 이름이 하나만 있으면 그 도시, 없으면 가장 최근 턴에서 언급된 도시,
+    그것도 없으면 DEFAULT_CITY를 반환합니다. 도시가 여러 개 언급되면 추측하지 않습니다.
+
+    Args:
+        query (str): 사용자의 질의 문장.
+        conversation_history (ConversationHistory or list): 이전 대화 기록.
+
+    Returns:
+        str: 추측한 도시 이름 (영어) 또는 추측할 수 없으면 None.
+    """
+    cities = mentioned_cities(query)
+    if cities:
+        return cities[0] if len(cities) == 1 else None
+    for turn in reversed(list(conversation_history)):
+        for text in (turn['user'], turn['bot']):
+            cities = mentioned_cities(text or "")
+            if len(cities) == 1:
+                return cities[0]
+    return DEFAULT_CITY
+
+
+def guess_endpoint(query):
+    """
+    질의가 사용할 날씨 API를 추측합니다.
+
+    오늘이거나 날짜 언급이 없으면 현재 날씨('weather'), 다른 날짜가 언급되면 예보('forecast')입니다.
+    """
+    days = mentioned_days(query)
+    if days:
+        return 'weather' if days == [0] else 'forecast'
+    return 'forecast' if _FUTURE_RE.search(query) else 'weather'
+
+
+class Speculation:
+    """
+    추출과 동시에 시작한 날씨 요청.
+
+    추측한 도시와 API의 날씨를 캐시에 채우며, 추출 결과가 추측과 같으면 wait()으로 그 요청을 기다려 사용합니다.
+
+    Attributes:
+        city (str): 추측한 도시 이름.
+        endpoint (str): 추측한 날씨 API ('weather' 또는 'forecast').
+    """
+
+    def __init__(self, city, endpoint, future, started_at):
+        self.city = city
+        self.endpoint = endpoint
+        self.future = future
+        self.started_at = started_at
+        self.finished_at = None
+
+    def matches(self, city, endpoint):
+        """추출한 도시와 API가 추측과 같으면 True를 반환합니다."""
+        return self.city == city and self.endpoint == endpoint
+
+    def resolve(self, city, endpoint, deadline=None):
+        """
+        추출 결과로 추측을 확인하고 기록합니다.
+
+        추측이 맞으면 진행 중인 요청을 (deadline의 남은 시간까지) 기다려, 이어지는 날씨 조회가 캐시에서 끝나게 합니다.
+        절약한 시간은 추출과 날씨 요청이 겹친 시간입니다. 추측이 틀리면 결과를 기다리지 않고 버립니다.
+
+        Args:
+            city (str): 추출한 도시 이름.
+            endpoint (str): 추출한 날짜가 사용하는 날씨 API.
+            deadline (Deadline, optional): 턴의 제한 시간.
+
+        Returns:
+            bool: 추측이 맞았으면 True.
+        """
+        if not self.matches(city, endpoint):
+            _record(OUTCOME_MISS, 0.0)
+            return False
+        extracted_at = time.perf_counter()
+        try:
+            self.future.result(timeout=None if deadline is None else deadline.remaining())
+        except Exception:
+            # 실패나 시간 초과는 이어지는 날씨 조회가 일반 경로로 처리
+            pass
+        finished_at = self.finished_at or time.perf_counter()
+        _record(OUTCOME_HIT, max(0.0, min(extracted_at, finished_at) - self.started_at))
+        return True
+
+
+def start(city, endpoint, fetch, *args):
+    """
+    추측한 날씨 요청 fetch(*args)를 백그라운드 스레드에서 시작합니다.
+
+    Args:
+        city (str): 추측한 도시 이름.
+        endpoint (str): 추측한 날씨 API.
+        fetch (callable): 날씨를 캐시에 채우는 함수 (예: weather.load_forecast_weather).
+        *args: fetch에 전달할 인자.
+
+    Returns:
+        Speculation: 시작한 요청.
+    """
+    started_at = time.perf_counter()
+    speculation = Speculation(city, endpoint, None, started_at)
+
+    def run():
+        try:
+            return fetch(*args)
+        finally:
+            speculation.finished_at = time.perf_counter()
+
+    speculation.future = _get_executor().submit(run)
+    return speculation
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+
+                _executor = ThreadPoolExecutor(max_workers=SPECULATION_MAX_WORKERS, thread_name_prefix="speculate")
+    return _executor
+
+
+def _record(outcome, saved):
+    global _hits, _misses, _saved_seconds
+    with _lock:
+        if outcome == OUTCOME_HIT:
+            _hits += 1
+            _saved_seconds += saved
+        else:
+            _misses += 1
+    metrics.record_speculation(outcome, saved)
+
+
+def get_speculation_stats():
+    """
+    추측 통계를 반환합니다.
+
+    Returns:
+        dict: hits, misses, hit_rate, saved_seconds(추출과 겹쳐 줄인 날씨 조회 시간의 합) 키를 포함하는 딕셔너리.
+    """
+    with _lock:
+        total = _hits + _misses
+        return {
+            'hits': _hits,
+            'misses': _misses,
+            'hit_rate': _hits / total if total else 0.0,
+            'saved_seconds': round(_saved_seconds, 6),
+        }
+
+
+def reset_speculation_stats():
+    """추측 통계를 초기화합니다."""
+    global _hits, _misses, _saved_seconds
+    with _lock:
+        _hits = 0
+        _misses = 0
+        _saved_seconds = 0.0
@@ -0,0 +1,141 @@
+import random
+from datetime import datetime
+
+from chatweather.fastpath import CITY_GAZETTEER
+from chatweather.weather_api_datetime import get_current_datetime
+
+# 영어 도시 이름 -> 답변에 사용할 한국어 이름 (CITY_GAZETTEER에서 처음 나오는 이름)
+KOREAN_CITY_NAMES = {}
+for _korean, _english in CITY_GAZETTEER.items():
+    KOREAN_CITY_NAMES.setdefault(_english, _korean)
+
+# 하늘 상태 설명에 포함된 단어 -> 날씨 분류 (먼저 일치하는 항목 우선)
+CONDITION_KEYWORDS = (
+    ('thunder', ('천둥', '뇌우', 'thunder')),
+    ('snow', ('눈', '진눈깨비', 'snow', 'sleet')),
+    ('rain', ('비', '소나기', '이슬', 'rain', 'drizzle', 'shower')),
+    ('fog', ('안개', '박무', '연무', '황사', 'mist', 'fog', 'haze', 'dust')),
+    ('cloudy', ('흐림', '구름', 'cloud', 'overcast')),
+    ('clear', ('맑음', 'clear', 'sun')),
+)
+
+# 날씨 분류별 문장
+CONDITION_PHRASES = {
+    'clear': ("맑은 하늘이 예상돼요.", "화창한 날씨예요.", "구름 없이 맑아요."),
+    'cloudy': ("구름이 끼어 있어요.", "하늘이 다소 흐려요.", "구름이 많은 날씨예요."),
+    'rain': ("비 소식이 있으니 우산을 챙기세요.", "비가 올 수 있으니 우산을 준비하세요."),
+    'snow': ("눈이 올 수 있으니 미끄럼에 주의하세요.", "눈 소식이 있어요. 따뜻하게 입고 빙판길을 조심하세요."),
+    'thunder': ("천둥번개가 칠 수 있으니 실외 활동을 조심하세요.",),
+    'fog': ("안개가 끼어 시야가 좋지 않을 수 있으니 운전에 주의하세요.", "공기가 뿌옇게 흐릴 수 있어요."),
+    'unknown': ("",),
+}
+
+# (상한 기온, 문장). 기온이 상한보다 낮은 첫 구간을 사용합니다.
+TEMPERATURE_BANDS = (
+    (-5, ("매우 추우니 두꺼운 외투를 꼭 챙기세요.", "한파 수준의 추위예요. 보온에 신경 쓰세요.")),
+    (5, ("꽤 추우니 따뜻하게 입으세요.", "쌀쌀하니 외투를 챙기세요.")),
+    (12, ("쌀쌀한 편이니 겉옷을 챙기세요.", "조금 서늘하니 가벼운 외투가 좋겠어요.")),
+    (20, ("선선해서 활동하기 좋아요.", "산책하기 좋은 기온이에요.")),
+    (27, ("따뜻하고 포근해요.", "가볍게 입기 좋은 날씨예요.")),
+    (31, ("더운 편이니 시원하게 입으세요.", "덥고 후텁지근할 수 있어요.")),
+    (None, ("무더우니 물을 자주 마시고 한낮 외출은 피하세요.", "폭염 수준이니 온열 질환에 주의하세요.")),
+)
+
+# (시작 시각, 시간대 이름)
+TIMES_OF_DAY = ((0, "새벽"), (6, "아침"), (11, "낮"), (17, "저녁"), (21, "밤"))
+
+RELATIVE_DAY_NAMES = {0: "오늘", 1: "내일", 2: "모레"}
+
+ANSWER_TEMPLATES = (
+    "{when} {city}의 날씨는 {sky}, 기온은 {temp}도입니다. {condition} {band}",
+    "{city}의 {when} 날씨를 알려드릴게요. {sky}이고 기온은 {temp}도예요. {condition} {band}",
+    "{city} {when} 날씨: {sky}, 기온 {temp}도. {condition} {band}",
+)
+
+
+def classify_condition(sky):
+    """하늘 상태 설명을 날씨 분류('clear', 'cloudy', 'rain', 'snow', 'thunder', 'fog', 'unknown')로 변환합니다."""
+    text = (sky or "").lower()
+    for condition, keywords in CONDITION_KEYWORDS:
+        if any(keyword in text for keyword in keywords):
+            return condition
+    return 'unknown'
+
+
+def temperature_phrases(temp):
+    """기온 구간에 맞는 문장 목록을 반환합니다."""
+    for upper, phrases in TEMPERATURE_BANDS:
+        if upper is None or temp < upper:
+            return phrases
+    return TEMPERATURE_BANDS[-1][1]
+
+
+def time_of_day(hour):
+    """시각(시)의 시간대 이름을 반환합니다."""
+    name = TIMES_OF_DAY[0][1]
+    for start, period in TIMES_OF_DAY:
+        if hour >= start:
+            name = period
+    return name
+
+
+def _as_datetime(date_time):
+    if isinstance(date_time, datetime):
+        return date_time
+    try:
+        return datetime.strptime(str(date_time), "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return None
+
+
+def describe_when(date_time, now=None):
+    """
+    날짜시간을 '오늘 저녁', '내일 아침 9시'와 같은 표현으로 변환합니다.
+
+    Args:
+        date_time (datetime or str): 날씨의 날짜시간.
+        now (datetime, optional): 현재 시간. 기본값은 get_current_datetime().
+
+    Returns:
+        str: 날짜시간 표현.
+    """
+    target = _as_datetime(date_time)
+    if target is None:
+        return str(date_time)
+    now = now or get_current_datetime()
+    days = (target.date() - now.date()).days
+    day = RELATIVE_DAY_NAMES.get(days, f"{target.month}월 {target.day}일")
+    if days == 0 and abs((target - now).total_seconds()) < 60 * 60:
+        # 현재 날씨
+        return "지금"
+    return f"{day} {time_of_day(target.hour)} {target.hour % 12 or 12}시"
+
+
+def render_weather_answer(city, temp, sky, date_time, now=None, rng=random):
+    """
+    LLM 없이 날씨 정보로 한국어 답변을 생성합니다.
+
+    날씨 분류, 기온 구간, 시간대에 따라 문장이 달라지며, 같은 조건에서도 여러 표현 중 하나를 고릅니다.
+
+    Args:
+        city (str): 도시 이름 (영어).
+        temp (float): 기온.
+        sky (str): 하늘 상태.
+        date_time (datetime or str): 날씨의 날짜시간.
+        now (datetime, optional): 현재 시간. 기본값은 get_current_datetime().
+        rng (random.Random, optional): 표현을 고를 난수 생성기.
+
+    Returns:
+        str: 답변 문장.
+    """
+    condition = rng.choice(CONDITION_PHRASES[classify_condition(sky)])
+    band = rng.choice(temperature_phrases(temp))
+    answer = rng.choice(ANSWER_TEMPLATES).format(
+        when=describe_when(date_time, now),
+        city=KOREAN_CITY_NAMES.get(city, city),
+        sky=sky,
+        temp=round(temp, 1),
+        condition=condition,
+        band=band,
+    )
+    return " ".join(answer.split())
@@ -0,0 +1,126 @@
+import random
+import time
+
+from chatweather.deadline import STAGE_WEATHER, exceeded
+from chatweather.ratelimit import parse_retry_after
+
+# 재시도 대상 HTTP 상태 코드 (요청 한도 초과 및 서버 오류)
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+def backoff_delay(attempt, base, maximum):
+    """재시도 횟수에 따른 지터가 있는 지수 백오프 대기 시간(초)을 반환합니다. (full jitter)"""
+    return random.uniform(0, min(maximum, base * (2 ** attempt)))
+
+
+def retry_delay(response, attempt, base, maximum):
+    """
+    재시도 대상 응답의 대기 시간(초)을 반환합니다.
+
+    429/503 응답에 Retry-After가 있으면 그 시간 이상 기다리며,
+    Retry-After가 최대 대기 시간보다 길면 재시도하지 않도록 None을 반환합니다.
+    """
+    delay = backoff_delay(attempt, base, maximum)
+    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+    if retry_after is None:
+        return delay
+    if retry_after > maximum:
+        return None
+    return max(delay, retry_after)
+
+
+class HTTPTransport:
+    """
+    연결 풀과 keep-alive를 사용하는 HTTP 전송 객체.
+
+    하나의 requests.Session을 공유하여 TCP/TLS 연결을 재사용하고,
+    모든 요청에 연결/읽기 타임아웃을 적용하며,
+    429 및 5xx 응답과 연결 오류에 대해 지터가 있는 지수 백오프로 재시도합니다.
+    응답에 Retry-After가 있으면 그 시간 이상 기다립니다.
+
+    Args:
+        pool_size (int, optional): 호스트당 유지할 연결 수. 기본값은 10.
+        connect_timeout (float, optional): 연결 타임아웃(초). 기본값은 3.05.
+        read_timeout (float, optional): 읽기 타임아웃(초). 기본값은 10.
+        max_retries (int, optional): 최대 재시도 횟수. 기본값은 2.
+        backoff_base (float, optional): 백오프 기본 대기 시간(초). 기본값은 0.5.
+        backoff_max (float, optional): 백오프 최대 대기 시간(초). 기본값은 8.
+        session (requests.Session, optional): 사용할 세션. 없으면 새로 생성합니다.
+    """
+
+    def __init__(self, pool_size=10, connect_timeout=3.05, read_timeout=10,
+                 max_retries=2, backoff_base=0.5, backoff_max=8.0, session=None):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        if session is None:
+            # requests는 임포트 비용이 크므로 전송 객체를 만들 때 임포트합니다.
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
+
+    def backoff(self, attempt):
+        """재시도 횟수에 따른 대기 시간(초)을 반환합니다."""
+        return backoff_delay(attempt, self.backoff_base, self.backoff_max)
+
+    def get(self, url, params=None, deadline=None):
+        """
+        GET 요청을 보내고 응답을 반환합니다.
+
+        재시도 대상 상태 코드는 재시도 횟수를 모두 사용한 뒤의 마지막 응답을 그대로 반환하므로,
+        호출자는 기존과 같이 raise_for_status()로 오류를 처리할 수 있습니다.
+
+        Args:
+            url (str): 요청 URL.
+            params (dict, optional): 쿼리 파라미터.
+            deadline (Deadline, optional): 턴의 제한 시간. 각 시도의 타임아웃을 남은 시간으로 줄이고,
+                남은 시간 안에 끝날 수 없는 재시도는 하지 않습니다.
+
+        Returns:
+            requests.Response: HTTP 응답.
+
+        Raises:
+            requests.exceptions.RequestException: 재시도 후에도 연결에 실패한 경우.
+            DeadlineExceeded: 제한 시간이 지난 경우.
+        """
+        import requests
+
+        attempt = 0
+        while True:
+            if deadline is None:
+                timeout = (self.connect_timeout, self.read_timeout)
+            else:
+                deadline.check(STAGE_WEATHER)
+                timeout = (deadline.timeout(self.connect_timeout), deadline.timeout(self.read_timeout))
+            try:
+                response = self.session.get(url, params=params, timeout=timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as err:
+                if deadline is not None and deadline.expired():
+                    raise exceeded(STAGE_WEATHER) from err
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.backoff(attempt)
+                if deadline is not None and delay >= deadline.remaining():
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                    return response
+                delay = retry_delay(response, attempt, self.backoff_base, self.backoff_max)
+                if delay is None or (deadline is not None and delay >= deadline.remaining()):
+                    # Retry-After가 너무 길거나 제한 시간 안에 재시도할 수 없으면 응답을 그대로 반환
+                    return response
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def close(self):
+        """세션과 풀의 연결을 닫습니다."""
+        self.session.close()
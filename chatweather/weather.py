@@ -1,24 +1,208 @@
-import requests
+import json
+import time
+from collections import namedtuple
 from datetime import datetime
+from chatweather import geocode, hedging, metrics, ratelimit
+from chatweather.cache import TTLCache
+from chatweather.config import get_weather_api_base_url
+from chatweather.deadline import STAGE_WEATHER, DeadlineExceeded
+from chatweather.forecast_table import LOOKUP_INTERPOLATE, ForecastTable
+from chatweather.ratelimit import UPSTREAM_WEATHER, ThrottledError
+from chatweather.singleflight import SingleFlight
 from chatweather.weather_api_datetime import get_current_datetime, set_api_datetime
 
-def forecast(params):
+# OpenWeatherMap 예보는 3시간 단위로 갱신됩니다.
+FORECAST_UPDATE_INTERVAL = 3 * 60 * 60
+# 현재 날씨는 약 10분 단위로 갱신됩니다.
+CURRENT_WEATHER_TTL = 10 * 60
+WEATHER_CACHE_SIZE = 256
+# forecast_many의 기본 동시 요청 수 (HTTPTransport 기본 연결 풀 크기 이하)
+BATCH_MAX_WORKERS = 8
+
+# 예보 슬롯 조회 방식 ('exact', 'nearest', 'interpolate')
+FORECAST_LOOKUP_METHOD = LOOKUP_INTERPOLATE
+
+NOT_FOUND_MESSAGE = "지정된 날짜와 시간에 대한 예보를 찾을 수 없습니다."
+
+# forecast_many의 항목별 결과. 실패한 항목은 error에 오류 메시지를 담습니다.
+ForecastResult = namedtuple('ForecastResult', ['temp', 'sky', 'date_time', 'error'])
+
+# (city, units, lang) 키의 캐시. city는 도시 색인의 정식 이름입니다. (canonical_city)
+_forecast_cache = TTLCache(maxsize=WEATHER_CACHE_SIZE, ttl=FORECAST_UPDATE_INTERVAL)
+_current_cache = TTLCache(maxsize=WEATHER_CACHE_SIZE, ttl=CURRENT_WEATHER_TTL)
+
+# 캐시가 비어 있을 때 같은 (endpoint, city, units, lang) 요청이 몰리면 하나의 API 요청으로 합칩니다.
+# 스레드 호출자는 do(), aio 모듈은 do_async()를 사용합니다.
+weather_flights = SingleFlight(name='weather_inflight')
+
+# 모든 OpenWeatherMap 요청이 공유하는 전송 객체 (최초 사용 시 생성)
+_transport = None
+
+# 같은 호스트의 여러 프로세스가 공유하는 디스크 캐시 (configure_disk_cache()로 설정, 기본값은 사용 안 함)
+_disk_cache = None
+
+# forecast() 호출마다 observer(city, api_key, lang, units)로 호출되는 함수.
+# PrefetchScheduler가 도시별 요청 빈도를 집계하는 데 사용합니다.
+_request_observer = None
+
+
+def get_transport():
+    """날씨 API 요청에 사용하는 공유 전송 객체를 반환합니다."""
+    global _transport
+    if _transport is None:
+        # requests는 임포트 비용이 크므로 첫 요청 때 임포트합니다.
+        from chatweather.transport import HTTPTransport
+        _transport = HTTPTransport()
+    return _transport
+
+
+def _http_error():
     """
-    주어진 파라미터를 기반으로 날씨 정보를 가져옵니다.
+    requests의 HTTPError 클래스를 반환합니다.
+
+    except 절은 예외가 발생했을 때만 평가되므로, 모듈 임포트 시점에 requests를 임포트하지 않아도 됩니다.
+    """
+    import requests
+    return requests.exceptions.HTTPError
+
+
+def set_transport(transport):
+    """
+    날씨 API 요청에 사용할 전송 객체를 교체합니다.
+
+    테스트나 벤치마크에서 로컬 대체 서버용 전송 객체를 주입할 때 사용합니다.
 
     Args:
-        params (dict): 다음 키를 포함하는 딕셔너리:
-            - 'city' (str): 도시 이름 (기본값 'Seoul').
-            - 'serviceKey' (str): OpenWeatherMap의 API 키.
-            - 'lang' (str): 언어 코드 (기본값 'kr').
-            - 'units' (str): 측정 단위 (기본값 'metric').
-            - 'target_date' (str): 'YYYYMMDDHHMMSS' 형식의 대상 날짜.
+        transport: get(url, params=None) 메서드를 제공하는 객체. None이면 기본 전송 객체로 되돌립니다.
+            턴의 제한 시간이 있는 요청에는 deadline 키워드 인자도 전달합니다.
 
     Returns:
-        tuple: (기온, 하늘 상태, 날짜시간) 또는 에러 발생 시 (None, None, None).
+        이전 전송 객체.
+    """
+    global _transport
+    previous = _transport
+    _transport = transport
+    return previous
+
+
+def set_disk_cache(cache):
+    """
+    메모리 캐시 다음 단계로 사용할 디스크 캐시를 설정합니다.
+
+    Args:
+        cache (DiskCache): 디스크 캐시. None이면 디스크 캐시를 사용하지 않습니다.
+
+    Returns:
+        이전 디스크 캐시.
+    """
+    global _disk_cache
+    previous = _disk_cache
+    _disk_cache = cache
+    return previous
+
+
+def configure_disk_cache(path):
+    """
+    path의 SQLite 파일을 디스크 캐시로 사용합니다. 같은 파일을 사용하는 프로세스는 캐시를 공유합니다.
+
+    Returns:
+        DiskCache: 설정된 디스크 캐시.
+    """
+    from chatweather.disk_cache import DiskCache
+
+    cache = DiskCache(path)
+    set_disk_cache(cache)
+    return cache
+
+
+def set_request_observer(observer):
+    """
+    forecast() 호출을 전달받을 함수를 설정합니다.
+
+    Args:
+        observer (callable): observer(city, api_key, lang, units)로 호출되는 함수. None이면 해제합니다.
+
+    Returns:
+        이전 함수.
+    """
+    global _request_observer
+    previous = _request_observer
+    _request_observer = observer
+    return previous
+
+
+def notify_request(city, api_key, lang, units):
+    """설정된 observer에 날씨 요청을 알립니다. observer의 오류는 요청 처리에 영향을 주지 않습니다."""
+    observer = _request_observer
+    if observer is None:
+        return
+    try:
+        observer(city, api_key, lang, units)
+    except Exception as err:
+        print(f"요청 observer 실행 중 오류 발생: {err}")
+
+
+def canonical_city(city):
     """
+    도시 이름을 도시 색인(geocode)의 정식 이름으로 바꿉니다. 색인에 없으면 그대로 반환합니다.
+
+    'Busan', 'Pusan', '부산'처럼 다르게 쓴 이름이 같은 캐시 키와 요청을 사용하도록 캐시 키와 요청 빈도 집계에 사용합니다.
+    """
+    location = geocode.lookup(city)
+    return city if location is None else location.name
+
+
+def next_forecast_update(now=None):
+    """
+    다음 예보 갱신 시각(epoch 초)을 반환합니다.
+
+    예보는 UTC 기준 0, 3, 6, ... 21시에 갱신되므로 다음 3시간 경계를 계산합니다.
+
+    Args:
+        now (float, optional): 기준 시각(epoch 초). 기본값은 현재 시각.
+
+    Returns:
+        float: 다음 갱신 시각(epoch 초).
+    """
+    if now is None:
+        now = time.time()
+    return (now // FORECAST_UPDATE_INTERVAL + 1) * FORECAST_UPDATE_INTERVAL
+
+
+def get_cache_stats():
+    """예보/현재 날씨 캐시의 통계를 반환합니다. 디스크 캐시를 사용하면 disk 키에 그 통계를 포함합니다."""
+    stats = {
+        'forecast': _forecast_cache.stats(),
+        'current': _current_cache.stats(),
+        'inflight': weather_flights.stats(),
+    }
+    if _disk_cache is not None:
+        stats['disk'] = _disk_cache.stats()
+    return stats
+
+
+def cache_expires_at(endpoint, city, units, lang):
+    """
+    캐시 항목의 만료 시각(epoch 초)을 반환합니다. 캐시에 없으면 None을 반환합니다.
+
+    Args:
+        endpoint (str): 'weather'(현재 날씨) 또는 'forecast'(예보).
+    """
+    cache = _current_cache if endpoint == 'weather' else _forecast_cache
+    return cache.expires_at((canonical_city(city), units, lang))
+
+
+def clear_weather_cache():
+    """예보/현재 날씨 캐시를 비웁니다."""
+    _forecast_cache.clear()
+    _current_cache.clear()
+    weather_flights.clear_stats()
+
+
+def _parse_params(params):
+    """forecast() 파라미터를 검증합니다. 잘못된 경우 오류 메시지와 함께 ValueError를 발생시킵니다."""
     # 기본값과 함께 파라미터 추출
-    city = params.get('city', 'Seoul')
+    city = canonical_city(params.get('city', 'Seoul'))
     api_key = params.get('serviceKey')
     lang = params.get('lang', 'kr')
     units = params.get('units', 'metric')
@@ -26,85 +210,439 @@ def forecast(params):
 
     # 필수 파라미터 검증
     if not api_key:
-        print("Error: API 키 ('serviceKey')가 필요합니다.")
-        return None, None, None
+        raise ValueError("Error: API 키 ('serviceKey')가 필요합니다.")
 
     if not target_date_str:
-        print("Error: 'target_date' 파라미터가 필요합니다.")
-        return None, None, None
+        raise ValueError("Error: 'target_date' 파라미터가 필요합니다.")
 
     # 대상 날짜 파싱
     try:
         target_date = datetime.strptime(target_date_str, "%Y%m%d%H%M%S")
     except ValueError as ve:
-        print(f"Error: 'target_date' 파싱 중 오류 발생: {ve}")
-        return None, None, None
+        raise ValueError(f"Error: 'target_date' 파싱 중 오류 발생: {ve}")
 
     api_datetime = set_api_datetime(target_date)
-    today = get_current_datetime().date()
+    return city, api_key, lang, units, target_date, api_datetime
+
+
+def parse_forecast_params(params):
+    """
+    forecast() 파라미터를 검증하고 요청에 필요한 값으로 변환합니다.
+
+    Args:
+        params (dict): forecast()와 같은 형식의 파라미터.
+
+    Returns:
+        tuple: (city, api_key, lang, units, target_date, api_datetime) 또는 검증 실패 시 None.
+    """
+    try:
+        return _parse_params(params)
+    except ValueError as err:
+        print(err)
+        return None
+
+
+def is_current_request(target_date):
+    """대상 날짜가 오늘이면 현재 날씨 API를, 아니면 예보 API를 사용합니다."""
+    return get_current_datetime().date() == target_date.date()
+
+
+@metrics.timed('forecast')
+def forecast(params, deadline=None):
+    """
+    주어진 파라미터를 기반으로 날씨 정보를 가져옵니다.
+
+    Args:
+        params (dict): 다음 키를 포함하는 딕셔너리:
+            - 'city' (str): 도시 이름 (기본값 'Seoul').
+            - 'serviceKey' (str): OpenWeatherMap의 API 키.
+            - 'lang' (str): 언어 코드 (기본값 'kr').
+            - 'units' (str): 측정 단위 (기본값 'metric').
+            - 'target_date' (str): 'YYYYMMDDHHMMSS' 형식의 대상 날짜.
+        deadline (Deadline, optional): 턴의 제한 시간. 캐시에 없는 날씨는 남은 시간 안에서만 요청합니다.
+
+    Returns:
+        tuple: (기온, 하늘 상태, 날짜시간) 또는 에러 발생 시 (None, None, None).
+
+    Raises:
+        ThrottledError: 요청 한도를 넘어 날씨 정보를 가져오지 못한 경우.
+        DeadlineExceeded: 제한 시간 안에 날씨 정보를 가져오지 못한 경우.
+    """
+    parsed = parse_forecast_params(params)
+    if parsed is None:
+        return None, None, None
+    city, api_key, lang, units, target_date, api_datetime = parsed
+    notify_request(city, api_key, lang, units)
 
     try:
-        if today == target_date.date():
+        if is_current_request(target_date):
             # 현재 날씨 데이터 가져오기
-            return fetch_current_weather(city, api_key, lang, units)
+            return fetch_current_weather(city, api_key, lang, units, deadline=deadline)
         else:
             # 예보 데이터 가져오기
-            return fetch_forecast_weather(city, api_key, lang, units, api_datetime)
+            return fetch_forecast_weather(city, api_key, lang, units, api_datetime, deadline=deadline)
+    except (ThrottledError, DeadlineExceeded):
+        raise
     except Exception as err:
         print(f"예기치 못한 오류 발생: {err}")
         return None, None, None
 
-def fetch_current_weather(city, api_key, lang, units):
-    """지정된 도시의 현재 날씨 데이터를 가져옵니다."""
-    api_url = (
-        f"https://api.openweathermap.org/data/2.5/weather"
-        f"?q={city}&APPID={api_key}&lang={lang}&units={units}"
-    )
+
+def forecast_many(params_list, max_workers=BATCH_MAX_WORKERS):
+    """
+    여러 (도시, 날짜) 요청의 날씨 정보를 한 번에 가져옵니다.
+
+    요청을 (API 종류, 도시, 단위, 언어) 단위로 묶어 도시마다 한 번만 요청하고,
+    같은 응답에서 각 날짜의 날씨를 찾습니다. 요청은 최대 max_workers개의 스레드에서 병렬로 실행됩니다.
+
+    Args:
+        params_list (list): forecast()와 같은 형식의 파라미터 딕셔너리 리스트.
+        max_workers (int, optional): 최대 동시 요청 수. 기본값은 BATCH_MAX_WORKERS.
+
+    Returns:
+        list: 입력 순서와 같은 ForecastResult 리스트. 실패한 항목은 error에 오류 메시지가 담깁니다.
+    """
+    results = [None] * len(params_list)
+    groups = {}
+
+    for index, params in enumerate(params_list):
+        try:
+            city, api_key, lang, units, target_date, api_datetime = _parse_params(params)
+        except ValueError as err:
+            results[index] = ForecastResult(None, None, None, str(err))
+            continue
+        notify_request(city, api_key, lang, units)
+        endpoint = 'weather' if is_current_request(target_date) else 'forecast'
+        group_key = (endpoint, city, units, lang, api_key)
+        groups.setdefault(group_key, []).append((index, api_datetime))
+
+    def load(group_key):
+        endpoint, city, units, lang, api_key = group_key
+        if endpoint == 'weather':
+            return load_current_weather(city, api_key, lang, units)
+        return load_forecast_weather(city, api_key, lang, units)
+
+    if groups:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(groups)))) as executor:
+            futures = {group_key: executor.submit(load, group_key) for group_key in groups}
+
+        for group_key, items in groups.items():
+            endpoint, city = group_key[0], group_key[1]
+            try:
+                data = futures[group_key].result()
+            except ThrottledError as err:
+                for index, _ in items:
+                    results[index] = ForecastResult(None, None, None, str(err))
+                continue
+            except _http_error() as err:
+                error = describe_http_error(err.response, city)
+                for index, _ in items:
+                    results[index] = ForecastResult(None, None, None, error)
+                continue
+            except Exception as err:
+                for index, _ in items:
+                    results[index] = ForecastResult(None, None, None, f"날씨 데이터를 가져오는 중 오류 발생: {err}")
+                continue
+
+            for index, api_datetime in items:
+                if endpoint == 'weather':
+                    temp, sky = data
+                    results[index] = ForecastResult(temp, sky, get_current_datetime(), None)
+                    continue
+                found = lookup_forecast(data, api_datetime)
+                if found is None:
+                    results[index] = ForecastResult(None, None, None, NOT_FOUND_MESSAGE)
+                else:
+                    results[index] = ForecastResult(*found, None)
+
+    return results
+
+
+def build_weather_request(endpoint, city, api_key, lang, units):
+    """
+    OpenWeatherMap 요청 URL과 쿼리 파라미터를 생성합니다.
+
+    도시 색인에 있는 도시는 좌표(lat, lon)로, 없는 도시는 이름(q)으로 요청합니다.
+    좌표로 요청하면 OpenWeatherMap이 이름을 해석하지 않으므로 모호한 이름의 404 응답이 없습니다.
+
+    Args:
+        endpoint (str): 'weather' 또는 'forecast'.
+
+    Returns:
+        tuple: (api_url, query)
+    """
+    api_url = f"{get_weather_api_base_url()}/data/2.5/{endpoint}"
+    location = geocode.lookup(city)
+    metrics.record_cache('geocode', location is not None)
+    if location is None:
+        query = {'q': city}
+    else:
+        query = {'lat': location.lat, 'lon': location.lon}
+    query.update({'APPID': api_key, 'lang': lang, 'units': units})
+    return api_url, query
+
+
+def parse_current_weather(weather_data):
+    """현재 날씨 응답에서 (기온, 하늘 상태)를 추출합니다."""
+    return weather_data['main']['temp'], weather_data['weather'][0]['description']
+
+
+def lookup_forecast(table, api_datetime):
+    """
+    예보 테이블에서 api_datetime의 예보를 찾습니다.
+
+    슬롯과 정확히 일치하지 않으면 FORECAST_LOOKUP_METHOD에 따라 가장 가까운 슬롯을 사용하거나
+    앞뒤 슬롯의 기온을 보간합니다. 예보 범위를 벗어나면 찾지 못한 것으로 처리합니다.
+
+    Args:
+        table (ForecastTable): 예보 테이블.
+        api_datetime (datetime): 조회할 날짜시간.
+
+    Returns:
+        tuple: (기온, 하늘 상태, 날짜시간) 또는 찾지 못한 경우 None.
+    """
+    return table.lookup(api_datetime, FORECAST_LOOKUP_METHOD)
+
+
+def find_forecast(table, api_datetime):
+    """
+    예보 테이블에서 api_datetime의 예보를 찾습니다.
+
+    Returns:
+        tuple: (기온, 하늘 상태, 날짜시간) 또는 찾지 못한 경우 (None, None, None).
+    """
+    found = lookup_forecast(table, api_datetime)
+    if found is None:
+        print(NOT_FOUND_MESSAGE)
+        return None, None, None
+    return found
+
+
+def get_cached_current(city, units, lang):
+    """캐시된 현재 날씨 (기온, 하늘 상태)를 반환합니다. 없으면 None을 반환합니다."""
+    return _current_cache.get((city, units, lang))
+
+
+def store_current(city, units, lang, weather_data):
+    """현재 날씨 응답을 파싱하여 캐시(디스크 캐시 포함)에 저장하고 (기온, 하늘 상태)를 반환합니다."""
+    current = parse_current_weather(weather_data)
+    _current_cache.set((city, units, lang), current)
+    if _disk_cache is not None:
+        _disk_cache.set('weather', _disk_key(city, units, lang), json.dumps(current).encode('utf-8'),
+                        expires_at=_current_cache.expires_at((city, units, lang)))
+    return current
+
+
+def get_cached_forecast(city, units, lang):
+    """캐시된 예보 테이블을 반환합니다. 없으면 None을 반환합니다."""
+    return _forecast_cache.get((city, units, lang))
+
+
+def store_forecast(city, units, lang, weather_data):
+    """예보 응답으로 ForecastTable을 만들어 다음 예보 갱신 시각까지 캐시(디스크 캐시 포함)에 저장하고 반환합니다."""
+    table = ForecastTable.from_list(weather_data['list'])
+    expires_at = next_forecast_update()
+    _forecast_cache.set((city, units, lang), table, expires_at=expires_at)
+    if _disk_cache is not None:
+        _disk_cache.set('forecast', _disk_key(city, units, lang), table.to_bytes(), expires_at=expires_at)
+    return table
+
+
+def _disk_key(city, units, lang):
+    return f"{city}|{units}|{lang}"
+
+
+def load_disk_entry(endpoint, city, units, lang, min_expires_at=None):
+    """
+    디스크 캐시에서 항목을 읽어 메모리 캐시에 같은 만료 시각으로 저장하고 반환합니다.
+
+    Args:
+        endpoint (str): 'weather'(현재 날씨) 또는 'forecast'(예보).
+        min_expires_at (float, optional): 만료 시각이 이보다 이른 항목은 사용하지 않습니다.
+
+    Returns:
+        현재 날씨 (기온, 하늘 상태) 또는 ForecastTable. 디스크 캐시가 없거나 항목이 없으면 None.
+    """
+    cache = _disk_cache
+    if cache is None:
+        return None
+    entry = cache.get(endpoint, _disk_key(city, units, lang))
+    if entry is not None and min_expires_at is not None and entry[2] < min_expires_at:
+        entry = None
+    metrics.record_cache('disk_current' if endpoint == 'weather' else 'disk_forecast', entry is not None)
+    if entry is None:
+        return None
+
+    value, _, expires_at = entry
+    try:
+        if endpoint == 'weather':
+            data = tuple(json.loads(value))
+            _current_cache.set((city, units, lang), data, expires_at=expires_at)
+        else:
+            data = ForecastTable.from_bytes(value)
+            _forecast_cache.set((city, units, lang), data, expires_at=expires_at)
+    except ValueError as err:
+        print(f"디스크 캐시 항목을 읽는 중 오류 발생: {err}")
+        return None
+    return data
+
+
+def raise_for_throttled(response, api_key):
+    """
+    429 응답이면 Retry-After 동안 같은 API 키의 요청을 멈추고 ThrottledError를 발생시킵니다.
+    requests와 httpx 응답을 모두 지원합니다.
+    """
+    if response.status_code != 429:
+        return
+    retry_after = ratelimit.block_for(UPSTREAM_WEATHER, api_key, response.headers.get('Retry-After'))
+    raise ThrottledError(UPSTREAM_WEATHER, retry_after or 0.0)
+
+
+def send_weather_request(endpoint, city, api_key, lang, units, deadline=None):
+    """
+    요청 한도 안에서 OpenWeatherMap API를 호출하고 성공 응답을 반환합니다.
+
+    hedged request를 켜면(hedging.configure_hedging('weather')) 응답이 늦을 때 같은 요청을 한 번 더 보냅니다.
+
+    Raises:
+        ThrottledError: 요청 한도를 넘었거나 429 응답을 받은 경우.
+        DeadlineExceeded: 제한 시간 안에 응답을 받지 못한 경우.
+        requests.exceptions.HTTPError: 그 외의 HTTP 오류 응답을 받은 경우.
+    """
+    api_url, query = build_weather_request(endpoint, city, api_key, lang, units)
+    options = {} if deadline is None else {'deadline': deadline}
+
+    def attempt():
+        ratelimit.acquire(UPSTREAM_WEATHER, api_key)
+        return get_transport().get(api_url, params=query, **options)
+
+    response = hedging.call(UPSTREAM_WEATHER, attempt, deadline=deadline, stage=STAGE_WEATHER)
+    metrics.record_http_status('weather', response.status_code)
+    raise_for_throttled(response, api_key)
+    raise_for_status(response)
+    return response
+
+
+def raise_for_status(response):
+    """HTTP 오류 응답이면 응답 객체를 담은 HTTPError를 발생시킵니다."""
     try:
-        response = requests.get(api_url)
         response.raise_for_status()
-        weather_data = response.json()
-        temp = weather_data['main']['temp']
-        sky = weather_data['weather'][0]['description']
+    except _http_error() as err:
+        if err.response is None:
+            err.response = response
+        raise
+
+
+def load_current_weather(city, api_key, lang, units, deadline=None):
+    """
+    메모리 캐시, 디스크 캐시, API 순서로 현재 날씨 (기온, 하늘 상태)를 가져옵니다.
+    같은 요청이 이미 진행 중이면 새로 요청하지 않고 그 결과를 함께 받습니다.
+
+    Raises:
+        requests.exceptions.HTTPError: HTTP 오류 응답을 받은 경우.
+    """
+    city = canonical_city(city)
+    cached = get_cached_current(city, units, lang)
+    metrics.record_cache('current', cached is not None)
+    if cached is not None:
+        return cached
+    return weather_flights.do(('weather', city, units, lang), fill_current_weather, city, api_key, lang, units,
+                              deadline)
+
+
+def fill_current_weather(city, api_key, lang, units, deadline=None):
+    """메모리 캐시에 없는 현재 날씨를 디스크 캐시 또는 API에서 가져옵니다."""
+    current = load_disk_entry('weather', city, units, lang)
+    if current is not None:
+        return current
+    return request_current_weather(city, api_key, lang, units, deadline=deadline)
+
+
+def request_current_weather(city, api_key, lang, units, deadline=None):
+    """API에서 현재 날씨를 가져와 캐시에 저장하고 (기온, 하늘 상태)를 반환합니다."""
+    response = send_weather_request('weather', city, api_key, lang, units, deadline=deadline)
+    return store_current(city, units, lang, response.json())
+
+
+def load_forecast_weather(city, api_key, lang, units, deadline=None):
+    """
+    메모리 캐시, 디스크 캐시, API 순서로 5일치 예보 테이블을 가져옵니다.
+    같은 요청이 이미 진행 중이면 새로 요청하지 않고 그 결과를 함께 받습니다.
+
+    Raises:
+        requests.exceptions.HTTPError: HTTP 오류 응답을 받은 경우.
+    """
+    city = canonical_city(city)
+    table = get_cached_forecast(city, units, lang)
+    metrics.record_cache('forecast', table is not None)
+    if table is not None:
+        return table
+    return weather_flights.do(('forecast', city, units, lang), fill_forecast_weather, city, api_key, lang, units,
+                              deadline)
+
+
+def fill_forecast_weather(city, api_key, lang, units, deadline=None):
+    """메모리 캐시에 없는 예보 테이블을 디스크 캐시 또는 API에서 가져옵니다."""
+    table = load_disk_entry('forecast', city, units, lang)
+    if table is not None:
+        return table
+    return request_forecast_weather(city, api_key, lang, units, deadline=deadline)
+
+
+def request_forecast_weather(city, api_key, lang, units, deadline=None):
+    """API에서 5일치 예보를 가져와 캐시에 저장하고 ForecastTable을 반환합니다."""
+    response = send_weather_request('forecast', city, api_key, lang, units, deadline=deadline)
+    return store_forecast(city, units, lang, response.json())
+
+
+@metrics.timed('fetch_current_weather')
+def fetch_current_weather(city, api_key, lang, units, deadline=None):
+    """지정된 도시의 현재 날씨 데이터를 가져옵니다. 결과는 CURRENT_WEATHER_TTL 동안 캐시됩니다."""
+    try:
+        temp, sky = load_current_weather(city, api_key, lang, units, deadline=deadline)
         return temp, sky, get_current_datetime()
-    except requests.exceptions.HTTPError:
-        handle_http_error(response, city)
+    except (ThrottledError, DeadlineExceeded):
+        # 요청 한도 초과와 제한 시간 초과는 일반 실패와 구분하여 호출자가 처리
+        raise
+    except _http_error() as err:
+        handle_http_error(err.response, city)
     except Exception as err:
         print(f"현재 날씨 데이터를 가져오는 중 오류 발생: {err}")
     return None, None, None
 
-def fetch_forecast_weather(city, api_key, lang, units, api_datetime):
-    """지정된 도시와 날짜시간의 예보 데이터를 가져옵니다."""
-    api_url = (
-        f"https://api.openweathermap.org/data/2.5/forecast"
-        f"?q={city}&APPID={api_key}&lang={lang}&units={units}"
-    )
+@metrics.timed('fetch_forecast_weather')
+def fetch_forecast_weather(city, api_key, lang, units, api_datetime, deadline=None):
+    """
+    지정된 도시와 날짜시간의 예보 데이터를 가져옵니다.
+
+    5일치 예보 테이블 전체를 다음 예보 갱신 시각까지 캐시하므로,
+    캐시된 범위 안의 다른 날짜시간은 네트워크 요청 없이 조회됩니다.
+    """
     try:
-        response = requests.get(api_url)
-        response.raise_for_status()
-        weather_data = response.json()
-        weather_list = weather_data['list']
-
-        # api_datetime과 일치하는 예보 찾기
-        for item in weather_list:
-            item_datetime = datetime.fromtimestamp(item['dt'])
-            if item_datetime == api_datetime:
-                temp = item['main']['temp']
-                sky = item['weather'][0]['description']
-                return temp, sky, api_datetime
-
-        print("지정된 날짜와 시간에 대한 예보를 찾을 수 없습니다.")
-    except requests.exceptions.HTTPError:
-        handle_http_error(response, city)
+        table = load_forecast_weather(city, api_key, lang, units, deadline=deadline)
+
+        # api_datetime의 예보 찾기
+        return find_forecast(table, api_datetime)
+    except (ThrottledError, DeadlineExceeded):
+        # 요청 한도 초과와 제한 시간 초과는 일반 실패와 구분하여 호출자가 처리
+        raise
+    except _http_error() as err:
+        handle_http_error(err.response, city)
     except Exception as err:
         print(f"예보 데이터를 가져오는 중 오류 발생: {err}")
     return None, None, None
 
-def handle_http_error(response, city):
-    """HTTP 오류를 처리합니다."""
+def describe_http_error(response, city):
+    """HTTP 오류 응답에 대한 오류 메시지를 반환합니다. requests와 httpx 응답을 모두 지원합니다."""
     if response.status_code == 404:
-        print(f"Error: 도시 '{city}'를 찾을 수 없습니다.")
+        return f"Error: 도시 '{city}'를 찾을 수 없습니다."
     elif response.status_code == 401:
-        print("Error: 잘못된 API 키입니다.")
-    else:
-        print(f"HTTP 오류 발생: {response.status_code} {response.reason}")
+        return "Error: 잘못된 API 키입니다."
+    reason = getattr(response, 'reason', None) or getattr(response, 'reason_phrase', '')
+    return f"HTTP 오류 발생: {response.status_code} {reason}"
+
+def handle_http_error(response, city):
+    """HTTP 오류를 처리합니다."""
+    print(describe_http_error(response, city))
@@ -1,7 +1,7 @@
 from chatweather import chatbot
 
 def main():
-    chatbot.chat_loop()
+    chatbot.chat_loop(stream=True)
 
 if __name__ == "__main__":
     main()
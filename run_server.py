@@ -0,0 +1,7 @@
+from chatweather import server
+
+def main():
+    server.main()
+
+if __name__ == "__main__":
+    main()
@@ -14,7 +14,7 @@ setup(
     url="https://github.com/daisybum/pyWeather",
     packages=find_packages(),
     include_package_data=True,
-    package_data={'chatweather': ['config.py', 'config.yaml']},
+    package_data={'chatweather': ['config.py', 'config.yaml', 'cities.tsv']},
     classifiers=[
         "Development Status :: 3 - Alpha",
         "Intended Audience :: Developers",
@@ -29,6 +29,7 @@ setup(
         "requests",
         "xmltodict",
         "openai==1.52.2",
+        "httpx<0.28",
         "pytest==8.3.3"
     ],
 )
\ No newline at end of file
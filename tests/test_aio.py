@@ -0,0 +1,107 @@
+import asyncio
+from datetime import datetime
+from unittest.mock import AsyncMock, Mock, patch
+
+import httpx
+import pytest
+
+from chatweather import aio
+from chatweather.chatbot import clear_extraction_cache
+from chatweather.weather import clear_weather_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    clear_weather_cache()
+    clear_extraction_cache()
+    yield
+    clear_weather_cache()
+    clear_extraction_cache()
+
+
+@pytest.fixture
+def mock_transport():
+    transport = Mock()
+    transport.get = AsyncMock()
+    previous = aio.set_transport(transport)
+    yield transport
+    aio.set_transport(previous)
+
+
+def make_response(status_code, payload=None):
+    request = httpx.Request('GET', 'http://localhost/data/2.5/forecast')
+    return httpx.Response(status_code, json=payload, request=request)
+
+
+def test_async_forecast_success(mock_transport):
+    target_date = datetime(2021, 1, 2, 12, 0, 0)
+    mock_transport.get.return_value = make_response(200, {
+        'list': [
+            {
+                'dt': int(target_date.timestamp()),
+                'main': {'temp': 15},
+                'weather': [{'description': '구름 조금'}],
+            }
+        ]
+    })
+    params = {
+        'city': 'Seoul',
+        'serviceKey': 'valid_api_key',
+        'target_date': target_date.strftime("%Y%m%d%H%M%S"),
+    }
+
+    with patch('chatweather.weather.set_api_datetime', return_value=target_date):
+        temp, sky, dt = asyncio.run(aio.forecast(params))
+        # 두 번째 호출은 동기 버전과 공유하는 캐시에서 조회
+        asyncio.run(aio.forecast(params))
+
+    assert (temp, sky, dt) == (15, '구름 조금', target_date)
+    assert mock_transport.get.call_count == 1
+
+
+def test_async_current_weather_not_found(mock_transport, capsys):
+    mock_transport.get.return_value = make_response(404)
+
+    result = asyncio.run(aio.fetch_current_weather('InvalidCity', 'key', 'kr', 'metric'))
+
+    assert result == (None, None, None)
+    assert "Error: 도시 'InvalidCity'를 찾을 수 없습니다." in capsys.readouterr().out
+
+
+def test_async_transport_retries():
+    client = Mock()
+    client.get = AsyncMock(side_effect=[make_response(503), make_response(200, {})])
+    transport = aio.AsyncHTTPTransport(backoff_base=0, client=client)
+
+    response = asyncio.run(transport.get('http://localhost/data'))
+
+    assert response.status_code == 200
+    assert client.get.call_count == 2
+
+
+def test_async_generate_weather_response():
+    with patch('chatweather.aio.call_openai_api', new_callable=AsyncMock) as mock_api, \
+            patch('chatweather.aio.forecast', new_callable=AsyncMock) as mock_forecast:
+        mock_api.side_effect = [
+            '{"city": "Busan", "date": "20231028120000"}',
+            "부산은 내일 맑아요.",
+        ]
+        mock_forecast.return_value = (22.0, "맑음", "2023-10-28 12:00:00")
+
+        response = asyncio.run(aio.generate_weather_response("내일 부산에 비 올까?", []))
+
+    assert response == "부산은 내일 맑아요."
+    assert mock_forecast.call_args[0][0]['city'] == 'Busan'
+    answer_messages = mock_api.call_args_list[1][0][0]
+    assert "Busan의 2023-10-28 12:00:00 날씨는 맑음이며, 기온은 22.0도입니다." in answer_messages[-1]['content']
+
+
+def test_async_generate_weather_response_weather_failure():
+    with patch('chatweather.aio.extract_city_and_date', new_callable=AsyncMock) as mock_extract, \
+            patch('chatweather.aio.forecast', new_callable=AsyncMock) as mock_forecast:
+        mock_extract.return_value = ('Seoul', '20231028120000')
+        mock_forecast.return_value = (None, None, None)
+
+        response = asyncio.run(aio.generate_weather_response("서울 날씨", []))
+
+    assert response == "죄송합니다, 날씨 정보를 가져오는 데 실패했습니다."
@@ -1,13 +1,38 @@
 import pytest
 from unittest.mock import patch
 from chatweather.chatbot import (
+    EXTRACTION_INSTRUCTIONS,
+    RESPONSE_MODE_FAST,
+    RESPONSE_MODE_RICH,
+    TOOL_SYSTEM_CONTENT,
+    build_extraction_messages,
+    build_weather_messages,
     make_extracting_prompt,
     extract_city_and_date,
     generate_weather_info,
     generate_weather_response,
+    generate_weather_response_stream,
+    call_openai_api_stream,
     chat_loop,
+    answer_cache_key,
+    clear_extraction_cache,
+    configure_answer_cache,
+    configure_extraction_cache,
+    get_answer_cache_stats,
+    get_extraction_cache_stats,
+    normalize_query,
+    resolve_response_mode,
 )
+import time
 from datetime import datetime
+from types import SimpleNamespace
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    clear_extraction_cache()
+    yield
+    clear_extraction_cache()
 
 
 @pytest.fixture
@@ -36,6 +61,37 @@ def test_make_extracting_prompt():
     assert f'질의: "{query}"' in prompt
 
 
+def test_extraction_examples_use_fastpath_city_names():
+    import json
+    import re
+
+    from chatweather.fastpath import mentioned_cities
+
+    # 같은 질의를 어느 추출기가 처리해도 같은 도시 이름(캐시 키)이 되도록 예시는 규칙 기반 추출과 같은 이름을 사용
+    examples = re.findall(r'질의: "(.+)" -> (\{.+\})', EXTRACTION_INSTRUCTIONS)
+    assert examples
+    for query, output in examples:
+        cities = mentioned_cities(query)
+        if cities:
+            assert json.loads(output)["city"] == cities[0], query
+
+
+def test_prompts_keep_static_prefix_first():
+    first = build_extraction_messages("오늘 서울 날씨 어때?", "20231027120000")
+    second = build_extraction_messages("내일 부산 날씨", "20231027131000")
+    # 질의와 시간이 달라도 앞부분(시스템 메시지)은 같고, 달라지는 부분은 마지막 메시지에만 있음
+    assert first[0] == second[0] == {"role": "system", "content": EXTRACTION_INSTRUCTIONS}
+    assert "20231027120000" not in first[0]["content"]
+    assert first[-1]["content"].endswith('질의: "오늘 서울 날씨 어때?"')
+    assert make_extracting_prompt("서울", "20231027120000").startswith(EXTRACTION_INSTRUCTIONS)
+
+    history = [{"user": "안녕", "bot": "안녕하세요"}]
+    seoul = build_weather_messages("서울 날씨", "Seoul", 20.0, "맑음", "2023-10-27 12:00:00", history)
+    busan = build_weather_messages("부산 날씨", "Busan", 18.0, "흐림", "2023-10-27 15:00:00", history)
+    assert seoul[:-1] == busan[:-1]
+    assert "Busan" in busan[-1]["content"]
+
+
 def test_extract_city_and_date(mock_get_current_datetime, mock_call_openai_api):
     mock_call_openai_api.return_value = '{"city": "Seoul", "date": "20231027120000"}'
     city, date_str = extract_city_and_date("오늘 서울 날씨 어때?")
@@ -43,6 +99,54 @@ def test_extract_city_and_date(mock_get_current_datetime, mock_call_openai_api):
     assert date_str == "20231027120000"
 
 
+def test_extract_city_and_date_fastpath_skips_llm(mock_get_current_datetime, mock_call_openai_api):
+    city, date_str = extract_city_and_date("내일 부산 날씨")
+    assert city == "Busan"
+    assert date_str == "20231028120000"
+    mock_call_openai_api.assert_not_called()
+
+
+def test_extract_city_and_date_llm_fallback(mock_get_current_datetime, mock_call_openai_api):
+    mock_call_openai_api.return_value = '{"city": "Yangpyeong", "date": "20231104120000"}'
+    city, date_str = extract_city_and_date("다음주 토요일 양평 날씨")
+    assert city == "Yangpyeong"
+    assert date_str == "20231104120000"
+    mock_call_openai_api.assert_called_once()
+
+
+def test_extract_city_and_date_cached(mock_get_current_datetime, mock_call_openai_api):
+    mock_call_openai_api.return_value = '{"city": "Yangpyeong", "date": "20231104120000"}'
+    first = extract_city_and_date("다음주 토요일 양평 날씨?")
+    second = extract_city_and_date("  다음주 토요일   양평 날씨 ")
+    assert first == second == ("Yangpyeong", "20231104120000")
+    mock_call_openai_api.assert_called_once()
+    stats = get_extraction_cache_stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+
+
+def test_extract_city_and_date_cache_time_bucket(mock_get_current_datetime, mock_call_openai_api):
+    configure_extraction_cache(time_bucket=60)
+    mock_call_openai_api.return_value = '{"city": "Yangpyeong", "date": "20231104120000"}'
+    extract_city_and_date("다음주 토요일 양평 날씨")
+    mock_get_current_datetime.return_value = datetime(2023, 10, 27, 12, 1, 0)
+    extract_city_and_date("다음주 토요일 양평 날씨")
+    assert mock_call_openai_api.call_count == 2
+    configure_extraction_cache()
+
+
+def test_extract_city_and_date_failure_not_cached(mock_get_current_datetime, mock_call_openai_api):
+    mock_call_openai_api.return_value = None
+    assert extract_city_and_date("다음주 양평 날씨") == ("Seoul", "20231027120000")
+    extract_city_and_date("다음주 양평 날씨")
+    assert mock_call_openai_api.call_count == 2
+
+
+def test_normalize_query():
+    assert normalize_query("  서울   날씨 어때?? ") == "서울 날씨 어때"
+    assert normalize_query("Busan Weather!") == "busan weather"
+
+
 def test_generate_weather_info(mock_forecast):
     mock_forecast.return_value = (20.0, "맑음", "2023-10-27 12:00:00")
     temp, sky, date_time = generate_weather_info("Seoul", "20231027120000")
@@ -101,3 +205,185 @@ def test_chat_loop(monkeypatch, capsys):
     ]
     for expected_output in expected_outputs:
         assert expected_output in captured.out
+
+
+def make_chunk(content):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+
+def test_call_openai_api_stream():
+    chunks = [make_chunk(" 안녕"), make_chunk(None), make_chunk("하세요"), SimpleNamespace(choices=[])]
+    with patch('chatweather.chatbot.openai') as mock_openai:
+        mock_openai.chat.completions.create.return_value = iter(chunks)
+        stream = call_openai_api_stream([{"role": "user", "content": "안녕"}])
+        assert list(stream) == ["안녕", "하세요"]
+
+    assert mock_openai.chat.completions.create.call_args.kwargs['stream'] is True
+    assert stream.text == "안녕하세요"
+    assert stream.time_to_first_token is not None
+    assert stream.total_time >= stream.time_to_first_token
+
+
+def test_call_openai_api_stream_error():
+    with patch('chatweather.chatbot.openai') as mock_openai:
+        mock_openai.chat.completions.create.side_effect = Exception("timeout")
+        stream = call_openai_api_stream([{"role": "user", "content": "안녕"}])
+        assert list(stream) == ["죄송합니다, 요청을 처리하는 중 오류가 발생했습니다."]
+
+
+def test_generate_weather_response_stream():
+    chunks = [make_chunk("서울은 "), make_chunk("맑아요.")]
+    with patch('chatweather.chatbot.openai') as mock_openai, \
+            patch('chatweather.chatbot.extract_city_and_date', return_value=("Seoul", "20231027120000")), \
+            patch('chatweather.chatbot.generate_weather_info', return_value=(20.0, "맑음", "2023-10-27 12:00:00")):
+        mock_openai.chat.completions.create.return_value = iter(chunks)
+        stream = generate_weather_response_stream("오늘 서울 날씨 어때?", [])
+        assert "".join(stream) == "서울은 맑아요."
+
+
+def test_chat_loop_stream(monkeypatch, capsys):
+    inputs = iter(["안녕", "exit"])
+    monkeypatch.setattr('builtins.input', lambda prompt: next(inputs))
+
+    with patch('chatweather.chatbot.openai') as mock_openai:
+        mock_openai.chat.completions.create.return_value = iter([make_chunk("안녕"), make_chunk("하세요!")])
+        chat_loop(stream=True)
+
+    assert "응답: 안녕하세요!" in capsys.readouterr().out
+
+
+def make_completion(content=None, tool_calls=None):
+    message = SimpleNamespace(content=content, tool_calls=tool_calls)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def make_tool_call(arguments):
+    return SimpleNamespace(
+        id="call_1",
+        function=SimpleNamespace(name="get_weather", arguments=arguments),
+    )
+
+
+def test_generate_weather_response_tool_mode(mock_get_current_datetime):
+    with patch('chatweather.chatbot.create_chat_completion') as mock_create, \
+            patch('chatweather.chatbot.generate_weather_info') as mock_weather_info, \
+            patch('chatweather.chatbot.call_openai_api') as mock_call_openai_api:
+        mock_create.side_effect = [
+            make_completion(tool_calls=[make_tool_call('{"city": "Busan", "date": "20231028120000"}')]),
+            make_completion(content="내일 부산은 맑고 22도예요."),
+        ]
+        mock_weather_info.return_value = (22.0, "맑음", "2023-10-28 12:00:00")
+
+        response = generate_weather_response("내일 부산 날씨 알려줘", [], extraction_mode="tool")
+
+    assert response == "내일 부산은 맑고 22도예요."
+    mock_weather_info.assert_called_once_with("Busan", "20231028120000")
+    mock_call_openai_api.assert_not_called()
+
+    first_messages = mock_create.call_args_list[0][0][0]
+    # 현재 시간은 고정된 시스템 메시지가 아니라 사용자 질의 바로 앞에 들어감
+    assert first_messages[0]["content"] == TOOL_SYSTEM_CONTENT
+    assert "20231027120000" in first_messages[1]["content"]
+    assert first_messages[2] == {"role": "user", "content": "내일 부산 날씨 알려줘"}
+    second_messages = mock_create.call_args_list[1][0][0]
+    assert second_messages[-2]["tool_calls"][0]["id"] == "call_1"
+    assert second_messages[-1] == {
+        "role": "tool",
+        "tool_call_id": "call_1",
+        "content": "Busan의 2023-10-28 12:00:00 날씨는 맑음이며, 기온은 22.0도입니다.",
+    }
+
+
+def test_generate_weather_response_tool_mode_weather_failure(mock_get_current_datetime):
+    with patch('chatweather.chatbot.create_chat_completion') as mock_create, \
+            patch('chatweather.chatbot.generate_weather_info') as mock_weather_info:
+        mock_create.return_value = make_completion(tool_calls=[make_tool_call('{"city": "Nowhere"}')])
+        mock_weather_info.return_value = (None, None, None)
+
+        response = generate_weather_response("어딘가 날씨", [], extraction_mode="tool")
+
+    assert response == "죄송합니다, 날씨 정보를 가져오는 데 실패했습니다."
+    mock_weather_info.assert_called_once_with("Nowhere", "20231027120000")
+    assert mock_create.call_count == 1
+
+
+def test_generate_weather_response_tool_mode_api_error(mock_get_current_datetime):
+    with patch('chatweather.chatbot.create_chat_completion', side_effect=Exception("boom")):
+        response = generate_weather_response("내일 부산 날씨", [], extraction_mode="tool")
+    assert response == "죄송합니다, 요청을 처리하는 중 오류가 발생했습니다."
+
+
+def test_resolve_response_mode_auto(mock_get_current_datetime):
+    assert resolve_response_mode("내일 부산 날씨 알려줘", [], "auto") == RESPONSE_MODE_FAST
+    # 이전 대화가 있거나 단순 조회가 아니면 LLM 답변
+    assert resolve_response_mode("내일 부산 날씨 알려줘", [{"user": "안녕", "bot": "안녕하세요"}],
+                                 "auto") == RESPONSE_MODE_RICH
+    assert resolve_response_mode("내일 부산 날씨에 맞는 옷차림 추천해줘", [], "auto") == RESPONSE_MODE_RICH
+    assert resolve_response_mode("내일 부산 날씨 알려줘", [], None) == RESPONSE_MODE_RICH
+
+
+def test_generate_weather_response_fast_mode_skips_llm(mock_get_current_datetime, mock_call_openai_api):
+    with patch('chatweather.chatbot.generate_weather_info',
+               return_value=(22.0, "맑음", datetime(2023, 10, 28, 12))):
+        response = generate_weather_response("내일 부산 날씨 알려줘", [], response_mode="fast")
+    assert "부산" in response and "22.0도" in response
+    mock_call_openai_api.assert_not_called()
+
+    # tool 모드로 설정되어 있어도 템플릿 답변은 도구 호출 대화를 사용하지 않음
+    with patch('chatweather.chatbot.generate_weather_info',
+               return_value=(22.0, "맑음", datetime(2023, 10, 28, 12))), \
+            patch('chatweather.chatbot.create_chat_completion') as mock_create:
+        generate_weather_response("내일 부산 날씨 알려줘", [], extraction_mode="tool", response_mode="auto")
+    mock_create.assert_not_called()
+    mock_call_openai_api.assert_not_called()
+
+
+def test_answer_cache_key_groups_same_question():
+    key = answer_cache_key("내일 부산 날씨 알려줘", "Busan", "20991028130000")
+    # 같은 예보 시간대(12시)와 같은 의도의 질의는 같은 키
+    assert answer_cache_key("부산 내일 날씨?", "Busan", "20991028120000") == key
+    assert key == ("Busan", "2099102812", "lookup", "kr")
+    # 도시 색인의 정식 이름을 사용
+    assert answer_cache_key("내일 부산 날씨 알려줘", "Pusan", "20991028130000") == key
+    assert answer_cache_key("내일 부산에 우산 필요해?", "Busan", "20991028120000")[2] == "우산 필요해"
+    assert answer_cache_key("내일 부산 날씨", "Busan", "20991028180000") != key
+
+
+def test_generate_weather_response_answer_cache(mock_call_openai_api):
+    configure_answer_cache(maxsize=8, variants=2)
+    mock_call_openai_api.side_effect = ["답변 1", "답변 2", "답변 3"]
+    try:
+        with patch('chatweather.chatbot.extract_city_and_date', return_value=("Busan", "20991028120000")), \
+                patch('chatweather.chatbot.generate_weather_info',
+                      return_value=(22.0, "맑음", "2099-10-28 12:00:00")) as mock_info, \
+                patch('chatweather.chatbot.cache_expires_at', return_value=time.time() + 600):
+            # 답변이 variants개 모일 때까지는 새로 생성
+            assert generate_weather_response("내일 부산 날씨 알려줘", []) == "답변 1"
+            assert generate_weather_response("부산 내일 날씨?", []) == "답변 2"
+            for _ in range(5):
+                assert generate_weather_response("내일 부산 날씨", []) in ("답변 1", "답변 2")
+            assert mock_info.call_count == 2
+
+            # 이전 대화가 있으면 캐시를 사용하지 않음
+            history = [{"user": "안녕", "bot": "안녕하세요"}]
+            assert generate_weather_response("내일 부산 날씨", history) == "답변 3"
+        assert mock_call_openai_api.call_count == 3
+        assert get_answer_cache_stats()['size'] == 1
+    finally:
+        configure_answer_cache(maxsize=0)
+    assert get_answer_cache_stats() is None
+
+
+def test_answer_cache_skips_uncached_weather(mock_call_openai_api):
+    configure_answer_cache(maxsize=8, variants=1)
+    mock_call_openai_api.return_value = "답변"
+    try:
+        with patch('chatweather.chatbot.extract_city_and_date', return_value=("Busan", "20991028120000")), \
+                patch('chatweather.chatbot.generate_weather_info',
+                      return_value=(22.0, "맑음", "2099-10-28 12:00:00")), \
+                patch('chatweather.chatbot.cache_expires_at', return_value=None):
+            generate_weather_response("내일 부산 날씨", [])
+        # 날씨 캐시의 만료 시각을 알 수 없으면 답변을 저장하지 않음
+        assert get_answer_cache_stats()['size'] == 0
+    finally:
+        configure_answer_cache(maxsize=0)
@@ -0,0 +1,95 @@
+from datetime import datetime
+from unittest.mock import Mock, patch
+
+import pytest
+import requests
+
+from chatweather import chatbot
+from chatweather.deadline import Deadline, DeadlineExceeded, as_deadline
+from chatweather.transport import HTTPTransport
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_deadline_remaining_and_check():
+    clock = FakeClock()
+    deadline = Deadline(2.0, clock=clock)
+    assert deadline.timeout(10) == 2.0
+    assert deadline.timeout(0.5) == 0.5
+    clock.now = 1.5
+    assert deadline.remaining() == pytest.approx(0.5)
+    deadline.check('weather')
+    clock.now = 3.0
+    assert deadline.expired() and deadline.remaining() == 0.0
+    with pytest.raises(DeadlineExceeded) as excinfo:
+        deadline.check('weather')
+    assert excinfo.value.stage == 'weather'
+
+    assert as_deadline(None) is None
+    assert as_deadline(deadline) is deadline
+    assert as_deadline(5).budget == 5
+
+
+def test_transport_limits_timeout_and_retries_to_deadline():
+    clock = FakeClock()
+    session = Mock()
+    transport = HTTPTransport(connect_timeout=3, read_timeout=10, backoff_base=5, session=session)
+
+    def timeout_after(*args, **kwargs):
+        clock.now += kwargs['timeout'][1]
+        raise requests.exceptions.ReadTimeout()
+
+    session.get.side_effect = timeout_after
+    with pytest.raises(DeadlineExceeded):
+        transport.get('http://localhost/data', deadline=Deadline(4.0, clock=clock))
+    # 읽기 타임아웃을 남은 시간으로 줄이고, 시간이 지나면 재시도하지 않음
+    assert session.get.call_args.kwargs['timeout'] == (3, 4.0)
+    assert session.get.call_count == 1
+
+
+@pytest.fixture
+def now():
+    with patch('chatweather.chatbot.get_current_datetime', return_value=datetime(2023, 10, 27, 12)):
+        yield
+
+
+def test_extraction_timeout_falls_back_to_default_city(now):
+    chatbot.clear_extraction_cache()
+    with patch('chatweather.chatbot.call_openai_api', side_effect=DeadlineExceeded('llm')):
+        city, date_str = chatbot.extract_city_and_date("다음주 화요일 양평 날씨", deadline=Deadline(0.1))
+    assert (city, date_str) == ('Seoul', '20231027120000')
+    # 기본값은 캐시하지 않음
+    assert chatbot.get_extraction_cache_stats()['size'] == 0
+
+
+def test_answer_timeout_uses_template(now):
+    with patch('chatweather.chatbot.extract_city_and_date', return_value=("Busan", "20231028120000")), \
+            patch('chatweather.chatbot.generate_weather_info',
+                  return_value=(22.0, "맑음", datetime(2023, 10, 28, 12))), \
+            patch('chatweather.chatbot.call_openai_api', side_effect=DeadlineExceeded('llm')):
+        response = chatbot.generate_weather_response("내일 부산 날씨 알려줘", [], deadline=1.0)
+    assert "부산" in response and "22.0도" in response
+
+
+def test_weather_timeout_returns_deadline_message(now):
+    with patch('chatweather.chatbot.extract_city_and_date', return_value=("Busan", "20231028120000")), \
+            patch('chatweather.chatbot.forecast', side_effect=DeadlineExceeded('weather')) as mock_forecast:
+        assert chatbot.generate_weather_response("내일 부산 날씨", [], deadline=1.0) == chatbot.DEADLINE_MESSAGE
+    assert isinstance(mock_forecast.call_args.kwargs['deadline'], Deadline)
+
+
+def test_openai_request_uses_remaining_time():
+    with patch('chatweather.chatbot.openai') as mock_openai:
+        mock_openai.chat.completions.create.return_value.choices[0].message.content = "안녕하세요"
+        assert chatbot.call_openai_api([{"role": "user", "content": "안녕"}], deadline=Deadline(3.0)) == "안녕하세요"
+        assert 0 < mock_openai.chat.completions.create.call_args.kwargs['timeout'] <= 3.0
+
+        mock_openai.chat.completions.create.side_effect = Exception("timed out")
+        with pytest.raises(DeadlineExceeded):
+            chatbot.call_openai_api([{"role": "user", "content": "안녕"}], deadline=Deadline(0.0))
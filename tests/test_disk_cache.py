@@ -0,0 +1,129 @@
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from unittest.mock import Mock, patch
+
+import pytest
+
+from chatweather import weather
+from chatweather.disk_cache import DiskCache
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TARGET = datetime(2021, 1, 1, 12)
+FORECAST_DATA = {'list': [
+    {'dt': int(TARGET.timestamp()), 'main': {'temp': 10.0}, 'weather': [{'id': 800, 'description': '맑음'}]},
+]}
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def disk_weather_cache(tmp_path):
+    weather.clear_weather_cache()
+    cache = weather.configure_disk_cache(str(tmp_path / "weather.db"))
+    yield cache
+    weather.set_disk_cache(None)
+    cache.close()
+    weather.clear_weather_cache()
+
+
+def test_get_set_and_expiry(tmp_path):
+    clock = FakeClock()
+    cache = DiskCache(str(tmp_path / "cache.db"), clock=clock)
+    cache.set('forecast', 'Seoul', b'data', expires_at=1100)
+    assert cache.get('forecast', 'Seoul') == (b'data', 1000, 1100)
+    assert cache.get('forecast', 'Busan') is None
+
+    clock.now = 1100
+    assert cache.get('forecast', 'Seoul') is None
+    assert cache.purge_expired() == 1
+    assert cache.stats() == {'size': 0, 'hits': 1, 'misses': 2, 'writes': 1, 'errors': 0}
+    cache.close()
+
+
+def test_older_fetch_does_not_overwrite_newer(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.db"), clock=FakeClock())
+    cache.set('weather', 'Seoul', b'new', expires_at=2000, fetched_at=900)
+    cache.set('weather', 'Seoul', b'old', expires_at=2000, fetched_at=800)
+    assert cache.get('weather', 'Seoul')[0] == b'new'
+    cache.close()
+
+
+def test_concurrent_readers_and_writers(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = DiskCache(path)
+    errors = []
+
+    def work(index):
+        try:
+            for round_ in range(50):
+                cache.set('forecast', f"city-{round_ % 5}", bytes([index]), expires_at=time.time() + 60)
+                cache.get('forecast', f"city-{(round_ + 1) % 5}")
+        except Exception as err:
+            errors.append(err)
+
+    threads = [threading.Thread(target=work, args=(index,)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert cache.stats()['size'] == 5
+    assert cache.stats()['errors'] == 0
+    cache.close()
+
+
+def test_short_lived_threads_share_one_connection(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.db"))
+    connect = sqlite3.connect
+    with patch('chatweather.disk_cache.sqlite3.connect', side_effect=connect) as mock_connect:
+        for _ in range(20):
+            thread = threading.Thread(target=cache.get, args=('forecast', 'Seoul'))
+            thread.start()
+            thread.join()
+    # 스레드마다 연결을 새로 열지 않음
+    assert mock_connect.call_count == 0
+    assert cache.stats()['misses'] == 20
+    cache.close()
+    # 닫은 뒤에는 새 연결을 열어 계속 사용
+    assert cache.get('forecast', 'Seoul') is None
+    cache.close()
+
+
+def test_forecast_is_served_from_disk_after_memory_miss(disk_weather_cache):
+    response = Mock(status_code=200)
+    response.json.return_value = FORECAST_DATA
+    with patch.object(weather.get_transport(), 'get', return_value=response) as mock_get:
+        table = weather.load_forecast_weather('Seoul', 'key', 'kr', 'metric')
+        # 메모리 캐시만 비우고 (프로세스 재시작) 다시 조회
+        weather.clear_weather_cache()
+        restored = weather.load_forecast_weather('Seoul', 'key', 'kr', 'metric')
+
+    assert mock_get.call_count == 1
+    assert list(restored.temps) == list(table.temps)
+    assert weather.cache_expires_at('forecast', 'Seoul', 'metric', 'kr') == weather.next_forecast_update()
+    assert weather.get_cache_stats()['disk']['hits'] == 1
+
+
+def test_current_weather_is_shared_across_processes(disk_weather_cache):
+    script = (
+        "from chatweather import weather\n"
+        f"weather.configure_disk_cache({disk_weather_cache.path!r})\n"
+        "weather.store_current('Seoul', 'metric', 'kr', "
+        "{'main': {'temp': 21.5}, 'weather': [{'description': '맑음'}]})\n"
+    )
+    subprocess.run([sys.executable, "-c", script], cwd=ROOT, check=True)
+
+    with patch.object(weather.get_transport(), 'get') as mock_get:
+        assert weather.load_current_weather('Seoul', 'key', 'kr', 'metric') == (21.5, '맑음')
+    mock_get.assert_not_called()
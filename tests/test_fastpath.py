@@ -0,0 +1,85 @@
+from datetime import datetime
+
+import pytest
+
+from chatweather.fastpath import (extract_fast, get_fastpath_stats, mentioned_cities, mentioned_days, parse_query,
+                                  query_intent, reset_fastpath_stats)
+
+NOW = datetime(2023, 10, 27, 14, 25, 0)
+
+
+@pytest.mark.parametrize("query,expected", [
+    # 날짜/도시 언급 없음 -> 서울, 현재 시간
+    ("오늘 날씨", ('Seoul', '20231027142500')),
+    ("서울 날씨 어때?", ('Seoul', '20231027142500')),
+    # 날짜만 언급 -> 12시 정각
+    ("내일 부산 날씨", ('Busan', '20231028120000')),
+    ("내일모레 인천 날씨", ('Incheon', '20231029120000')),
+    ("글피 대구 날씨 알려줘", ('Daegu', '20231030120000')),
+    # 시간대와 시각
+    ("모레 오후 3시 대구 날씨 알려줘", ('Daegu', '20231029150000')),
+    ("내일아침 제주도 날씨", ('Jeju City', '20231028090000')),
+    ("오늘밤 날씨는?", ('Seoul', '20231027210000')),
+    ("저녁 7시 반 날씨", ('Seoul', '20231027193000')),
+    ("오후3시반 날씨", ('Seoul', '20231027153000')),
+    ("내일 15시 부산 날씨", ('Busan', '20231028150000')),
+    ("내일 12시 부산 날씨", ('Busan', '20231028120000')),
+    # 자정(밤 12시)은 다음 날 0시
+    ("밤 12시 날씨", ('Seoul', '20231028000000')),
+    ("내일 자정 날씨", ('Seoul', '20231029000000')),
+    ("저녁 12시 날씨", ('Seoul', '20231028000000')),
+    # 밤 1~5시는 다음 날 새벽
+    ("오늘 밤 1시 날씨", ('Seoul', '20231028010000')),
+    ("밤 2시 부산 날씨", ('Busan', '20231028020000')),
+    ("밤 11시 날씨", ('Seoul', '20231027230000')),
+    ("내일 새벽 2시 날씨", ('Seoul', '20231028020000')),
+    # 붙여 쓰기, 조사, 오탈자
+    ("부산날씨", ('Busan', '20231027142500')),
+    ("서을의 날씨는 어때요", ('Seoul', '20231027142500')),
+    ("Pusan 날씨", ('Busan', '20231027142500')),
+])
+def test_parse_query(query, expected):
+    assert parse_query(query, NOW) == expected
+
+
+@pytest.mark.parametrize("query", [
+    "양평 날씨",               # 사전에 없는 지명
+    "다음주 부산 날씨",         # 처리할 수 없는 날짜 표현
+    "서울이랑 부산 날씨",       # 알 수 없는 단어
+    "서울 부산 날씨",           # 도시가 여러 개
+    "오늘 내일 날씨",           # 날짜가 여러 개
+    "25시 날씨",               # 잘못된 시각
+    "내일 3시 부산 날씨",       # 오전/오후를 알 수 없는 시각
+    "11시 날씨",
+    "새벽 12시 날씨",           # 지난 0시인지 다음 날 0시인지 알 수 없음
+])
+def test_parse_query_low_confidence(query):
+    assert parse_query(query, NOW) is None
+
+
+@pytest.mark.parametrize("query,expected", [
+    ("내일 부산 날씨 알려줘", ""),
+    ("부산 내일 날씨?", ""),
+    ("내일 부산에 우산 필요해?", "우산 필요해"),
+    ("오늘 서울 날씨에 맞는 옷차림 추천해줘", "맞는 옷차림 추천해줘"),
+])
+def test_query_intent(query, expected):
+    assert query_intent(query) == expected
+
+
+def test_mentioned_cities_and_days():
+    assert mentioned_cities("다음주 월요일 부산 날씨랑 서울 날씨") == ['Busan', 'Seoul']
+    assert mentioned_cities("양평 날씨") == []
+    assert mentioned_days("내일 아니면 모레 양평 날씨") == [1, 2]
+    assert mentioned_days("양평 날씨") == []
+
+
+def test_fastpath_stats():
+    reset_fastpath_stats()
+    extract_fast("내일 부산 날씨", NOW)
+    extract_fast("오늘 날씨", NOW)
+    extract_fast("양평 날씨", NOW)
+    stats = get_fastpath_stats()
+    assert stats['hits'] == 2
+    assert stats['misses'] == 1
+    assert stats['hit_rate'] == pytest.approx(2 / 3)
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from chatweather.forecast_table import ForecastTable
+
+START = datetime(2021, 1, 2, 12, 0, 0)
+
+
+def make_item(date_time, temp, description, code=800):
+    return {
+        'dt': int(date_time.timestamp()),
+        'main': {'temp': temp},
+        'weather': [{'id': code, 'description': description}],
+    }
+
+
+@pytest.fixture
+def table():
+    return ForecastTable.from_list([
+        make_item(START + timedelta(hours=3), 16, '구름 조금', 801),
+        make_item(START, 10, '맑음'),
+        make_item(START + timedelta(hours=6), 13, '맑음'),
+    ])
+
+
+def test_from_list_sorts_and_shares_descriptions(table):
+    assert len(table) == 3
+    assert list(table.temps) == [10.0, 16.0, 13.0]
+    assert list(table.codes) == [800, 801, 800]
+    assert table.descriptions == ('맑음', '구름 조금')
+
+
+def test_lookup_exact(table):
+    target = START + timedelta(hours=3)
+    assert table.lookup(target, 'exact') == (16.0, '구름 조금', target)
+    assert table.lookup(target + timedelta(hours=1), 'exact') is None
+
+
+def test_lookup_nearest(table):
+    target = START + timedelta(hours=1)
+    assert table.lookup(target, 'nearest') == (10.0, '맑음', START)
+    target = START + timedelta(hours=2)
+    assert table.lookup(target, 'nearest') == (16.0, '구름 조금', START + timedelta(hours=3))
+
+
+def test_lookup_interpolate(table):
+    target = START + timedelta(hours=1)
+    assert table.lookup(target) == (12.0, '맑음', target)
+    target = START + timedelta(hours=5)
+    assert table.lookup(target) == (14.0, '맑음', target)
+
+
+def test_lookup_outside_window(table):
+    # 범위 양 끝에서 반 슬롯까지만 허용
+    assert table.lookup(START - timedelta(hours=1)) == (10.0, '맑음', START)
+    assert table.lookup(START - timedelta(hours=2)) is None
+    assert table.lookup(START + timedelta(hours=8)) is None
+
+
+def test_empty_table():
+    table = ForecastTable.from_list([])
+    assert len(table) == 0
+    assert table.lookup(START) is None
+
+
+def test_bytes_round_trip(table):
+    restored = ForecastTable.from_bytes(table.to_bytes())
+    assert list(restored.times) == list(table.times)
+    assert list(restored.temps) == list(table.temps)
+    assert list(restored.codes) == list(table.codes)
+    assert restored.descriptions == table.descriptions
+    assert restored.lookup(START + timedelta(hours=1)) == table.lookup(START + timedelta(hours=1))
+    assert len(ForecastTable.from_bytes(ForecastTable.from_list([]).to_bytes())) == 0
+
+
+def test_from_bytes_rejects_truncated_data(table):
+    with pytest.raises(ValueError):
+        ForecastTable.from_bytes(table.to_bytes()[:10])
@@ -0,0 +1,88 @@
+import pytest
+
+from chatweather import geocode, weather
+from chatweather.geocode import CityIndex, Location, build_index, normalize_name
+
+ENTRIES = [
+    ('Seoul', 37.5665, 126.978, ['서울', '서을']),
+    ('Busan', 35.1796, 129.0756, ['부산', 'Pusan']),
+    ('Jeju City', 33.4996, 126.5312, ['제주', 'Jeju', 'Jeju-si']),
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    path = tmp_path / 'cities.tsv'
+    build_index(ENTRIES, str(path))
+    index = CityIndex(str(path))
+    yield index
+    index.close()
+
+
+@pytest.fixture
+def restore_index():
+    yield
+    geocode.reset_city_index()
+
+
+def test_normalize_name():
+    assert normalize_name("Jeju City") == normalize_name("jeju-city") == normalize_name("Jeju City, KR") == "jejucity"
+    assert normalize_name(" 부산 ") == "부산"
+    assert normalize_name(", KR") == ""
+
+
+@pytest.mark.parametrize("name,expected", [
+    ("Seoul", 'Seoul'), ("seoul", 'Seoul'), ("서을", 'Seoul'),
+    ("PUSAN", 'Busan'), ("부산", 'Busan'), ("Busan, KR", 'Busan'),
+    ("Jeju", 'Jeju City'), ("jeju-si", 'Jeju City'), ("제주", 'Jeju City'),
+])
+def test_lookup_aliases(index, name, expected):
+    assert index.lookup(name).name == expected
+
+
+@pytest.mark.parametrize("name", ["Daegu", "", None, "Seou", "Seoulx", "가", "힣힣"])
+def test_lookup_missing(index, name):
+    assert index.lookup(name) is None
+
+
+def test_lookup_returns_coordinates(index):
+    assert index.lookup("Pusan") == Location('Busan', 35.1796, 129.0756)
+
+
+def test_build_index_rejects_conflicting_alias(tmp_path):
+    with pytest.raises(ValueError):
+        build_index([('Seoul', 0, 0, ['Capital']), ('Tokyo', 0, 0, ['Capital'])], str(tmp_path / 'cities.tsv'))
+
+
+def test_empty_index(tmp_path):
+    path = tmp_path / 'cities.tsv'
+    build_index([], str(path))
+    assert CityIndex(str(path)).lookup("Seoul") is None
+
+
+def test_bundled_index_finds_every_key():
+    index = CityIndex(geocode.DEFAULT_INDEX_PATH)
+    with open(geocode.DEFAULT_INDEX_PATH, encoding='utf-8') as file:
+        rows = [line.rstrip('\n').split('\t') for line in file]
+    for key, name, lat, lon in rows:
+        assert index.lookup(key) == Location(name, float(lat), float(lon))
+    index.close()
+
+
+def test_bundled_index_covers_fastpath_gazetteer():
+    from chatweather.fastpath import CITY_GAZETTEER
+
+    for korean, name in CITY_GAZETTEER.items():
+        assert geocode.lookup(korean).name == name
+        assert geocode.lookup(name).name == name
+
+
+def test_set_city_index(index, restore_index):
+    geocode.set_city_index(index)
+    assert weather.canonical_city("Pusan") == 'Busan'
+    assert weather.build_weather_request('weather', "Pusan", 'key', 'kr', 'metric')[1]['lat'] == 35.1796
+
+    # 색인을 사용하지 않으면 이름으로 요청
+    assert geocode.set_city_index(None) is index
+    assert weather.canonical_city("Pusan") == 'Pusan'
+    assert weather.build_weather_request('weather', "Pusan", 'key', 'kr', 'metric')[1]['q'] == 'Pusan'
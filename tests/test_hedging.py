@@ -0,0 +1,79 @@
+import threading
+import time
+
+import pytest
+
+from chatweather import hedging
+from chatweather.deadline import Deadline, DeadlineExceeded
+from chatweather.hedging import Hedger, LatencyTracker
+
+
+@pytest.fixture(autouse=True)
+def reset():
+    hedging.reset_hedging()
+    yield
+    hedging.reset_hedging()
+
+
+def warm(hedger, seconds=0.01, count=20):
+    for _ in range(count):
+        hedger.latencies.record(seconds)
+
+
+def test_latency_tracker_percentile():
+    tracker = LatencyTracker(window=100, min_samples=10)
+    for value in range(1, 10):
+        tracker.record(value)
+    assert tracker.percentile(0.95) is None
+    tracker.record(10)
+    assert tracker.percentile(0.95) == 10
+    assert tracker.percentile(0.5) == 5
+
+
+def test_slow_first_attempt_is_hedged():
+    hedger = Hedger('weather', min_delay=0.01)
+    warm(hedger)
+    calls = []
+    release = threading.Event()
+
+    def request():
+        calls.append(1)
+        if len(calls) == 1:
+            # 첫 요청은 멈춘 것처럼 오래 걸림
+            release.wait(2)
+            return "primary"
+        return "hedge"
+
+    started = time.perf_counter()
+    assert hedger.call(request) == "hedge"
+    assert time.perf_counter() - started < 1
+    release.set()
+    assert hedger.stats()['hedge'] == 1
+
+
+def test_fast_first_attempt_is_not_hedged():
+    hedger = Hedger('openai', min_delay=0.5)
+    warm(hedger)
+    calls = []
+    assert hedger.call(lambda: calls.append(1) or "ok") == "ok"
+    assert len(calls) == 1
+    assert hedger.stats()['single'] == 1
+
+
+def test_hedged_call_respects_deadline():
+    hedger = Hedger('weather', min_delay=0.01)
+    warm(hedger)
+    release = threading.Event()
+    with pytest.raises(DeadlineExceeded) as excinfo:
+        hedger.call(lambda: release.wait(2), deadline=Deadline(0.1), stage='weather')
+    assert excinfo.value.stage == 'weather'
+    release.set()
+
+
+def test_call_without_hedging_runs_directly():
+    assert hedging.call('weather', lambda: threading.current_thread()) is threading.current_thread()
+    hedger = hedging.configure_hedging('weather')
+    assert hedging.get_hedger('weather') is hedger
+    assert 'weather' in hedging.get_hedging_stats()
+    hedging.configure_hedging('weather', enabled=False)
+    assert hedging.get_hedger('weather') is None
@@ -0,0 +1,79 @@
+from chatweather.history import ConversationHistory, estimate_tokens, history_messages, turn_tokens
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcdefgh") == 2
+    assert estimate_tokens("서울 날씨") == 5
+
+
+def test_history_within_budget_keeps_all_turns():
+    history = ConversationHistory(token_budget=1000)
+    history.add_turn("안녕", "안녕하세요!")
+    history.add_turn("서울 날씨 어때?", "맑아요.")
+
+    messages = history.to_messages()
+    assert [m["content"] for m in messages] == ["안녕", "안녕하세요!", "서울 날씨 어때?", "맑아요."]
+    assert history.summary == ""
+
+
+def test_history_folds_old_turns_incrementally():
+    calls = []
+
+    def summarizer(summary, turns):
+        calls.append((summary, [entry["user"] for entry in turns]))
+        return (summary + " " if summary else "") + "/".join(entry["user"] for entry in turns)
+
+    entry_tokens = turn_tokens({"user": "질문1", "bot": "답변1"})
+    history = ConversationHistory(token_budget=entry_tokens * 2, summarizer=summarizer)
+    for i in range(1, 5):
+        history.add_turn(f"질문{i}", f"답변{i}")
+
+    # 요약은 기존 요약과 새로 밀려난 턴만으로 갱신됨
+    assert calls[0] == ("", ["질문1"])
+    summarized = [user for _, users in calls for user in users]
+    assert len(summarized) == len(set(summarized))
+    assert "질문1" in history.summary
+    assert history.total_tokens() <= history.token_budget or len(history) == history.min_recent_turns
+
+    messages = history.to_messages()
+    assert messages[0]["role"] == "system"
+    assert history.summary in messages[0]["content"]
+    assert messages[-1]["content"] == "답변4"
+
+
+def test_history_retries_turns_the_summarizer_could_not_fold():
+    calls = []
+    results = iter([None, "요약"])
+
+    def summarizer(summary, turns):
+        calls.append([entry["user"] for entry in turns])
+        return next(results)
+
+    entry_tokens = turn_tokens({"user": "질문1", "bot": "답변1"})
+    history = ConversationHistory(token_budget=entry_tokens * 2, summarizer=summarizer)
+    for i in range(1, 5):
+        history.add_turn(f"질문{i}", f"답변{i}")
+
+    # 첫 요약이 실패(None)하면 그 턴을 다음 요약에 함께 전달
+    assert calls == [["질문1"], ["질문1", "질문2"]]
+    assert history.summary == "요약"
+    assert len(history._unsummarized) == 0
+
+
+def test_history_without_summarizer_drops_old_turns():
+    entry_tokens = turn_tokens({"user": "질문1", "bot": "답변1"})
+    history = ConversationHistory(token_budget=entry_tokens * 2)
+    for i in range(1, 5):
+        history.add_turn(f"질문{i}", f"답변{i}")
+
+    assert len(history) == 2
+    assert [entry["user"] for entry in history] == ["질문3", "질문4"]
+
+
+def test_history_messages_list_budget():
+    turns = [{"user": f"질문{i}", "bot": f"답변{i}"} for i in range(10)]
+    budget = turn_tokens(turns[0]) * 3
+    messages = history_messages(turns, token_budget=budget)
+    assert len(messages) == 6
+    assert messages[0]["content"] == "질문7"
@@ -0,0 +1,35 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ('openai', 'requests', 'dotenv', 'httpx')
+
+
+def run_python(code):
+    completed = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    assert completed.returncode == 0, completed.stderr
+    return completed.stdout.split()
+
+
+@pytest.mark.parametrize("module", ["chatweather.weather", "chatweather.chatbot", "run_pyWeather"])
+def test_import_does_not_load_heavy_modules(module):
+    loaded = run_python(
+        f"import sys, {module}; print(*[name for name in {HEAVY_MODULES!r} if name in sys.modules])"
+    )
+    assert loaded == [], f"{module} 임포트 시 {loaded}이(가) 함께 임포트되었습니다."
+
+
+def test_config_and_openai_loaded_on_first_use():
+    output = run_python(
+        "import sys\n"
+        "from chatweather import chatbot, config\n"
+        "config.get_weather_api_key()\n"
+        "print('dotenv' in sys.modules, 'openai' in sys.modules)\n"
+        "module = chatbot.get_openai()\n"
+        "print('openai' in sys.modules, module is chatbot.get_openai())\n"
+    )
+    assert output == ["True", "False", "True", "True"]
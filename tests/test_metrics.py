@@ -0,0 +1,229 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+import pytest
+
+from chatweather import chatbot, metrics, weather
+from chatweather.metrics import MetricsRegistry
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.disable_metrics()
+    metrics.get_registry().clear()
+    yield
+    metrics.disable_metrics()
+    metrics.get_registry().clear()
+
+
+def test_counter_and_histogram_export():
+    registry = MetricsRegistry()
+    counter = registry.counter("requests_total", "요청 수", ("status",))
+    histogram = registry.histogram("latency_seconds", "지연 시간", ("stage",), buckets=(0.1, 1.0))
+
+    counter.inc(status=200)
+    counter.inc(2, status=200)
+    histogram.observe(0.05, stage="llm")
+    histogram.observe(0.5, stage="llm")
+    histogram.observe(5, stage="llm")
+
+    text = registry.export_prometheus()
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{status="200"} 3' in text
+    assert "# TYPE latency_seconds histogram" in text
+    assert 'latency_seconds_bucket{stage="llm",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{stage="llm",le="1"} 2' in text
+    assert 'latency_seconds_bucket{stage="llm",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{stage="llm"} 3' in text
+    assert 'latency_seconds_sum{stage="llm"} 5.55' in text
+
+
+def test_registry_rejects_conflicting_metric():
+    registry = MetricsRegistry()
+    registry.counter("calls_total", "호출 수", ("stage",))
+    assert registry.counter("calls_total", "호출 수", ("stage",)) is registry.get("calls_total")
+    with pytest.raises(ValueError):
+        registry.histogram("calls_total", "호출 수", ("stage",))
+
+
+def test_counter_requires_labels():
+    counter = MetricsRegistry().counter("calls_total", "호출 수", ("stage",))
+    with pytest.raises(ValueError):
+        counter.inc()
+
+
+def test_disabled_hooks_record_nothing():
+    @metrics.timed("stage")
+    def work():
+        metrics.record_cache("forecast", True)
+        return 1
+
+    assert work() == 1
+    assert metrics.span("stage") is metrics._NOOP_SPAN
+    assert metrics.current_span() is None
+    histogram = metrics.get_registry().get(metrics.STAGE_DURATION)
+    assert histogram.count(stage="stage", outcome="ok") == 0
+
+
+def test_timed_records_duration_and_outcome():
+    metrics.enable_metrics()
+
+    @metrics.timed("stage")
+    def work(fail=False):
+        if fail:
+            raise RuntimeError("실패")
+        return "ok"
+
+    work()
+    with pytest.raises(RuntimeError):
+        work(fail=True)
+
+    histogram = metrics.get_registry().get(metrics.STAGE_DURATION)
+    assert histogram.count(stage="stage", outcome="ok") == 1
+    assert histogram.count(stage="stage", outcome="error") == 1
+
+
+def test_tracer_receives_nested_spans_with_attributes():
+    spans = []
+    metrics.add_tracer(spans.append)
+    try:
+        @metrics.timed("inner")
+        def inner():
+            metrics.record_http_status("weather", 200)
+            metrics.record_usage({"prompt_tokens": 10, "completion_tokens": 3})
+
+        @metrics.timed("outer")
+        def outer():
+            metrics.record_cache("extraction", False)
+            inner()
+
+        outer()
+    finally:
+        metrics.remove_tracer(spans.append)
+
+    assert [span.name for span in spans] == ["inner", "outer"]
+    inner_span, outer_span = spans
+    assert metrics.parent_of(inner_span) is outer_span
+    assert inner_span.attributes == {"weather_http_status": 200, "prompt_tokens": 10, "completion_tokens": 3}
+    assert outer_span.attributes == {"extraction_cache": "miss"}
+    assert outer_span.duration >= inner_span.duration
+    # 추적 콜백만 등록된 경우 지표는 기록되지 않음
+    assert metrics.get_registry().get(metrics.LLM_TOKENS).value(type="prompt") == 0
+
+
+def test_tracer_errors_are_ignored(capsys):
+    def broken(span):
+        raise RuntimeError("콜백 오류")
+
+    metrics.add_tracer(broken)
+    try:
+        with metrics.span("stage") as span:
+            span.set("city", "Seoul")
+    finally:
+        metrics.remove_tracer(broken)
+    assert "추적 콜백 실행 중 오류 발생" in capsys.readouterr().out
+
+
+def test_async_spans_are_isolated_per_task():
+    spans = []
+    metrics.add_tracer(spans.append)
+
+    @metrics.timed("task")
+    async def task(name):
+        metrics.set_attribute("name", name)
+        await asyncio.sleep(0.01)
+        return metrics.current_span().attributes["name"]
+
+    async def main():
+        return await asyncio.gather(task("a"), task("b"))
+
+    try:
+        assert asyncio.run(main()) == ["a", "b"]
+    finally:
+        metrics.remove_tracer(spans.append)
+    assert sorted(span.attributes["name"] for span in spans) == ["a", "b"]
+    assert all(metrics.parent_of(span) is None for span in spans)
+
+
+def test_chatbot_pipeline_metrics():
+    metrics.enable_metrics()
+    completion = SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content="맑은 날씨입니다."))],
+        usage=SimpleNamespace(prompt_tokens=42, completion_tokens=7),
+    )
+    with patch("chatweather.chatbot.openai") as mock_openai, \
+            patch("chatweather.chatbot.forecast", return_value=(20.0, "맑음", "2024-10-29 12:00:00")):
+        mock_openai.chat.completions.create.return_value = completion
+        assert chatbot.generate_weather_response("내일 서울 날씨 알려줘", []) == "맑은 날씨입니다."
+
+    registry = metrics.get_registry()
+    stages = registry.get(metrics.STAGE_DURATION)
+    for stage in ("extract", "llm", "weather_response"):
+        assert stages.count(stage=stage, outcome="ok") == 1
+    assert registry.get(metrics.LLM_TOKENS).value(type="prompt") == 42
+    assert registry.get(metrics.LLM_TOKENS).value(type="completion") == 7
+    assert registry.get(metrics.HTTP_RESPONSES).value(upstream="openai", status=200) == 1
+    assert registry.get(metrics.CACHE_REQUESTS).value(cache="fastpath", outcome="hit") == 1
+    assert 'chatweather_llm_tokens_total{type="prompt"} 42' in metrics.export_prometheus()
+
+
+def test_streaming_llm_duration_and_time_to_first_token():
+    metrics.enable_metrics()
+    chunks = [SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+              for content in ("맑은 ", "날씨입니다.")]
+    with patch("chatweather.chatbot.openai") as mock_openai:
+        mock_openai.chat.completions.create.return_value = iter(chunks)
+        assert "".join(chatbot.call_openai_api_stream([{"role": "user", "content": "안녕"}])) == "맑은 날씨입니다."
+        mock_openai.chat.completions.create.side_effect = Exception("timeout")
+        list(chatbot.call_openai_api_stream([{"role": "user", "content": "안녕"}]))
+
+    registry = metrics.get_registry()
+    assert registry.get(metrics.STAGE_DURATION).count(stage="llm", outcome="ok") == 1
+    assert registry.get(metrics.STAGE_DURATION).count(stage="llm", outcome="error") == 1
+    text = metrics.export_prometheus()
+    assert 'chatweather_stage_duration_seconds_count{stage="llm",outcome="ok"} 1' in text
+    assert 'chatweather_stage_duration_seconds_count{stage="llm",outcome="error"} 1' in text
+    assert "# TYPE chatweather_llm_time_to_first_token_seconds histogram" in text
+    assert "chatweather_llm_time_to_first_token_seconds_count 1" in text
+
+
+def test_record_usage_reports_cached_prompt_tokens():
+    metrics.enable_metrics()
+    spans = []
+    metrics.add_tracer(spans.append)
+    try:
+        with metrics.span("llm"):
+            metrics.record_usage(SimpleNamespace(
+                prompt_tokens=1200, completion_tokens=20,
+                prompt_tokens_details=SimpleNamespace(cached_tokens=1024),
+            ))
+    finally:
+        metrics.remove_tracer(spans.append)
+
+    assert metrics.get_registry().get(metrics.LLM_TOKENS).value(type="cached") == 1024
+    assert spans[0].attributes["cached_tokens"] == 1024
+
+
+def test_weather_metrics_record_cache_and_status():
+    metrics.enable_metrics()
+    weather.clear_weather_cache()
+    response = Mock(status_code=200)
+    response.json.return_value = {'main': {'temp': 20}, 'weather': [{'description': '맑음'}]}
+    params = {'city': 'Seoul', 'serviceKey': 'key', 'target_date': '20210101120000'}
+    try:
+        with patch.object(weather.get_transport(), 'get', return_value=response), \
+                patch('chatweather.weather.get_current_datetime',
+                      return_value=datetime(2021, 1, 1, 12)):
+            weather.forecast(params)
+            weather.forecast(params)
+    finally:
+        weather.clear_weather_cache()
+
+    registry = metrics.get_registry()
+    assert registry.get(metrics.HTTP_RESPONSES).value(upstream="weather", status=200) == 1
+    assert registry.get(metrics.CACHE_REQUESTS).value(cache="current", outcome="miss") == 1
+    assert registry.get(metrics.CACHE_REQUESTS).value(cache="current", outcome="hit") == 1
+    assert registry.get(metrics.STAGE_DURATION).count(stage="forecast", outcome="ok") == 2
+    assert registry.get(metrics.STAGE_DURATION).count(stage="fetch_current_weather", outcome="ok") == 2
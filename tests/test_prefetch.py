@@ -0,0 +1,135 @@
+import time
+from datetime import datetime
+from unittest.mock import Mock, patch
+
+import pytest
+
+from chatweather import weather
+from chatweather.prefetch import DecayedCounter, PrefetchScheduler
+
+NOW = datetime(2021, 1, 1, 12)
+CURRENT_DATA = {'main': {'temp': 20}, 'weather': [{'description': '맑음'}]}
+FORECAST_DATA = {'list': [
+    {'dt': int(NOW.timestamp()), 'main': {'temp': 10.0}, 'weather': [{'description': '흐림'}]},
+]}
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    weather.clear_weather_cache()
+    yield
+    weather.clear_weather_cache()
+
+
+def make_response(url, params=None):
+    response = Mock(status_code=200)
+    response.json.return_value = FORECAST_DATA if url.endswith('forecast') else CURRENT_DATA
+    return response
+
+
+def test_decayed_counter_prefers_recent_requests():
+    clock = FakeClock()
+    counter = DecayedCounter(half_life=10, clock=clock)
+    for _ in range(4):
+        counter.add("Busan")
+    clock.now = 20
+    counter.add("Seoul")
+    counter.add("Seoul")
+
+    assert counter.score("Busan") == pytest.approx(1.0)
+    assert counter.score("Seoul") == pytest.approx(2.0)
+    assert [key for key, _ in counter.top(2)] == ["Seoul", "Busan"]
+
+
+def test_decayed_counter_drops_rare_keys():
+    counter = DecayedCounter(max_keys=4, clock=FakeClock())
+    for _ in range(3):
+        counter.add("Seoul")
+    for index in range(5):
+        counter.add(f"city-{index}")
+    assert len(counter) <= 4
+    assert "Seoul" in counter
+
+
+def test_forecast_calls_feed_the_counter():
+    scheduler = PrefetchScheduler(interval=60)
+    params = {'city': 'Seoul', 'serviceKey': 'key', 'target_date': NOW.strftime("%Y%m%d%H%M%S")}
+    with patch.object(weather.get_transport(), 'get', side_effect=make_response), \
+            patch('chatweather.weather.get_current_datetime', return_value=NOW):
+        with scheduler:
+            weather.forecast(params)
+            weather.forecast(dict(params, city='Busan'))
+            weather.forecast(params)
+        # 멈춘 뒤의 요청은 집계하지 않음
+        weather.forecast(dict(params, city='Daegu'))
+
+    assert not scheduler.running
+    assert [key[0] for key, _ in scheduler.counter.top(5)] == ['Seoul', 'Busan']
+
+
+def test_run_once_refreshes_top_cities_within_budget():
+    scheduler = PrefetchScheduler(top_n=2, refresh_budget=3, clock=time.time)
+    for city, count in (('Seoul', 3), ('Busan', 2), ('Daegu', 1)):
+        for _ in range(count):
+            scheduler.record(city, 'key', 'kr', 'metric')
+
+    with patch.object(weather.get_transport(), 'get', side_effect=make_response) as mock_get:
+        assert scheduler.run_once() == 3
+        assert mock_get.call_count == 3
+        # Seoul의 현재 날씨/예보, Busan의 현재 날씨까지만 갱신하고 예산 초과
+        assert scheduler.stats()['throttled'] == 1
+        assert weather.get_cached_forecast('Seoul', 'metric', 'kr') is not None
+        assert weather.get_cached_current('Busan', 'metric', 'kr') == (20, '맑음')
+        assert weather.get_cached_current('Daegu', 'metric', 'kr') is None
+
+        scheduler.refresh_budget = 10
+        assert scheduler.run_once() == 1
+        # 모두 캐시되어 만료 전이므로 더 이상 갱신하지 않음
+        assert scheduler.run_once() == 0
+    assert scheduler.stats()['refreshes'] == 4
+
+
+def test_current_weather_is_refreshed_before_expiry():
+    scheduler = PrefetchScheduler(top_n=1, lead_time=60)
+    scheduler.record('Seoul', 'key', 'kr', 'metric')
+    with patch.object(weather.get_transport(), 'get', side_effect=make_response):
+        scheduler.run_once()
+    expires_at = weather.cache_expires_at('weather', 'Seoul', 'metric', 'kr')
+
+    assert not scheduler._needs_refresh('weather', ('Seoul', 'metric', 'kr'), expires_at - 120)
+    assert scheduler._needs_refresh('weather', ('Seoul', 'metric', 'kr'), expires_at - 30)
+    # 예보는 다음 갱신 시각이 지나야 갱신
+    forecast_expiry = weather.cache_expires_at('forecast', 'Seoul', 'metric', 'kr')
+    assert not scheduler._needs_refresh('forecast', ('Seoul', 'metric', 'kr'), forecast_expiry - 30)
+    assert scheduler._needs_refresh('forecast', ('Seoul', 'metric', 'kr'), forecast_expiry + 1)
+
+
+def test_refresh_errors_are_counted(capsys):
+    scheduler = PrefetchScheduler(top_n=1)
+    scheduler.record('Seoul', 'key', 'kr', 'metric')
+    with patch.object(weather.get_transport(), 'get', side_effect=ConnectionError("연결 실패")):
+        scheduler.run_once()
+    assert scheduler.stats()['errors'] == 2
+    assert "날씨 미리 가져오기 중 오류 발생" in capsys.readouterr().out
+
+
+def test_start_and_stop_restore_observer():
+    previous = weather.set_request_observer(None)
+    try:
+        scheduler = PrefetchScheduler(interval=0.01)
+        scheduler.start()
+        assert scheduler.running
+        assert weather._request_observer == scheduler.record
+        assert scheduler.stop()
+        assert not scheduler.running
+        assert weather._request_observer is None
+    finally:
+        weather.set_request_observer(previous)
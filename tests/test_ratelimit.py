@@ -0,0 +1,150 @@
+from datetime import datetime
+from email.utils import formatdate
+from unittest.mock import Mock, patch
+
+import pytest
+
+from chatweather import chatbot, ratelimit, weather
+from chatweather.ratelimit import RateLimiter, ThrottledError, parse_retry_after
+from chatweather.transport import HTTPTransport
+
+NOW = datetime(2021, 1, 1, 12)
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture(autouse=True)
+def reset_limits():
+    ratelimit.reset_rate_limiters()
+    weather.clear_weather_cache()
+    yield
+    ratelimit.reset_rate_limiters()
+    weather.clear_weather_cache()
+
+
+def make_limiter(**limits):
+    clock = FakeClock()
+    return RateLimiter('weather', clock=clock, sleep=clock.sleep, **limits), clock
+
+
+def test_requests_queue_in_order_then_throttle():
+    limiter, clock = make_limiter(requests_per_minute=60, max_wait=2.0)
+    for _ in range(60):
+        assert limiter.acquire() == 0.0
+
+    # 버킷이 비면 1초 간격으로 순서대로 기다림
+    assert limiter.reserve() == pytest.approx(1.0)
+    assert limiter.reserve() == pytest.approx(2.0)
+    with pytest.raises(ThrottledError) as excinfo:
+        limiter.reserve()
+    assert excinfo.value.retry_after == pytest.approx(3.0)
+
+    clock.now += 3.0
+    assert limiter.acquire() == pytest.approx(0.0)
+    assert limiter.stats() == {'acquired': 63, 'queued': 2, 'throttled': 1, 'waited_seconds': 3.0}
+
+
+def test_token_limit_uses_estimated_prompt_size():
+    limiter, _ = make_limiter(requests_per_minute=500, tokens_per_minute=600, max_wait=0)
+    limiter.acquire(tokens=500)
+    with pytest.raises(ThrottledError):
+        limiter.acquire(tokens=200)
+    # 요청 수 한도에는 여유가 있으므로 토큰을 쓰지 않는 요청은 통과
+    limiter.acquire()
+
+    messages = [{"role": "user", "content": "서울 날씨 어때?"}]
+    assert ratelimit.estimate_request_tokens(messages, max_tokens=200) > 200
+
+
+def test_block_for_delays_every_caller():
+    limiter, clock = make_limiter(requests_per_minute=600, max_wait=10)
+    limiter.block_for(5)
+    assert limiter.acquire() == pytest.approx(5.0)
+    assert clock.now == pytest.approx(5.0)
+    assert limiter.acquire() == 0.0
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("잘못된 값") is None
+    assert parse_retry_after(formatdate(1000.0 + 30, usegmt=True), now=1000.0) == pytest.approx(30.0)
+
+
+def test_limits_are_per_key():
+    ratelimit.configure_rate_limit('weather', key='key-a', requests_per_minute=1, max_wait=0)
+    ratelimit.acquire('weather', 'key-a')
+    with pytest.raises(ThrottledError):
+        ratelimit.acquire('weather', 'key-a')
+    # 다른 키는 기본 한도를 사용
+    ratelimit.acquire('weather', 'key-b')
+    assert ratelimit.get_rate_limiter('weather', 'key-b').requests_per_minute == 60
+    assert ratelimit.get_rate_limit_stats()['weather:...ey-a']['throttled'] == 1
+
+
+def test_weather_429_blocks_key_and_returns_throttled_message():
+    response = Mock(status_code=429, headers={'Retry-After': '120'})
+    params = {'city': 'Seoul', 'serviceKey': 'key', 'target_date': NOW.strftime("%Y%m%d%H%M%S")}
+    with patch.object(weather.get_transport(), 'get', return_value=response) as mock_get, \
+            patch('chatweather.weather.get_current_datetime', return_value=NOW):
+        with pytest.raises(ThrottledError):
+            weather.forecast(params)
+        # Retry-After 동안은 API를 호출하지 않고 바로 한도 초과로 처리
+        with pytest.raises(ThrottledError):
+            weather.forecast(params)
+    assert mock_get.call_count == 1
+
+    with patch('chatweather.chatbot.extract_city_and_date', return_value=("Seoul", "20210101120000")), \
+            patch('chatweather.chatbot.forecast', side_effect=ThrottledError('weather', 120)):
+        assert chatbot.generate_weather_response("서울 날씨", []) == chatbot.THROTTLED_MESSAGE
+
+
+def test_openai_429_returns_throttled_message():
+    error = Exception("Rate limit reached")
+    error.status_code = 429
+    error.response = Mock(headers={'retry-after': '2'})
+    with patch('chatweather.chatbot.openai') as mock_openai:
+        mock_openai.api_key = 'sk-a'
+        mock_openai.chat.completions.create.side_effect = error
+        assert chatbot.generate_chat_response("안녕", []) == chatbot.THROTTLED_MESSAGE
+    # Retry-After 동안 그 API 키의 요청만 멈춤
+    limiter = ratelimit.get_rate_limiter('openai', 'sk-a')
+    assert limiter._blocked_until > limiter._clock() + 1
+    other = ratelimit.get_rate_limiter('openai')
+    assert other._blocked_until <= other._clock()
+
+
+def test_openai_limits_are_per_key():
+    ratelimit.configure_rate_limit('openai', key='sk-a', requests_per_minute=1, max_wait=0)
+    response = Mock(usage=None, choices=[Mock(message=Mock(content="답변"))])
+    with patch('chatweather.chatbot.openai') as mock_openai:
+        mock_openai.api_key = 'sk-a'
+        mock_openai.chat.completions.create.return_value = response
+        assert chatbot.call_openai_api([{"role": "user", "content": "안녕"}]) == "답변"
+        with pytest.raises(ThrottledError):
+            chatbot.call_openai_api([{"role": "user", "content": "안녕"}])
+        # 다른 키는 기본 한도를 사용
+        mock_openai.api_key = 'sk-b'
+        assert chatbot.call_openai_api([{"role": "user", "content": "안녕"}]) == "답변"
+
+
+def test_transport_waits_for_retry_after():
+    session = Mock()
+    session.get.side_effect = [Mock(status_code=429, headers={'Retry-After': '3'}), Mock(status_code=200)]
+    transport = HTTPTransport(session=session, backoff_max=8.0)
+    with patch('chatweather.transport.time.sleep') as mock_sleep:
+        assert transport.get('http://localhost/data').status_code == 200
+    assert mock_sleep.call_args[0][0] >= 3
+
+    # Retry-After가 최대 대기 시간보다 길면 재시도하지 않음
+    session.get.side_effect = [Mock(status_code=429, headers={'Retry-After': '60'})]
+    assert transport.get('http://localhost/data').status_code == 429
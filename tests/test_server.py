@@ -0,0 +1,178 @@
+import http.client
+import json
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from chatweather import chatbot
+from chatweather.server import ChatServer
+
+
+def post_chat(server, payload, raw=None):
+    host, port = server.url.replace("http://", "").split(":")
+    connection = http.client.HTTPConnection(host, int(port), timeout=5)
+    body = raw if raw is not None else json.dumps(payload).encode("utf-8")
+    connection.request("POST", "/chat", body=body, headers={"Content-Type": "application/json"})
+    response = connection.getresponse()
+    data = json.loads(response.read())
+    headers = dict(response.getheaders())
+    connection.close()
+    return response.status, data, headers
+
+
+def get(server, path):
+    host, port = server.url.replace("http://", "").split(":")
+    connection = http.client.HTTPConnection(host, int(port), timeout=5)
+    connection.request("GET", path)
+    response = connection.getresponse()
+    body = response.read()
+    connection.close()
+    return response.status, body
+
+
+def echo_responder(query, history):
+    return f"{len(history)}번째 이전 대화 뒤의 응답: {query}"
+
+
+def test_chat_keeps_history_per_session():
+    with ChatServer(port=0, responder=echo_responder) as server:
+        status, first, _ = post_chat(server, {"message": "안녕"})
+        assert status == 200
+        session_id = first["session_id"]
+        assert first["response"] == "0번째 이전 대화 뒤의 응답: 안녕"
+
+        _, second, _ = post_chat(server, {"session_id": session_id, "message": "서울 날씨 알려줘"})
+        assert second["session_id"] == session_id
+        assert second["response"].startswith("1번째")
+
+        _, other, _ = post_chat(server, {"session_id": "other", "message": "안녕"})
+        assert other["response"].startswith("0번째")
+        assert server.stats()["sessions"] == 2
+
+
+def test_chat_uses_generate_chat_response_by_default():
+    with patch("chatweather.chatbot.generate_chat_response", return_value="맑습니다.") as mock_response:
+        with ChatServer(port=0, extraction_mode="tool") as server:
+            status, data, _ = post_chat(server, {"session_id": "s1", "message": "서울 날씨 알려줘"})
+    assert status == 200
+    assert data["response"] == "맑습니다."
+    assert mock_response.call_args.kwargs["extraction_mode"] == "tool"
+
+
+def test_chat_failed_response_returns_error_message():
+    with ChatServer(port=0, responder=lambda query, history: None) as server:
+        status, data, _ = post_chat(server, {"message": "안녕"})
+    assert status == 200
+    assert data["response"] == "죄송합니다, 요청을 처리하는 중 오류가 발생했습니다."
+
+
+@pytest.mark.parametrize("payload,raw", [
+    (None, b"{not json"),
+    ({"message": ""}, None),
+    ({"message": "안녕", "session_id": "../../etc"}, None),
+])
+def test_chat_rejects_invalid_requests(payload, raw):
+    with ChatServer(port=0, responder=echo_responder) as server:
+        status, data, _ = post_chat(server, payload, raw=raw)
+    assert status == 400
+    assert "error" in data
+
+
+def test_unknown_path_and_healthz():
+    with ChatServer(port=0, responder=echo_responder) as server:
+        assert get(server, "/unknown")[0] == 404
+        status, body = get(server, "/healthz")
+    assert status == 200
+    assert json.loads(body)["status"] == "ok"
+
+
+def test_overloaded_server_returns_503():
+    release = threading.Event()
+
+    def slow_responder(query, history):
+        release.wait(5)
+        return "응답"
+
+    with ChatServer(port=0, responder=slow_responder, max_concurrency=1, queue_timeout=0.05) as server:
+        results = []
+        worker = threading.Thread(target=lambda: results.append(post_chat(server, {"message": "첫 요청"})))
+        worker.start()
+        while server.stats()["in_flight"] == 0:
+            time.sleep(0.01)
+
+        status, data, headers = post_chat(server, {"message": "두 번째 요청"})
+        assert status == 503
+        assert headers["Retry-After"] == "1"
+
+        release.set()
+        worker.join()
+        assert results[0][0] == 200
+        assert server.stats()["rejected"] == 1
+
+
+def test_request_timeout_returns_504():
+    release = threading.Event()
+
+    def slow_responder(query, history):
+        release.wait(5)
+        return "응답"
+
+    with ChatServer(port=0, responder=slow_responder, request_timeout=0.05) as server:
+        status, data, _ = post_chat(server, {"message": "안녕"})
+        release.set()
+    assert status == 504
+    assert server.stats()["timeouts"] == 1
+
+
+def test_graceful_shutdown_waits_for_in_flight_requests():
+    started = threading.Event()
+
+    def slow_responder(query, history):
+        started.set()
+        time.sleep(0.2)
+        return "완료"
+
+    server = ChatServer(port=0, responder=slow_responder).start()
+    results = []
+    worker = threading.Thread(target=lambda: results.append(post_chat(server, {"message": "안녕"})))
+    worker.start()
+    started.wait(5)
+
+    assert server.shutdown(drain_timeout=5) is True
+    worker.join()
+    assert results[0][0] == 200
+    assert results[0][1]["response"] == "완료"
+    assert server.stats()["status"] == "draining"
+
+
+def test_shutdown_cancels_queued_work_without_cancel_futures():
+    from concurrent.futures import Future
+
+    server = ChatServer(port=0, responder=echo_responder).start()
+    queued = Future()
+    server._pending.add(queued)
+    # Python 3.8의 ThreadPoolExecutor.shutdown()은 cancel_futures 인자를 받지 않음
+    with patch.object(server._executor, 'shutdown', wraps=server._executor.shutdown) as shutdown:
+        assert server.shutdown(drain_timeout=1) is True
+    shutdown.assert_called_once_with(wait=False)
+    assert queued.cancelled()
+
+
+def test_throttled_response_returns_429_without_recording_turn():
+    with ChatServer(port=0, responder=lambda query, history: chatbot.THROTTLED_MESSAGE) as server:
+        status, body, headers = post_chat(server, {"session_id": "s1", "message": "서울 날씨"})
+        assert status == 429
+        assert body["error"] == chatbot.THROTTLED_MESSAGE
+        assert "Retry-After" in headers
+        assert len(server.get_session("s1")) == 0
+        assert server.stats()["throttled"] == 1
+
+
+def test_deadline_response_returns_504_without_recording_turn():
+    with ChatServer(port=0, responder=lambda query, history: chatbot.DEADLINE_MESSAGE) as server:
+        status, body, _ = post_chat(server, {"session_id": "s1", "message": "서울 날씨"})
+        assert status == 504
+        assert len(server.get_session("s1")) == 0
+        assert server.stats()["timeouts"] == 1
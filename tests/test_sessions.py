@@ -0,0 +1,144 @@
+import pytest
+
+from chatweather.sessions import Session, SessionStore, SQLiteSessionBackend
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_get_returns_same_session(clock):
+    store = SessionStore(clock=clock)
+    session = store.get("a")
+    assert isinstance(session, Session)
+    assert store.get("a") is session
+    assert store.get("b") is not session
+    assert len(store) == 2
+
+
+def test_max_turns_folds_old_turns_into_summary(clock):
+    summarized = []
+
+    def summarizer(summary, turns):
+        summarized.extend(turn.user for turn in turns)
+        return "요약"
+
+    store = SessionStore(summarizer=summarizer, max_turns=2, clock=clock)
+    session = store.get("a")
+    for index in range(4):
+        session.add_turn(f"질문{index}", f"응답{index}")
+
+    assert [turn.user for turn in session] == ["질문2", "질문3"]
+    assert summarized == ["질문0", "질문1"]
+    assert session.summary == "요약"
+    assert session.first_seq == 2
+
+
+def test_idle_sessions_expire(clock):
+    store = SessionStore(idle_ttl=60, clock=clock)
+    old = store.get("old")
+    old.add_turn("안녕", "안녕하세요")
+    clock.now += 30
+    store.get("recent")
+    clock.now += 40
+
+    fresh = store.get("recent")
+    assert "old" not in store
+    assert fresh is store.get("recent")
+    assert store.get("old") is not old
+    assert len(store.get("old")) == 0
+    assert store.stats()["expirations"] == 1
+
+
+def test_memory_cap_evicts_least_recently_used(clock):
+    store = SessionStore(max_memory_bytes=1, clock=clock)
+    first = store.get("first")
+    first.add_turn("안녕", "안녕하세요")
+    second = store.get("second")
+    second.add_turn("날씨", "맑음")
+
+    assert "first" not in store
+    assert "second" in store
+    stats = store.stats()
+    assert stats["evictions"] == 1
+    assert stats["memory_bytes"] == second.memory_bytes()
+
+
+def test_memory_accounting_tracks_turns(clock):
+    store = SessionStore(clock=clock)
+    session = store.get("a")
+    empty = store.stats()["memory_bytes"]
+    session.add_turn("서울 날씨 알려줘", "맑습니다.")
+    assert store.stats()["memory_bytes"] > empty
+    store.delete("a")
+    assert store.stats()["memory_bytes"] == 0
+
+
+def test_sqlite_backend_restores_evicted_session(tmp_path, clock):
+    backend = SQLiteSessionBackend(str(tmp_path / "sessions.db"))
+    store = SessionStore(max_turns=2, max_memory_bytes=1, backend=backend, clock=clock,
+                         summarizer=lambda summary, turns: "이전 요약")
+    session = store.get("a")
+    for index in range(3):
+        session.add_turn(f"질문{index}", f"응답{index}")
+    store.get("b")
+    assert "a" not in store
+
+    restored = store.get("a")
+    assert restored is not session
+    assert restored.summary == "이전 요약"
+    assert [(turn.user, turn.bot) for turn in restored] == [("질문1", "응답1"), ("질문2", "응답2")]
+    restored.add_turn("질문3", "응답3")
+    store.close()
+
+    # 새 프로세스처럼 같은 파일을 다시 열어 확인
+    backend = SQLiteSessionBackend(str(tmp_path / "sessions.db"))
+    store = SessionStore(max_turns=2, backend=backend, clock=clock)
+    reopened = store.get("a")
+    assert [turn.user for turn in reopened] == ["질문2", "질문3"]
+    assert reopened.next_seq == 4
+    store.close()
+
+
+def test_sqlite_backend_batches_and_deletes(tmp_path):
+    backend = SQLiteSessionBackend(str(tmp_path / "sessions.db"), batch_size=1000, flush_interval=60)
+    try:
+        backend.save("a", 10.0, "", 0, [("질문", "응답")])
+        backend.save("a", 11.0, "", 0, [("질문", "응답"), ("질문2", "응답2")])
+        backend.save("b", 5.0, "", 0, [("질문", "응답")])
+        # 기록 전에도 대기 중인 상태를 읽음
+        assert backend.load("a")[3] == [("질문", "응답"), ("질문2", "응답2")]
+        backend.flush()
+        assert backend.batches == 1
+        assert backend.load("a") == (11.0, "", 0, [("질문", "응답"), ("질문2", "응답2")])
+
+        backend.delete("a")
+        assert backend.load("a") is None
+        backend.delete_idle(6.0)
+        backend.flush()
+        assert backend.load("a") is None
+        assert backend.load("b") is None
+    finally:
+        backend.close()
+
+
+def test_expired_session_in_backend_is_not_restored(tmp_path, clock):
+    backend = SQLiteSessionBackend(str(tmp_path / "sessions.db"))
+    store = SessionStore(idle_ttl=60, backend=backend, clock=clock)
+    store.get("a").add_turn("안녕", "안녕하세요")
+    store.close()
+
+    clock.now += 120
+    store = SessionStore(idle_ttl=60, backend=SQLiteSessionBackend(str(tmp_path / "sessions.db")), clock=clock)
+    assert len(store.get("a")) == 0
+    assert store.stats()["expirations"] == 1
+    store.close()
@@ -0,0 +1,181 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from unittest.mock import Mock, patch
+
+import pytest
+
+from chatweather import aio, chatbot, weather
+from chatweather.singleflight import SingleFlight
+
+TARGET = datetime(2021, 1, 1, 12)
+FORECAST_DATA = {'list': [
+    {'dt': int(TARGET.timestamp()), 'main': {'temp': 10.0}, 'weather': [{'description': '맑음'}]},
+]}
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    weather.clear_weather_cache()
+    chatbot.clear_extraction_cache()
+    yield
+    weather.clear_weather_cache()
+    chatbot.clear_extraction_cache()
+
+
+def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        started.set()
+        release.wait()
+        return "결과"
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        leader = executor.submit(flights.do, "key", work)
+        started.wait()
+        followers = [executor.submit(flights.do, "key", work) for _ in range(4)]
+        while flights.stats()['shared'] < 4:
+            time.sleep(0.001)
+        release.set()
+        results = [leader.result()] + [future.result() for future in followers]
+
+    assert results == ["결과"] * 5
+    assert len(calls) == 1
+    assert flights.stats() == {'leaders': 1, 'shared': 4}
+    assert flights.in_flight() == 0
+
+
+def test_error_is_shared_and_key_is_released():
+    flights = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def fail():
+        started.set()
+        release.wait()
+        raise RuntimeError("실패")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(flights.do, "key", fail)
+        started.wait()
+        follower = executor.submit(flights.do, "key", fail)
+        while flights.stats()['shared'] < 1:
+            time.sleep(0.001)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(RuntimeError):
+                future.result()
+
+    # 끝난 호출은 보관하지 않으므로 다음 호출은 다시 실행됨
+    assert flights.do("key", lambda: "다시") == "다시"
+
+
+def test_async_calls_share_one_task():
+    flights = SingleFlight()
+    calls = []
+
+    async def work(value):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        return value * 2
+
+    async def main():
+        return await asyncio.gather(*(flights.do_async("key", work, 21) for _ in range(5)))
+
+    assert asyncio.run(main()) == [42] * 5
+    assert calls == [21]
+    assert flights.stats() == {'leaders': 1, 'shared': 4}
+    assert flights.in_flight() == 0
+
+
+def test_cancelled_async_waiter_does_not_cancel_shared_task():
+    flights = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.02)
+        return "결과"
+
+    async def main():
+        first = asyncio.ensure_future(flights.do_async("key", work))
+        second = asyncio.ensure_future(flights.do_async("key", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == "결과"
+
+
+def test_concurrent_forecast_requests_are_coalesced():
+    release = threading.Event()
+    response = Mock(status_code=200)
+    response.json.return_value = FORECAST_DATA
+
+    def slow_get(url, params=None):
+        release.wait(timeout=5)
+        return response
+
+    with patch.object(weather.get_transport(), 'get', side_effect=slow_get) as mock_get:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            futures = [executor.submit(weather.load_forecast_weather, 'Seoul', 'key', 'kr', 'metric')
+                       for _ in range(8)]
+            while weather.get_cache_stats()['inflight']['shared'] < 7:
+                time.sleep(0.001)
+            release.set()
+            tables = [future.result() for future in futures]
+
+    assert mock_get.call_count == 1
+    assert all(table is tables[0] for table in tables)
+
+
+def test_concurrent_async_forecast_requests_are_coalesced():
+    response = Mock(status_code=200)
+    response.json.return_value = FORECAST_DATA
+    calls = []
+
+    class SlowTransport:
+        async def get(self, url, params=None):
+            calls.append(url)
+            await asyncio.sleep(0.01)
+            return response
+
+    async def main():
+        return await asyncio.gather(*(
+            aio.fetch_forecast_weather('Seoul', 'key', 'kr', 'metric', TARGET)
+            for _ in range(5)
+        ))
+
+    previous = aio.set_transport(SlowTransport())
+    try:
+        results = asyncio.run(main())
+    finally:
+        aio.set_transport(previous)
+
+    assert len(calls) == 1
+    assert [result[:2] for result in results] == [(10.0, '맑음')] * 5
+
+
+def test_concurrent_extractions_share_one_llm_call():
+    release = threading.Event()
+
+    def slow_call(messages, *args, **kwargs):
+        release.wait(timeout=5)
+        return '{"city": "Seoul", "date": "20231027120000"}'
+
+    with patch('chatweather.chatbot.call_openai_api', side_effect=slow_call) as mock_call:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(chatbot.extract_city_and_date, "그 도시 날씨 알려줘", False)
+                       for _ in range(4)]
+            while chatbot.get_extraction_cache_stats()['inflight']['shared'] < 3:
+                time.sleep(0.001)
+            release.set()
+            results = [future.result() for future in futures]
+
+    assert mock_call.call_count == 1
+    assert results == [("Seoul", "20231027120000")] * 4
@@ -0,0 +1,68 @@
+import threading
+import time
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+from chatweather import chatbot, speculation
+from chatweather.speculation import guess_city, guess_endpoint
+
+
+@pytest.fixture(autouse=True)
+def reset():
+    speculation.reset_speculation_stats()
+    chatbot.clear_extraction_cache()
+    yield
+    speculation.set_speculation(False)
+    speculation.reset_speculation_stats()
+
+
+@pytest.mark.parametrize("query,history,expected", [
+    ("다음주 월요일 부산 날씨 어때?", [], 'Busan'),
+    ("거기 이번 주말 날씨는?", [{"user": "내일 제주도 날씨 알려줘", "bot": "제주의 내일 날씨는 맑음입니다."}], 'Jeju City'),
+    ("이번 주말 날씨는?", [], 'Seoul'),
+    ("서울, 부산 중에 어디가 더 따뜻해?", [], None),
+])
+def test_guess_city(query, history, expected):
+    assert guess_city(query, history) == expected
+
+
+def test_guess_endpoint():
+    assert guess_endpoint("양평 날씨") == 'weather'
+    assert guess_endpoint("오늘 저녁 양평 날씨") == 'weather'
+    assert guess_endpoint("내일 양평 날씨") == 'forecast'
+    assert guess_endpoint("다음주 화요일 양평 날씨") == 'forecast'
+    assert guess_endpoint("11월 3일 양평 날씨") == 'forecast'
+
+
+def test_resolve_hit_waits_and_records_saved_time():
+    release = threading.Event()
+    spec = speculation.start('Busan', 'forecast', release.wait, 1)
+    time.sleep(0.05)
+    release.set()
+    assert spec.resolve('Busan', 'forecast') is True
+    assert spec.resolve('Seoul', 'forecast') is False
+    stats = speculation.get_speculation_stats()
+    assert stats['hits'] == 1 and stats['misses'] == 1 and stats['hit_rate'] == 0.5
+    assert stats['saved_seconds'] >= 0.04
+
+
+def test_weather_response_overlaps_fetch_with_extraction():
+    speculation.set_speculation(True)
+    fetched = []
+
+    def slow_extraction(query, deadline=None):
+        time.sleep(0.05)
+        return "Busan", "20991028120000"
+
+    with patch('chatweather.chatbot.get_current_datetime', return_value=datetime(2023, 10, 27, 12)), \
+            patch('chatweather.chatbot.load_forecast_weather', side_effect=lambda *args: fetched.append(args)), \
+            patch('chatweather.chatbot.extract_city_and_date', side_effect=slow_extraction), \
+            patch('chatweather.chatbot.generate_weather_info', return_value=(22.0, "맑음", "2099-10-28 12:00:00")), \
+            patch('chatweather.chatbot.call_openai_api', return_value="답변"):
+        assert chatbot.generate_weather_response("다음주 화요일 부산 날씨 어때?", []) == "답변"
+        # 규칙 기반 추출로 끝나는 질의는 추측하지 않음
+        chatbot.generate_weather_response("내일 부산 날씨", [])
+    assert [args[0] for args in fetched] == ['Busan']
+    assert speculation.get_speculation_stats()['hits'] == 1
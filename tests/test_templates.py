@@ -0,0 +1,45 @@
+import random
+from datetime import datetime
+
+import pytest
+
+from chatweather.templates import classify_condition, describe_when, render_weather_answer, temperature_phrases
+
+NOW = datetime(2024, 1, 15, 9, 30)
+
+
+@pytest.mark.parametrize("sky, expected", [
+    ("맑음", "clear"),
+    ("튼구름", "cloudy"),
+    ("약한 비", "rain"),
+    ("눈", "snow"),
+    ("천둥번개를 동반한 비", "thunder"),
+    ("박무", "fog"),
+    ("light rain", "rain"),
+    ("알 수 없음", "unknown"),
+])
+def test_classify_condition(sky, expected):
+    assert classify_condition(sky) == expected
+
+
+def test_describe_when_uses_relative_day_and_time_of_day():
+    assert describe_when(NOW, now=NOW) == "지금"
+    assert describe_when(datetime(2024, 1, 15, 18), now=NOW) == "오늘 저녁 6시"
+    assert describe_when(datetime(2024, 1, 16, 9), now=NOW) == "내일 아침 9시"
+    assert describe_when("2024-01-17 03:00:00", now=NOW) == "모레 새벽 3시"
+    assert describe_when(datetime(2024, 1, 19, 12), now=NOW) == "1월 19일 낮 12시"
+
+
+def test_render_weather_answer_varies_by_condition_and_temperature():
+    rng = random.Random(0)
+    cold_rain = render_weather_answer("Busan", 3.0, "약한 비", datetime(2024, 1, 16, 9), now=NOW, rng=rng)
+    assert "부산" in cold_rain and "3.0도" in cold_rain and "우산" in cold_rain
+    assert any(phrase in cold_rain for phrase in temperature_phrases(3.0))
+
+    hot_clear = render_weather_answer("Seoul", 33.0, "맑음", NOW, now=NOW, rng=rng)
+    assert "서울" in hot_clear and "지금" in hot_clear
+    assert any(phrase in hot_clear for phrase in temperature_phrases(33.0))
+
+    variants = {render_weather_answer("Seoul", 15.0, "맑음", NOW, now=NOW, rng=random.Random(seed))
+                for seed in range(20)}
+    assert len(variants) > 1
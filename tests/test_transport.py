@@ -0,0 +1,84 @@
+import pytest
+from unittest.mock import Mock, patch
+
+import requests
+
+from chatweather import weather
+from chatweather.transport import HTTPTransport
+
+
+def make_response(status_code):
+    response = Mock()
+    response.status_code = status_code
+    return response
+
+
+@pytest.fixture(autouse=True)
+def no_sleep():
+    with patch('chatweather.transport.time.sleep') as mock_sleep:
+        yield mock_sleep
+
+
+def test_transport_uses_timeouts():
+    session = Mock()
+    session.get.return_value = make_response(200)
+    transport = HTTPTransport(connect_timeout=1, read_timeout=2, session=session)
+
+    response = transport.get('http://localhost/data', params={'q': 'Seoul'})
+
+    assert response.status_code == 200
+    session.get.assert_called_once_with('http://localhost/data', params={'q': 'Seoul'}, timeout=(1, 2))
+
+
+def test_transport_retries_on_server_error(no_sleep):
+    session = Mock()
+    session.get.side_effect = [make_response(503), make_response(429), make_response(200)]
+    transport = HTTPTransport(max_retries=2, session=session)
+
+    response = transport.get('http://localhost/data')
+
+    assert response.status_code == 200
+    assert session.get.call_count == 3
+    assert no_sleep.call_count == 2
+
+
+def test_transport_returns_last_response_when_retries_exhausted():
+    session = Mock()
+    session.get.side_effect = [make_response(500), make_response(502)]
+    transport = HTTPTransport(max_retries=1, session=session)
+
+    assert transport.get('http://localhost/data').status_code == 502
+
+
+def test_transport_does_not_retry_client_error():
+    session = Mock()
+    session.get.return_value = make_response(404)
+    transport = HTTPTransport(session=session)
+
+    assert transport.get('http://localhost/data').status_code == 404
+    assert session.get.call_count == 1
+
+
+def test_transport_raises_connection_error_after_retries():
+    session = Mock()
+    session.get.side_effect = requests.exceptions.ConnectionError()
+    transport = HTTPTransport(max_retries=2, session=session)
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        transport.get('http://localhost/data')
+    assert session.get.call_count == 3
+
+
+def test_transport_backoff_is_bounded():
+    transport = HTTPTransport(backoff_base=1, backoff_max=4, session=Mock())
+    for attempt in range(10):
+        assert 0 <= transport.backoff(attempt) <= 4
+
+
+def test_set_transport_injection():
+    fake = Mock()
+    previous = weather.set_transport(fake)
+    try:
+        assert weather.get_transport() is fake
+    finally:
+        weather.set_transport(previous)
@@ -4,12 +4,26 @@ from datetime import datetime, timedelta
 
 import requests
 
+from chatweather import geocode
 from chatweather.weather import (
     forecast,
     fetch_current_weather,
-    fetch_forecast_weather
+    fetch_forecast_weather,
+    clear_weather_cache,
+    get_cache_stats,
+    next_forecast_update,
+    get_transport,
+    forecast_many,
 )
 
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    clear_weather_cache()
+    yield
+    clear_weather_cache()
+
+
 # 성공적인 현재 날씨 조회 테스트
 def test_current_weather_success():
     fixed_now = datetime(2021, 1, 1, 12, 0, 0)
@@ -28,7 +42,7 @@ def test_current_weather_success():
     mock_response.status_code = 200
     mock_response.raise_for_status = Mock()
 
-    with patch('chatweather.weather.requests.get', return_value=mock_response):
+    with patch.object(get_transport(), 'get', return_value=mock_response):
         with patch('chatweather.weather.get_current_datetime', return_value=fixed_now):
             temp, sky, dt = forecast(params)
 
@@ -60,7 +74,7 @@ def test_forecast_weather_success():
     mock_response.status_code = 200
     mock_response.raise_for_status = Mock()
 
-    with patch('chatweather.weather.requests.get', return_value=mock_response):
+    with patch.object(get_transport(), 'get', return_value=mock_response):
         with patch('chatweather.weather.set_api_datetime', return_value=target_date):
             temp, sky, dt = forecast(params)
 
@@ -68,6 +82,26 @@ def test_forecast_weather_success():
             assert sky == '구름 조금'
             assert dt == target_date
 
+# 다르게 쓴 도시 이름이 하나의 좌표 요청과 캐시를 공유하는지 테스트
+def test_city_aliases_share_coordinate_request():
+    fixed_now = datetime(2021, 1, 1, 12, 0, 0)
+    mock_response = Mock()
+    mock_response.json.return_value = {'main': {'temp': 20}, 'weather': [{'description': '맑음'}]}
+    mock_response.status_code = 200
+
+    with patch.object(get_transport(), 'get', return_value=mock_response) as mock_get, \
+            patch('chatweather.weather.get_current_datetime', return_value=fixed_now):
+        for city in ('Busan', 'Pusan', 'busan, KR', '부산'):
+            params = {'city': city, 'serviceKey': 'key', 'target_date': fixed_now.strftime("%Y%m%d%H%M%S")}
+            assert forecast(params)[:2] == (20, '맑음')
+
+    assert mock_get.call_count == 1
+    query = mock_get.call_args.kwargs['params']
+    assert 'q' not in query
+    assert (query['lat'], query['lon']) == (geocode.lookup('Busan').lat, geocode.lookup('Busan').lon)
+    assert get_cache_stats()['current']['hits'] == 3
+
+
 # API 키 누락 테스트
 def test_forecast_missing_api_key(capsys):
     params = {
@@ -121,7 +155,7 @@ def test_forecast_invalid_city_name(capsys):
     mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError()
     mock_response.reason = 'Not Found'
 
-    with patch('chatweather.weather.requests.get', return_value=mock_response):
+    with patch.object(get_transport(), 'get', return_value=mock_response):
         temp, sky, dt = forecast(params)
         captured = capsys.readouterr()
         assert "Error: 도시 'InvalidCity'를 찾을 수 없습니다." in captured.out
@@ -142,7 +176,7 @@ def test_forecast_invalid_api_key(capsys):
     mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError()
     mock_response.reason = 'Unauthorized'
 
-    with patch('chatweather.weather.requests.get', return_value=mock_response):
+    with patch.object(get_transport(), 'get', return_value=mock_response):
         temp, sky, dt = forecast(params)
         captured = capsys.readouterr()
         assert "Error: 잘못된 API 키입니다." in captured.out
@@ -167,7 +201,7 @@ def test_fetch_current_weather():
     mock_response.status_code = 200
     mock_response.raise_for_status = Mock()
 
-    with patch('chatweather.weather.requests.get', return_value=mock_response):
+    with patch.object(get_transport(), 'get', return_value=mock_response):
         with patch('chatweather.weather.get_current_datetime', return_value=fixed_now):
             temp, sky, dt = fetch_current_weather(city, api_key, lang, units)
             assert temp == 20
@@ -196,7 +230,7 @@ def test_fetch_forecast_weather():
     mock_response.status_code = 200
     mock_response.raise_for_status = Mock()
 
-    with patch('chatweather.weather.requests.get', return_value=mock_response):
+    with patch.object(get_transport(), 'get', return_value=mock_response):
         temp, sky, dt = fetch_forecast_weather(city, api_key, lang, units, target_date)
         assert temp == 15
         assert sky == '구름 조금'
@@ -226,7 +260,7 @@ def test_forecast_no_matching_forecast(capsys):
     mock_response.status_code = 200
     mock_response.raise_for_status = Mock()
 
-    with patch('chatweather.weather.requests.get', return_value=mock_response):
+    with patch.object(get_transport(), 'get', return_value=mock_response):
         with patch('chatweather.weather.set_api_datetime', return_value=target_date):
             temp, sky, dt = forecast(params)
             captured = capsys.readouterr()
@@ -234,3 +268,122 @@ def test_forecast_no_matching_forecast(capsys):
             assert temp is None
             assert sky is None
             assert dt is None
+
+# 예보 캐시 적중 테스트: 같은 도시의 다른 날짜시간도 네트워크 요청 없이 조회
+def test_forecast_weather_cached_window():
+    first = datetime(2021, 1, 2, 12, 0, 0)
+    second = first + timedelta(hours=3)
+
+    sample_response = {
+        'list': [
+            {
+                'dt': int(first.timestamp()),
+                'main': {'temp': 15},
+                'weather': [{'description': '구름 조금'}],
+            },
+            {
+                'dt': int(second.timestamp()),
+                'main': {'temp': 17},
+                'weather': [{'description': '맑음'}],
+            },
+        ]
+    }
+    mock_response = Mock()
+    mock_response.json.return_value = sample_response
+    mock_response.status_code = 200
+    mock_response.raise_for_status = Mock()
+
+    with patch.object(get_transport(), 'get', return_value=mock_response) as mock_get:
+        assert fetch_forecast_weather('Seoul', 'key', 'kr', 'metric', first) == (15, '구름 조금', first)
+        assert fetch_forecast_weather('Seoul', 'key', 'kr', 'metric', second) == (17, '맑음', second)
+        assert mock_get.call_count == 1
+
+        # 언어가 다르면 별도의 캐시 키를 사용
+        fetch_forecast_weather('Seoul', 'key', 'en', 'metric', first)
+        assert mock_get.call_count == 2
+
+    stats = get_cache_stats()['forecast']
+    assert stats['hits'] == 1
+    assert stats['misses'] == 2
+
+
+# 현재 날씨 캐시 및 오류 미캐시 테스트
+def test_current_weather_cached_and_errors_not_cached():
+    error_response = Mock()
+    error_response.status_code = 404
+    error_response.raise_for_status.side_effect = requests.exceptions.HTTPError()
+    error_response.reason = 'Not Found'
+
+    ok_response = Mock()
+    ok_response.json.return_value = {'main': {'temp': 20}, 'weather': [{'description': '맑음'}]}
+    ok_response.raise_for_status = Mock()
+
+    with patch.object(get_transport(), 'get', side_effect=[error_response, ok_response]) as mock_get:
+        assert fetch_current_weather('Seoul', 'key', 'kr', 'metric') == (None, None, None)
+        assert fetch_current_weather('Seoul', 'key', 'kr', 'metric')[:2] == (20, '맑음')
+        assert fetch_current_weather('Seoul', 'key', 'kr', 'metric')[:2] == (20, '맑음')
+        assert mock_get.call_count == 2
+
+
+def test_next_forecast_update():
+    assert next_forecast_update(0) == 3 * 60 * 60
+    assert next_forecast_update(3 * 60 * 60 - 1) == 3 * 60 * 60
+    assert next_forecast_update(3 * 60 * 60) == 6 * 60 * 60
+
+
+# forecast_many: 도시별로 한 번만 요청하고 입력 순서대로 결과 반환
+def test_forecast_many_deduplicates_and_keeps_order():
+    fixed_now = datetime(2021, 1, 1, 12, 0, 0)
+    first = datetime(2021, 1, 2, 12, 0, 0)
+    second = datetime(2021, 1, 2, 15, 0, 0)
+
+    def make_forecast_response(temp):
+        response = Mock()
+        response.json.return_value = {
+            'list': [
+                {'dt': int(first.timestamp()), 'main': {'temp': temp}, 'weather': [{'description': '맑음'}]},
+                {'dt': int(second.timestamp()), 'main': {'temp': temp + 1}, 'weather': [{'description': '흐림'}]},
+            ]
+        }
+        response.raise_for_status = Mock()
+        return response
+
+    not_found = Mock()
+    not_found.status_code = 404
+    not_found.raise_for_status.side_effect = requests.exceptions.HTTPError()
+
+    responses = {'Seoul': make_forecast_response(10), 'Busan': make_forecast_response(20), 'Nowhere': not_found}
+    coordinates = {(geocode.lookup(city).lat, geocode.lookup(city).lon): city for city in ('Seoul', 'Busan')}
+
+    def fake_get(url, params=None):
+        # 도시 색인에 있는 도시는 좌표로, 없는 도시는 이름으로 요청
+        if 'q' in params:
+            return responses[params['q']]
+        return responses[coordinates[(params['lat'], params['lon'])]]
+
+    params_list = [
+        {'city': 'Seoul', 'serviceKey': 'key', 'target_date': '20210102120000'},
+        {'city': 'Busan', 'serviceKey': 'key', 'target_date': '20210102150000'},
+        {'city': 'Seoul', 'serviceKey': 'key', 'target_date': '20210102150000'},
+        {'city': 'Nowhere', 'serviceKey': 'key', 'target_date': '20210102120000'},
+        {'city': 'Seoul', 'target_date': '20210102120000'},
+        {'city': 'Busan', 'serviceKey': 'key', 'target_date': '20210109120000'},
+    ]
+
+    with patch.object(get_transport(), 'get', side_effect=fake_get) as mock_get, \
+            patch('chatweather.weather.get_current_datetime', return_value=fixed_now), \
+            patch('chatweather.weather.set_api_datetime', side_effect=lambda dt: dt):
+        results = forecast_many(params_list, max_workers=4)
+
+    assert mock_get.call_count == 3
+    assert results[0] == (10, '맑음', first, None)
+    assert results[1] == (21, '흐림', second, None)
+    assert results[2] == (11, '흐림', second, None)
+    assert results[3].error == "Error: 도시 'Nowhere'를 찾을 수 없습니다."
+    assert results[4].error == "Error: API 키 ('serviceKey')가 필요합니다."
+    assert results[5].temp is None
+    assert results[5].error == "지정된 날짜와 시간에 대한 예보를 찾을 수 없습니다."
+
+
+def test_forecast_many_empty():
+    assert forecast_many([]) == []